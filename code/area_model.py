@@ -0,0 +1,386 @@
+#=========================================================================
+# area_model.py
+#=========================================================================
+# Area of any IO, O3 or LTA configuration, built up from its parsed
+# design point (see design_points.py):
+#
+#   core      the in-order or out-of-order core, or the LTA core
+#   caches    32KB I$ + 32KB D$ (direct-mapped)
+#   crossbar  between the lanes and the D$, one port per lane in a
+#             lane group
+#   pib       the extra PIBs of a config decoupled in time; the LTA core
+#             already holds one per lane group
+#
+# and multiplied by the core count for the multicore (MC-) configs.
+#
+#   area_model.area( 'LTA-8/4x4/2' )          # um^2
+#   area_model.areas( configs )               # numpy array, one per config
+#   area_model.breakdown( configs, groups )   # mm^2 per component group
+#
+# The synthesized areas below are used wherever a config was measured.
+# Everything else comes from a fit to them: the crossbar as a power law
+# in its port count, and the LTA core from the measured per-component
+# breakdowns, each component scaled with the structure it replicates
+# (e.g. the register files with the uthreads, the long-latency FUs with
+# the lanes sharing a lane group). Results are memoized per label, and
+# areas evaluates a whole sweep with array operations.
+#
+
+import numpy as np
+
+import design_points
+
+#-------------------------------------------------------------------------
+# Synthesized areas (um^2)
+#-------------------------------------------------------------------------
+
+io_core_area  = 75981.95
+o3_core_area  = 75981.95 * 3
+cache_area    = 262005.78
+pib_area      = 1064.40
+mc_cores      = 4
+
+crossbar_area = {
+  1 :   8495.39,
+  2 :  24272.54,
+  4 :  69350.12,
+  8 : 198143.19,
+}
+
+# LTA core area by ( lanes, lane groups, uthreads per lane )
+
+lta_core_area = {
+  ( 4, 1, 8 ) :  746055.46,
+  ( 4, 2, 8 ) :  680345.62,
+  ( 4, 4, 8 ) :  636995.21,
+  ( 8, 1, 4 ) : 1019622.7,
+  ( 8, 2, 4 ) :  862954.44,
+  ( 8, 4, 4 ) :  774124.82,
+  ( 8, 8, 4 ) :  732903.21,
+}
+
+# LTA cores of the backup shared study (the 'shared' results store),
+# all behind a 2-port crossbar
+
+shared_core_area = {
+  ( 8, 1, 4 ) : 1019622.7,
+  ( 8, 2, 4 ) : 1044871.28,
+  ( 8, 4, 4 ) : 1047000.08,
+  ( 8, 8, 4 ) : 1051257.68,
+}
+
+#-------------------------------------------------------------------------
+# Area breakdowns (mm^2)
+#-------------------------------------------------------------------------
+# Fraction of the total area in each component group, with the LTA core
+# components scaled by the LTA's share of the total, and the total
+# including the GPP.
+
+components = [
+  'pib',
+  'tmu',
+  'rf',
+  'slfu',
+  'llfu',
+  'lsu',
+  'wq',
+  'dcache',
+  'icache',
+  'gpp',
+]
+
+measured_breakdown = {
+
+  'IO' : ( 0.61, [
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    0.44,
+    0.43,
+    0.13,
+  ] ),
+
+  ( 4, 1, 8 ) : ( 1.34 + 0.076, [
+    0.95 * 0.00075,
+    0.95 * 0.0,
+    0.95 * 0.18,
+    0.95 * 0.06,
+    0.95 * 0.14,
+    0.95 * 0.02,
+    0.95 * 0.14,
+    0.95 * 0.25,
+    0.95 * 0.20,
+    0.05,
+  ] ),
+
+  ( 4, 2, 8 ) : ( 1.23 + 0.076, [
+    0.94 * 0.0016,
+    0.94 * 0.02,
+    0.94 * 0.22,
+    0.94 * 0.07,
+    0.94 * 0.07,
+    0.94 * 0.02,
+    0.94 * 0.15,
+    0.94 * 0.23,
+    0.94 * 0.21,
+    0.06,
+  ] ),
+
+  ( 4, 4, 8 ) : ( 1.17 + 0.076, [
+    0.94 * 0.0034,
+    0.94 * 0.02,
+    0.94 * 0.22,
+    0.94 * 0.07,
+    0.94 * 0.04,
+    0.94 * 0.03,
+    0.94 * 0.16,
+    0.94 * 0.23,
+    0.94 * 0.22,
+    0.06,
+  ] ),
+
+  ( 8, 1, 4 ) : ( 1.74 + 0.076, [
+    0.96 * 0.00059,
+    0.96 * 0.0,
+    0.96 * 0.16,
+    0.96 * 0.09,
+    0.96 * 0.20,
+    0.96 * 0.02,
+    0.96 * 0.11,
+    0.96 * 0.26,
+    0.96 * 0.15,
+    0.04,
+  ] ),
+
+  ( 8, 2, 4 ) : ( 1.46 + 0.076, [
+    0.95 * 0.0014,
+    0.95 * 0.02,
+    0.95 * 0.17,
+    0.95 * 0.10,
+    0.95 * 0.12,
+    0.95 * 0.02,
+    0.95 * 0.13,
+    0.95 * 0.25,
+    0.95 * 0.18,
+    0.05,
+  ] ),
+
+  ( 8, 4, 4 ) : ( 1.32 + 0.076, [
+    0.95 * 0.003,
+    0.95 * 0.02,
+    0.95 * 0.19,
+    0.95 * 0.12,
+    0.95 * 0.07,
+    0.95 * 0.02,
+    0.95 * 0.14,
+    0.95 * 0.23,
+    0.95 * 0.20,
+    0.05,
+  ] ),
+
+  ( 8, 8, 4 ) : ( 1.27 + 0.076, [
+    0.94 * 0.0063,
+    0.94 * 0.02,
+    0.94 * 0.21,
+    0.94 * 0.13,
+    0.94 * 0.04,
+    0.94 * 0.02,
+    0.94 * 0.15,
+    0.94 * 0.21,
+    0.94 * 0.21,
+    0.06,
+  ] ),
+
+}
+
+#-------------------------------------------------------------------------
+# Fitted model
+#-------------------------------------------------------------------------
+# The count of the structure each LTA core component replicates, as a
+# function of the lanes, lane groups and uthreads columns. Only the
+# lane groups past the first need a task management unit.
+
+core_components = [ 'pib', 'tmu', 'rf', 'slfu', 'llfu', 'lsu', 'wq' ]
+
+def component_counts( lanes, groups, uthreads ):
+  lanes    = np.asarray( lanes, dtype=np.float64 )
+  groups   = np.asarray( groups, dtype=np.float64 )
+  uthreads = np.asarray( uthreads, dtype=np.float64 )
+  return {
+    'pib'  : groups,
+    'tmu'  : ( groups > 1 ).astype( np.float64 ),
+    'rf'   : lanes * uthreads,
+    'slfu' : lanes,
+    'llfu' : lanes / groups,
+    'lsu'  : lanes,
+    'wq'   : lanes * uthreads,
+  }
+
+# Area (um^2) per unit of each component's count, least squares over
+# the measured breakdowns. The breakdown fractions are rounded, so the
+# units are then scaled together to best match the synthesized cores.
+
+unit_areas = {}
+
+def fit_unit_areas():
+  if unit_areas:
+    return unit_areas
+  keys = [ k for k in sorted( measured_breakdown, key=str ) if k != 'IO' ]
+  counts = component_counts( *zip( *keys ) )
+  for i, comp in enumerate( components ):
+    if comp not in core_components:
+      continue
+    measured = np.array( [ measured_breakdown[k][1][i] * measured_breakdown[k][0]
+                           for k in keys ] ) * 1e6
+    count = counts[comp]
+    unit_areas[comp] = np.dot( measured, count ) / np.dot( count, count )
+
+  keys = sorted( lta_core_area )
+  counts = component_counts( *zip( *keys ) )
+  fitted = sum( unit_areas[c] * counts[c] for c in core_components )
+  measured = np.array( [ lta_core_area[k] for k in keys ] )
+  scale = np.dot( measured, fitted ) / np.dot( fitted, fitted )
+  for comp in core_components:
+    unit_areas[comp] *= scale
+  return unit_areas
+
+crossbar_fit = []
+
+def crossbar_areas( ports ):
+  ports = np.asarray( ports, dtype=np.float64 )
+  if not crossbar_fit:
+    x = np.log( sorted( crossbar_area ) )
+    y = np.log( [ crossbar_area[p] for p in sorted( crossbar_area ) ] )
+    crossbar_fit.extend( np.polyfit( x, y, 1 ) )
+  slope, intercept = crossbar_fit
+  areas = np.exp( intercept + slope * np.log( ports ) )
+  for p, measured in crossbar_area.items():
+    areas[ ports == p ] = measured
+  return areas
+
+#-------------------------------------------------------------------------
+# AreaModel
+#-------------------------------------------------------------------------
+# core_areas maps ( lanes, lane groups, uthreads per lane ) to measured
+# LTA core areas. ports fixes the crossbar size instead of one port per
+# lane in a group, and without fit only measured LTA cores are known.
+
+class AreaModel( object ):
+
+  def __init__( self, core_areas, ports=None, fit=True ):
+    self.core_areas = core_areas
+    self.ports      = ports
+    self.fit        = fit
+    self.memo       = {}
+
+  # LTA core area for columns of lanes, lane groups and uthreads per lane
+
+  def lta_cores( self, lanes, groups, lane_uthreads ):
+    lanes, groups, lane_uthreads = [ np.asarray( c, dtype=np.int64 )
+                                     for c in ( lanes, groups, lane_uthreads ) ]
+    cores = np.full( lanes.shape, np.nan )
+    if self.fit and len( lanes ):
+      units = fit_unit_areas()
+      counts = component_counts( lanes, groups, lane_uthreads )
+      cores = sum( units[c] * counts[c] for c in core_components )
+
+    keys = np.stack( [ lanes, groups, lane_uthreads ], axis=-1 )
+    for key, core in self.core_areas.items():
+      cores[ np.all( keys == key, axis=-1 ) ] = core
+
+    if np.isnan( cores ).any():
+      key = tuple( keys[ np.isnan( cores ) ][0] )
+      raise KeyError( "no measured core area for LTA-{}/{}x{}".format( *key ) )
+    return cores
+
+  # Total area (um^2) of every config in labels (or a DesignIndex)
+
+  def areas( self, labels ):
+    index = labels if isinstance( labels, design_points.DesignIndex ) \
+            else design_points.DesignIndex( labels )
+    v = index.values
+    lta = v['kind'] == design_points.kinds.index( 'LTA' )
+    o3  = v['kind'] == design_points.kinds.index( 'O3' )
+
+    core = np.where( o3, o3_core_area, io_core_area )
+    if lta.any():
+      core[lta] = self.lta_cores(
+        v['lanes'][lta], v['lane_groups'][lta], v['lane_uthreads'][lta] )
+
+    if self.ports is not None:
+      ports = np.where( lta, self.ports, 1 )
+    else:
+      ports = np.where( lta, v['lanes'] // np.maximum( v['lane_groups'], 1 ), 1 )
+    caches = 2 * cache_area + crossbar_areas( ports )
+
+    pib = np.where( lta, pib_area * ( v['time_groups'] - 1 ) * v['lane_groups'],
+                    0.0 )
+    cores = np.where( v['multicore'] == 1, mc_cores, 1 )
+
+    return cores * ( core + caches + pib )
+
+  def area( self, label ):
+    if label not in self.memo:
+      self.memo[label] = float( self.areas( [ label ] )[0] )
+    return self.memo[label]
+
+#-------------------------------------------------------------------------
+# breakdown
+#-------------------------------------------------------------------------
+# Area (mm^2) of each component group, as a list over groups of arrays
+# over configs. Measured breakdowns are used as they are; other configs
+# take the fitted core components plus their caches, crossbar and GPP.
+
+def config_breakdown( label ):
+  point = design_points.parse( label )
+  if point.kind != 'LTA':
+    key = point.kind
+  else:
+    key = ( point.lanes, point.lane_groups, point.lane_uthreads )
+
+  if key in measured_breakdown:
+    total, fractions = measured_breakdown[key]
+    values = dict( zip( components, np.array( fractions ) * total ) )
+  elif point.kind != 'LTA':
+    core = o3_core_area if point.kind == 'O3' else io_core_area
+    values = dict( ( c, 0.0 ) for c in components )
+    values['dcache'] = ( cache_area + crossbar_area[1] ) / 1e6
+    values['icache'] = cache_area / 1e6
+    values['gpp']    = core / 1e6
+  else:
+    units = fit_unit_areas()
+    counts = component_counts( point.lanes, point.lane_groups,
+                               point.lane_uthreads )
+    values = dict( ( c, float( units[c] * counts[c] ) / 1e6 )
+                   for c in core_components )
+    ports = point.lanes // point.lane_groups
+    values['dcache'] = ( cache_area + float( crossbar_areas( [ ports ] )[0] ) ) / 1e6
+    values['icache'] = cache_area / 1e6
+    values['gpp']    = io_core_area / 1e6
+
+  if point.kind == 'LTA' and point.time_groups > 1:
+    values['pib'] = values['pib'] + \
+      pib_area * ( point.time_groups - 1 ) * point.lane_groups / 1e6
+  return values
+
+def breakdown( labels, groups=components ):
+  per_config = [ config_breakdown( label ) for label in labels ]
+  return [ np.array( [ values[group] for values in per_config ] )
+           for group in groups ]
+
+#-------------------------------------------------------------------------
+# Default models
+#-------------------------------------------------------------------------
+
+lta    = AreaModel( lta_core_area )
+shared = AreaModel( shared_core_area, ports=2, fit=False )
+
+def area( label ):
+  return lta.area( label )
+
+def areas( labels ):
+  return lta.areas( labels )
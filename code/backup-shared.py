@@ -2,37 +2,26 @@
 # fig-evaluation-case-shared.py
 #=========================================================================
 
+import figure_style
 import matplotlib.pyplot as plt
 import math
 import sys
 import os.path
 import numpy as np
 
-#-------------------------------------------------------------------------
-# Calculate figure size
-#-------------------------------------------------------------------------
-# We determine the fig_width_pt by using \showthe\columnwidth in LaTeX
-# and copying the result into the script. Change the aspect ratio as
-# necessary.
-
-fig_width_pt  = 768.0
-inches_per_pt = 1.0/72.27                     # convert pt to inch
-
-aspect_ratio  = 0.52
-
-fig_width     = 10.0                          # width in inches
-fig_height    = fig_width * aspect_ratio      # height in inches
-fig_size      = [ fig_width, fig_height ]
+import area_model
+import figure_phases
+import results_store
+import speedups
 
 #-------------------------------------------------------------------------
 # Configure matplotlib
 #-------------------------------------------------------------------------
 
-plt.rcParams['pdf.use14corefonts'] = True
-plt.rcParams['font.size']          = 16
-plt.rcParams['font.family']        = 'serif'
-plt.rcParams['font.serif']         = ['Times']
-plt.rcParams['figure.figsize']     = fig_size
+fig_width    = 10.0          # width in inches
+aspect_ratio = 0.52
+
+figure_style.configure( fig_width, aspect_ratio, font_size=16 )
 
 #-------------------------------------------------------------------------
 # Helper functions
@@ -56,6 +45,8 @@ def draw_cutoffs( init_x, init_y, label, x_tweak=0.0, y_tweak=0.0 ):
 # Raw data
 #-------------------------------------------------------------------------
 
+figure_phases.mark( 'data' )
+
 # Benchmarks
 
 bmarks = [
@@ -119,187 +110,26 @@ num_configs = len( configs )
 
 # Area estimates (um^2)
 
-cache_area = [ # 32KB I$ + 32KB D$ (direct-mapped)
-  2 * 262005.78 + 8495.39,   # 1-port crossbar network
-  2 * 262005.78 + 24272.54,  # 2-port crossbar network
-  2 * 262005.78 + 69350.12,  # 4-port crossbar network
-  2 * 262005.78 + 198143.19, # 8-port crossbar network
-]
+area_data = area_model.shared.areas( configs )
 
-core_area = [
-  75981.95,     # io
-  75981.95 * 3, # o3
-  1019622.7,    # LTA-8/1x4/1
-  1044871.28,   # LTA-8/2x4/1
-  1047000.08,   # LTA-8/4x4/1
-  1051257.68,   # LTA-8/8x4/1
-]
+# Results (execution time in cycles)
 
-area_data = [
-  core_area[0] + cache_area[0],
-  core_area[1] + cache_area[0],
-  core_area[2] + cache_area[1],
-  core_area[3] + cache_area[1],
-  core_area[4] + cache_area[1],
-  core_area[5] + cache_area[1],
-]
+store = results_store.open_store( 'shared' )
 
-# Results (execution time in seconds)
-
-cycle_data = [
-
-  # io
-
-  [
-    6.21762e+07,  #  bilateral-scalar
-    9.6853e+07,   #  dct8x8m-scalar
-    1.38979e+07,  #  mriq-scalar
-    1.11999e+08,  #  pbbs-bfs-serialBFS-parc-small
-    1.11999e+08,  #  pbbs-bfs-serialBFS-parc-small
-    1.00005e+08,  #  pbbs-dict-serialHash-parc-small
-    2.14937e+08,  #  pbbs-isort-serialRadixSort-parc-small
-    1.23254e+08,  #  pbbs-isort-serialRadixSort-parc-small-1
-    5.73002e+07,  #  pbbs-knn-serialNeighbors-parc-small
-    1.00801e+08,  #  pbbs-mis-serialMIS-parc-small
-    2.20669e+08,  #  pbbs-mm-serialMatching-parc-small
-    2.39507e+08,  #  pbbs-nbody-serialBarnesHut-parc-small
-    1.06215e+08,  #  pbbs-rdups-serialHash-parc-small
-    6.24962e+07,  #  rgb2cmyk-scalar
-    2.33191e+08,  #  pbbs-sa-serialKS-parc-small
-    1.18787e+08,  #  sgemm-scalar
-    2.99491e+07,  #  strsearch-scalar
-  ],
-
-  # o3
-
-  [
-    2.2038e+07,   #  bilateral-scalar
-    6.60528e+07,  #  dct8x8m-scalar
-    5.23304e+06,  #  mriq-scalar
-    4.9687e+07,   #  pbbs-bfs-serialBFS-parc-small
-    4.9687e+07,   #  pbbs-bfs-serialBFS-parc-small
-    5.78961e+07,  #  pbbs-dict-serialHash-parc-small
-    1.21024e+08,  #  pbbs-isort-serialRadixSort-parc-small
-    7.01812e+07,  #  pbbs-isort-serialRadixSort-parc-small-1
-    2.59591e+07,  #  pbbs-knn-serialNeighbors-parc-small
-    3.83622e+07,  #  pbbs-mis-serialMIS-parc-small
-    7.16346e+07,  #  pbbs-mm-serialMatching-parc-small
-    1.27389e+08,  #  pbbs-nbody-serialBarnesHut-parc-small
-    6.28899e+07,  #  pbbs-rdups-serialHash-parc-small
-    4.70559e+07,  #  rgb2cmyk-scalar
-    1.00265e+08,  #  pbbs-sa-serialKS-parc-small
-    3.58277e+07,  #  sgemm-scalar
-    9.5489e+06,   #  strsearch-scalar
-  ],
-
-  # LTA-8/1x4/1
-
-  [
-    4.01958e+06,  #  bilateral-xpc
-    2.08595e+07,  #  dct8x8m-xpc
-    1.16403e+06,  #  mriq-xpc
-    4.00252e+07,  #  pbbs-bfs-deterministicBFS-parc-xpc-small
-    6.67766e+07,  #  pbbs-bfs-ndBFS-parc-xpc-small
-    1.88071e+07,  #  pbbs-dict-deterministicHash-parc-xpc-small
-    7.71387e+07,  #  pbbs-isort-blockRadixSort-parc-xpc-small
-    7.03166e+07,  #  pbbs-isort-blockRadixSort-parc-xpc-small-1
-    4.94318e+07,  #  pbbs-knn-octTree2Neighbors-parc-xpc-small
-    4.1237e+07,   #  pbbs-mis-ndMIS-parc-xpc-small
-    4.18723e+07,  #  pbbs-mm-ndMatching-parc-xpc-small
-    1.57719e+07,  #  pbbs-nbody-parallelBarnesHut-parc-xpc-small
-    4.2636e+07,   #  pbbs-rdups-deterministicHash-parc-xpc-small
-    9.60028e+06,  #  rgb2cmyk-xpc
-    7.96016e+07,  #  pbbs-sa-parallelRange-parc-xpc-small
-    1.27497e+07,  #  sgemm-xpc
-    7.98038e+06,  #  strsearch-xpc
-  ],
-
-  # LTA-8/2x4/1
-
-  [
-    4.42022e+06,  #  bilateral-xpc
-    1.53853e+07,  #  dct8x8m-xpc
-    1.1985e+06,   #  mriq-xpc
-    3.28052e+07,  #  pbbs-bfs-deterministicBFS-parc-xpc-small
-    5.81189e+07,  #  pbbs-bfs-ndBFS-parc-xpc-small
-    2.03942e+07,  #  pbbs-dict-deterministicHash-parc-xpc-small
-    6.80056e+07,  #  pbbs-isort-blockRadixSort-parc-xpc-small
-    6.73469e+07,  #  pbbs-isort-blockRadixSort-parc-xpc-small-1
-    4.62468e+07,  #  pbbs-knn-octTree2Neighbors-parc-xpc-small
-    3.25577e+07,  #  pbbs-mis-ndMIS-parc-xpc-small
-    3.73233e+07,  #  pbbs-mm-ndMatching-parc-xpc-small
-    1.73807e+07,  #  pbbs-nbody-parallelBarnesHut-parc-xpc-small
-    3.35713e+07,  #  pbbs-rdups-deterministicHash-parc-xpc-small
-    9.15442e+06,  #  rgb2cmyk-xpc
-    7.2427e+07,   #  pbbs-sa-parallelRange-parc-xpc-small
-    1.14256e+07,  #  sgemm-xpc
-    7.64605e+06,  #  strsearch-xpc
-  ],
-
-  # LTA-8/4x4/1
-
-  [
-    4.34132e+06,  #  bilateral-xpc
-    1.43362e+07,  #  dct8x8m-xpc
-    1.19844e+06,  #  mriq-xpc
-    2.55355e+07,  #  pbbs-bfs-deterministicBFS-parc-xpc-small
-    5.15988e+07,  #  pbbs-bfs-ndBFS-parc-xpc-small
-    1.6484e+07,   #  pbbs-dict-deterministicHash-parc-xpc-small
-    5.92055e+07,  #  pbbs-isort-blockRadixSort-parc-xpc-small
-    6.39264e+07,  #  pbbs-isort-blockRadixSort-parc-xpc-small-1
-    4.34632e+07,  #  pbbs-knn-octTree2Neighbors-parc-xpc-small
-    2.38752e+07,  #  pbbs-mis-ndMIS-parc-xpc-small
-    3.34442e+07,  #  pbbs-mm-ndMatching-parc-xpc-small
-    1.74269e+07,  #  pbbs-nbody-parallelBarnesHut-parc-xpc-small
-    2.73786e+07,  #  pbbs-rdups-deterministicHash-parc-xpc-small
-    8.55022e+06,  #  rgb2cmyk-xpc
-    6.77677e+07,  #  pbbs-sa-parallelRange-parc-xpc-small
-    9.20226e+06,  #  sgemm-xpc
-    6.31471e+06,  #  strsearch-xpc
-  ],
-
-  # LTA-8/8x4/1
-
-  [
-    3.93616e+06,  #  bilateral-xpc
-    1.14717e+07,  #  dct8x8m-xpc
-    1.15704e+06,  #  mriq-xpc
-    1.93972e+07,  #  pbbs-bfs-deterministicBFS-parc-xpc-small
-    4.6336e+07,   #  pbbs-bfs-ndBFS-parc-xpc-small
-    1.24771e+07,  #  pbbs-dict-deterministicHash-parc-xpc-small
-    5.29709e+07,  #  pbbs-isort-blockRadixSort-parc-xpc-small
-    5.91414e+07,  #  pbbs-isort-blockRadixSort-parc-xpc-small-1
-    4.16698e+07,  #  pbbs-knn-octTree2Neighbors-parc-xpc-small
-    1.50062e+07,  #  pbbs-mis-ndMIS-parc-xpc-small
-    2.65977e+07,  #  pbbs-mm-ndMatching-parc-xpc-small
-    1.69848e+07,  #  pbbs-nbody-parallelBarnesHut-parc-xpc-small
-    1.84192e+07,  #  pbbs-rdups-deterministicHash-parc-xpc-small
-    8.91107e+06,  #  rgb2cmyk-xpc
-    6.20964e+07,  #  pbbs-sa-parallelRange-parc-xpc-small
-    9.43012e+06,  #  sgemm-xpc
-    5.39125e+06,  #  strsearch-xpc
-  ],
+cycle_data = store.matrix(
+  configs, 'cycles', [ b for b in bmarks if not b.startswith( 'avg' ) ] )
 
-]
+figure_phases.mark( 'normalize' )
 
-perf_data = [ np.array( [ float(i) for i in cycle_data[0] ] ) / np.array( data )
-              for data in cycle_data ]
+# Speedup over IO per benchmark, followed by the averages
 
-perf_area_data = [ perf * ( area_data[0] / float( area ) )
-                   for perf, area in zip( perf_data, area_data ) ]
+norm = speedups.normalize( cycle_data, area=area_data )
 
-for i, ( perf, perf_area ) in enumerate( zip( perf_data, perf_area_data ) ):
-  perf_avg = sum( perf ) / ( num_bmarks - 2 )
-  perf_area_avg = sum( perf_area ) / ( num_bmarks - 2 )
-  perf_data[i] = np.append( perf, [ perf_avg, perf_area_avg ] )
+perf_data = norm.columns( 'perf', 'amean', 'area_amean' )
 
 # Reorder bmarks
 
-for i, data in enumerate( perf_data ):
-  tmp_data = []
-  for bmark in ordered_bmarks:
-    tmp_data.append( data[bmarks.index( bmark )] )
-  perf_data[i] = tmp_data
+perf_data = perf_data[ :, [ bmarks.index( bmark ) for bmark in ordered_bmarks ] ]
 
 #-------------------------------------------------------------------------
 # Plot parameters
@@ -336,6 +166,8 @@ colors = [
 # Create plot
 #-------------------------------------------------------------------------
 
+figure_phases.mark( 'artists' )
+
 # Initialize figure
 
 fig = plt.figure()
@@ -361,10 +193,7 @@ plt.axis( xmax=num_bmarks-1+(num_configs+2)*width )
 
 # Add bars for each configuration
 
-rects = []
-
-for i, perf in enumerate( perf_data ):
-  rects.append( ax.bar( ind+width*i+width, perf, width, color=colors[i] ) )
+rects = figure_style.grouped_bars( ax, ind, perf_data, width, colors )
 
 # Set tick positions
 
@@ -401,15 +230,10 @@ plt.tight_layout()
 # Turn off top and right border
 
 ax.xaxis.grid(False)
-ax.spines['right'].set_visible(False)
-ax.spines['top'].set_visible(False)
-ax.xaxis.set_ticks_position('bottom')
-ax.yaxis.set_ticks_position('left')
+figure_style.despine( ax )
 
 #-------------------------------------------------------------------------
 # Generate PDF
 #-------------------------------------------------------------------------
 
-input_basename = os.path.splitext( os.path.basename(sys.argv[0]) )[0]
-output_filename = input_basename + '.py.pdf'
-plt.savefig( output_filename, bbox_extra_artists=(legend,), bbox_inches='tight' )
+figure_style.savefig( bbox_extra_artists=(legend,), bbox_inches='tight' )
@@ -2,37 +2,25 @@
 # fig-evaluation-case-uthreads.py
 #=========================================================================
 
+import figure_style
 import matplotlib.pyplot as plt
 import math
 import sys
 import os.path
 import numpy as np
 
-#-------------------------------------------------------------------------
-# Calculate figure size
-#-------------------------------------------------------------------------
-# We determine the fig_width_pt by using \showthe\columnwidth in LaTeX
-# and copying the result into the script. Change the aspect ratio as
-# necessary.
-
-fig_width_pt  = 768.0
-inches_per_pt = 1.0/72.27                     # convert pt to inch
-
-aspect_ratio  = 0.75
-
-fig_width     = 8.0                           # width in inches
-fig_height    = fig_width * aspect_ratio      # height in inches
-fig_size      = [ fig_width, fig_height ]
+import design_points
+import figure_phases
+import results_store
 
 #-------------------------------------------------------------------------
 # Configure matplotlib
 #-------------------------------------------------------------------------
 
-plt.rcParams['pdf.use14corefonts'] = True
-plt.rcParams['font.size']          = 16
-plt.rcParams['font.family']        = 'serif'
-plt.rcParams['font.serif']         = ['Times']
-plt.rcParams['figure.figsize']     = fig_size
+fig_width    = 8.0           # width in inches
+aspect_ratio = 0.75
+
+figure_style.configure( fig_width, aspect_ratio, font_size=16 )
 
 #-------------------------------------------------------------------------
 # Helper functions
@@ -56,6 +44,8 @@ def draw_cutoffs( init_x, init_y, label, x_tweak=0.0, y_tweak=0.0 ):
 # Raw data
 #-------------------------------------------------------------------------
 
+figure_phases.mark( 'data' )
+
 # Configurations
 
 configs = [
@@ -82,50 +72,27 @@ configs = [
 
 num_configs = len( configs )
 
-groups = [
-  'IO',
-  'O3',
-  '32-uthread LTA',
-  '64-uthread LTA',
-  '96-uthread LTA',
-  '128-uthread LTA',
-]
+# Group the baselines and then the LTA configs by total uthreads
 
-# Results (execution time in seconds)
-
-cycle_data = [
-  [
-    2.99491e+07,  #  io
-  ],
-  [
-    9.5489e+06,   #  o3
-  ],
-  [
-    6.31471e+06,  #  8/4x4/1
-    5.32857e+06,  #  8/4x4/2
-    6.90972e+06,  #  8/4x4/4
-  ],
-  [
-    6.31905e+06,  #  8/4x8/1
-    6.07488e+06,  #  8/4x8/2
-    5.00186e+06,  #  8/4x8/4
-    4.69305e+06,  #  8/4x8/8
-  ],
-  [
-    6.31945e+06,  #  8/4x12/1
-    6.24585e+06,  #  8/4x12/2
-    5.30066e+06,  #  8/4x12/4
-    4.41921e+06,  #  8/4x12/6
-    6.8211e+06,   #  8/4x12/12
-  ],
-  [
-    6.31904e+06,  #  8/4x16/1
-    6.28074e+06,  #  8/4x16/2
-    5.67829e+06,  #  8/4x16/4
-    4.10374e+06,  #  8/4x16/8
-    4.68646e+06,  #  8/4x16/16
-  ],
-]
+index = design_points.DesignIndex( configs )
+
+config_groups = [ index.labels( kind='IO' ), index.labels( kind='O3' ) ]
+groups = [ 'IO', 'O3' ]
+
+for uthreads, labels in index.group_by( 'uthreads', kind='LTA' ):
+  config_groups.append( labels )
+  groups.append( '{}-uthread LTA'.format( uthreads ) )
+
+# Results (execution time in cycles)
+
+store = results_store.open_store( 'perf' )
+
+def lookup_cycles( config ):
+  return store.get( 'strsearch', design_points.parse( config ).label, 'cycles' )
+
+cycle_data = [ [ lookup_cycles( c ) for c in group ] for group in config_groups ]
+
+figure_phases.mark( 'normalize' )
 
 io_data = cycle_data[0][0]
 perf_data = [ io_data / np.array( data ) for data in cycle_data ]
@@ -166,6 +133,8 @@ colors = [
 # Create plot
 #-------------------------------------------------------------------------
 
+figure_phases.mark( 'artists' )
+
 # Initialize figure
 
 fig = plt.figure()
@@ -222,15 +191,10 @@ plt.tight_layout()
 # Turn off top and right border
 
 ax.xaxis.grid(False)
-ax.spines['right'].set_visible(False)
-ax.spines['top'].set_visible(False)
-ax.xaxis.set_ticks_position('bottom')
-ax.yaxis.set_ticks_position('left')
+figure_style.despine( ax )
 
 #-------------------------------------------------------------------------
 # Generate PDF
 #-------------------------------------------------------------------------
 
-input_basename = os.path.splitext( os.path.basename(sys.argv[0]) )[0]
-output_filename = input_basename + '.py.pdf'
-plt.savefig( output_filename, bbox_extra_artists=(legend,), bbox_inches='tight' )
+figure_style.savefig( bbox_extra_artists=(legend,), bbox_inches='tight' )
@@ -0,0 +1,308 @@
+#=========================================================================
+# bench_figures.py
+#=========================================================================
+# Benchmarks the figure scripts phase by phase. Each run is a fresh
+# interpreter that times the script with figure_phases (import, data,
+# normalize, rollup, artists, tight_layout, savefig), writing its
+# outputs to a scratch directory. Every script is run --repeat times
+# with a cold font cache (an empty one per run) and with a warm one
+# (primed by a discarded run), and the timings are written as JSON,
+# by default to code/.build/bench/<commit>.json:
+#
+#   % python bench_figures.py                      # every figure script
+#   % python bench_figures.py -r 5 fig-evaluation-perf-spacetime-mt.py
+#
+# --formats writes every figure in several formats (see figure_style.py)
+# and --export separate saves them the old way, one plt.savefig per
+# format, so the two export paths can be compared:
+#
+#   % python bench_figures.py --formats pdf,png,svg --export separate \
+#                             -o .build/bench/separate.json
+#   % python bench_figures.py --formats pdf,png,svg -o .build/bench/shared.json
+#
+# Two result files are compared phase by phase on their medians; the
+# exit status is 1 if any phase got slower than the threshold allows:
+#
+#   % python bench_figures.py --compare .build/bench/65fb861.json \
+#                                       .build/bench/5d3e2a1.json
+#
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+import traceback
+
+import build_figures
+
+code_dir  = os.path.dirname( os.path.abspath( __file__ ) )
+bench_dir = os.path.join( code_dir, '.build', 'bench' )
+
+modes = [ 'cold', 'warm' ]
+
+#-------------------------------------------------------------------------
+# Child
+#-------------------------------------------------------------------------
+# Runs one script in this (fresh) process with timing enabled and prints
+# the result as JSON on the last line of stdout.
+
+def run_child( script, outdir ):
+  if code_dir not in sys.path:
+    sys.path.insert( 0, code_dir )
+  import figure_phases
+
+  error = None
+  sys.argv = [ script ]
+  os.chdir( outdir )
+  start = timeit.default_timer()
+  figure_phases.enable()
+  try:
+    runpy.run_path( script, run_name='__main__' )
+  except BaseException:
+    error = traceback.format_exc()
+  phases = figure_phases.finish()
+  total = timeit.default_timer() - start
+
+  print( json.dumps( { 'phases' : phases, 'total' : total, 'error' : error } ) )
+  return 0
+
+#-------------------------------------------------------------------------
+# Parent
+#-------------------------------------------------------------------------
+
+def run_once( script, font_dir, export=None ):
+  outdir = tempfile.mkdtemp( prefix='bench-out-' )
+  env = dict( os.environ )
+  env['FIGURE_FONT_CACHE'] = font_dir
+  env['MPLBACKEND'] = 'Agg'
+  env.update( export or {} )
+
+  start = timeit.default_timer()
+  try:
+    proc = subprocess.Popen(
+      [ sys.executable, os.path.abspath( __file__ ), '--child', outdir, script ],
+      stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env )
+    out, err = proc.communicate()
+  finally:
+    shutil.rmtree( outdir, ignore_errors=True )
+  wall = timeit.default_timer() - start
+
+  lines = out.decode( 'utf-8' ).strip().splitlines()
+  try:
+    result = json.loads( lines[-1] )
+  except ( IndexError, ValueError ):
+    result = { 'phases' : [], 'total' : None,
+               'error' : err.decode( 'utf-8' ) or 'no result' }
+  result['wall'] = wall
+  return result
+
+# Runs script repeat times in each mode and collects the per-run times
+# as { mode : { 'wall' : [...], 'total' : [...], 'phases' : { phase :
+# [...] }, 'order' : [...] } }
+
+def bench_script( script, repeat, export=None, verbose=True ):
+  results = {}
+  for mode in modes:
+    font_dir = tempfile.mkdtemp( prefix='bench-fonts-' )
+    entry = { 'wall' : [], 'total' : [], 'phases' : {}, 'order' : [] }
+    try:
+      if mode == 'warm':
+        run_once( script, font_dir, export )
+      for _ in range( repeat ):
+        if mode == 'cold':
+          shutil.rmtree( font_dir, ignore_errors=True )
+        result = run_once( script, font_dir, export )
+        if result['error']:
+          entry['error'] = result['error']
+        entry['wall'].append( result['wall'] )
+        entry['total'].append( result['total'] )
+        for phase, seconds in result['phases']:
+          if phase not in entry['phases']:
+            entry['phases'][phase] = []
+            entry['order'].append( phase )
+          entry['phases'][phase].append( seconds )
+    finally:
+      shutil.rmtree( font_dir, ignore_errors=True )
+
+    results[mode] = entry
+    if verbose:
+      status = 'FAILED' if 'error' in entry else 'ok'
+      print( "[{:6.2f}s] {:<40} {:<4} {}".format(
+        median( entry['wall'] ), os.path.basename( script ), mode, status ) )
+      sys.stdout.flush()
+  return results
+
+#-------------------------------------------------------------------------
+# Results
+#-------------------------------------------------------------------------
+
+def median( values ):
+  values = sorted( v for v in values if v is not None )
+  if not values:
+    return None
+  mid = len( values ) // 2
+  if len( values ) % 2:
+    return values[mid]
+  return 0.5 * ( values[mid-1] + values[mid] )
+
+def git( *args ):
+  try:
+    out = subprocess.check_output( ( 'git', ) + args, cwd=code_dir,
+                                   stderr=open( os.devnull, 'w' ) )
+  except ( OSError, subprocess.CalledProcessError ):
+    return None
+  return out.decode( 'utf-8' ).strip()
+
+# Short commit hash, marked dirty if the tree has uncommitted changes
+
+def commit_id():
+  commit = git( 'rev-parse', '--short', 'HEAD' ) or 'unknown'
+  if git( 'status', '--porcelain', '--untracked-files=no', '.' ):
+    commit += '-dirty'
+  return commit
+
+def environment():
+  import matplotlib
+  import numpy
+  return {
+    'python'     : platform.python_version(),
+    'matplotlib' : matplotlib.__version__,
+    'numpy'      : numpy.__version__,
+    'machine'    : platform.machine(),
+    'cpus'       : os.cpu_count() if hasattr( os, 'cpu_count' ) else None,
+  }
+
+def print_summary( results ):
+  for name in sorted( results['scripts'] ):
+    for mode in modes:
+      entry = results['scripts'][name][mode]
+      print( "\n{} ({}, median of {})".format( name, mode, results['repeat'] ) )
+      print( format_phases( entry ) )
+
+def format_phases( entry ):
+  import figure_phases
+  phases = [ ( phase, median( entry['phases'][phase] ) )
+             for phase in entry['order'] ]
+  return figure_phases.format_table( phases )
+
+#-------------------------------------------------------------------------
+# compare
+#-------------------------------------------------------------------------
+# Compares the median of each phase (and the whole run) between two
+# result files. A phase regresses when it is both threshold (a fraction)
+# and min_seconds slower, so a noisy millisecond phase does not fail.
+
+def compare( old, new, threshold=0.10, min_seconds=0.005 ):
+  regressions = []
+  lines = []
+  for name in sorted( set( old['scripts'] ) & set( new['scripts'] ) ):
+    for mode in modes:
+      a = old['scripts'][name].get( mode )
+      b = new['scripts'][name].get( mode )
+      if a is None or b is None:
+        continue
+      phases = b['order'] + [ p for p in a['order'] if p not in b['order'] ]
+      rows = [ ( p, a['phases'].get( p, [] ), b['phases'].get( p, [] ) )
+               for p in phases ]
+      rows.append( ( 'total', a['total'], b['total'] ) )
+
+      lines.append( "\n{} ({})".format( name, mode ) )
+      for phase, before, after in rows:
+        before, after = median( before ), median( after )
+        if before is None or after is None:
+          lines.append( "  {:<18} {:>9} {:>9}".format(
+            phase, fmt_seconds( before ), fmt_seconds( after ) ) )
+          continue
+        delta = after - before
+        ratio = delta / before if before else 0.0
+        flag = ''
+        if delta > min_seconds and ratio > threshold:
+          flag = '  REGRESSION'
+          regressions.append( ( name, mode, phase, before, after ) )
+        lines.append( "  {:<18} {:>9} {:>9} {:+7.1f}%{}".format(
+          phase, fmt_seconds( before ), fmt_seconds( after ),
+          100.0 * ratio, flag ) )
+  return regressions, '\n'.join( lines )
+
+def fmt_seconds( seconds ):
+  return '-' if seconds is None else '{:.3f}s'.format( seconds )
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  argv = sys.argv[1:] if argv is None else argv
+  if argv[:1] == [ '--child' ]:
+    return run_child( argv[2], argv[1] )
+
+  p = argparse.ArgumentParser( description='Benchmark the figure scripts.' )
+  p.add_argument( 'scripts', nargs='*',
+                  help='scripts to time (default: every figure script)' )
+  p.add_argument( '-r', '--repeat', type=int, default=3,
+                  help='runs per script and cache mode (default: 3)' )
+  p.add_argument( '-o', '--output', default=None,
+                  help='JSON file to write (default: .build/bench/<commit>.json)' )
+  p.add_argument( '--formats', default=None,
+                  help='comma-separated output formats (default: pdf)' )
+  p.add_argument( '--export', choices=[ 'shared', 'separate' ], default=None,
+                  help='export path for several formats (default: shared)' )
+  p.add_argument( '--compare', nargs=2, metavar=( 'OLD', 'NEW' ),
+                  help='compare two result files instead of running' )
+  p.add_argument( '--threshold', type=float, default=0.10,
+                  help='slowdown fraction counted as a regression (default: 0.10)' )
+  p.add_argument( '--min-seconds', type=float, default=0.005,
+                  help='ignore slowdowns smaller than this (default: 0.005)' )
+  opts = p.parse_args( argv )
+
+  if opts.compare:
+    with open( opts.compare[0] ) as f:
+      old = json.load( f )
+    with open( opts.compare[1] ) as f:
+      new = json.load( f )
+    print( "{} -> {}".format( old.get( 'commit' ), new.get( 'commit' ) ) )
+    regressions, report = compare( old, new, opts.threshold, opts.min_seconds )
+    print( report )
+    print( "\n{} regressions".format( len( regressions ) ) )
+    return 1 if regressions else 0
+
+  export = {}
+  if opts.formats:
+    export['FIGURE_FORMATS'] = opts.formats
+  if opts.export:
+    export['FIGURE_EXPORT'] = opts.export
+
+  results = {
+    'commit'  : commit_id(),
+    'repeat'  : opts.repeat,
+    'env'     : environment(),
+    'export'  : export,
+    'scripts' : {},
+  }
+  for script in build_figures.resolve_scripts( opts.scripts ):
+    results['scripts'][os.path.basename( script )] = \
+      bench_script( script, opts.repeat, export )
+
+  output = opts.output or os.path.join( bench_dir, results['commit'] + '.json' )
+  if os.path.dirname( output ) and not os.path.isdir( os.path.dirname( output ) ):
+    os.makedirs( os.path.dirname( output ) )
+  with open( output, 'w' ) as f:
+    json.dump( results, f, indent=2, sort_keys=True )
+    f.write( '\n' )
+
+  print_summary( results )
+  print( "\nwrote {}".format( output ) )
+  failed = [ n for n, r in results['scripts'].items()
+             if any( 'error' in r[m] for m in modes ) ]
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
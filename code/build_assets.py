@@ -0,0 +1,311 @@
+#=========================================================================
+# build_assets.py
+#=========================================================================
+# Rasterizes the SVG diagrams under images/ to the PNGs kept next to
+# them, across a process pool. Each SVG is written at every configured
+# DPI: the first as <name>.png, the rest as <name>@<dpi>.png. The
+# diagrams were drawn in Inkscape 0.91, which puts 90 user units in an
+# inch, so at 90 DPI a PNG has one pixel per SVG user unit, as the
+# hand-exported PNGs do.
+#
+# A PNG is converted again only when its SVG's content hash or DPI
+# differs from the last conversion, or the PNG itself has gone missing
+# or changed, so after touching one diagram a full rebuild converts
+# exactly that one file. The hand-exported PNGs already next to their
+# SVGs are adopted on the first build rather than overwritten, whatever
+# their mtimes (a checkout sets those arbitrarily); --force converts
+# them anyway:
+#
+#   % python build_assets.py                    # every stale PNG
+#   % python build_assets.py -j 4 --dpi 90,180
+#   % python build_assets.py --force lta/lta-uarch.svg
+#
+# The first rasterizer found is used: cairosvg if it is importable,
+# otherwise rsvg-convert or inkscape from the PATH.
+#
+
+from __future__ import print_function
+
+import argparse
+import glob
+import math
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import timeit
+import traceback
+
+import build_cache
+
+code_dir   = os.path.dirname( os.path.abspath( __file__ ) )
+images_dir = os.path.join( os.path.dirname( code_dir ), 'images' )
+cache_dir  = os.path.join( code_dir, '.build', 'assets' )
+
+# Directories under images/ whose SVGs are rasterized
+
+directories = [
+  'lta',
+  'motivation',
+]
+
+# Output DPIs for every SVG, and for the SVGs listed here by their path
+# under images/ instead
+
+dpis = [ 90 ]
+
+dpi_overrides = {
+#  'lta/lta-uarch.svg' : [ 90, 180 ],
+}
+
+# User units per inch of the source SVGs
+
+svg_dpi = 90.0
+
+#-------------------------------------------------------------------------
+# discover_assets
+#-------------------------------------------------------------------------
+# Returns [ ( svg, png, dpi ) ] for every conversion the SVGs call for.
+# The masters of frame sequences are left to build_frames.py.
+
+def png_filename( svg, dpi, first ):
+  base = os.path.splitext( svg )[0]
+  return base + '.png' if first else '{}@{}.png'.format( base, dpi )
+
+def asset_dpis( svg, default=None ):
+  name = os.path.relpath( svg, images_dir ).replace( os.sep, '/' )
+  return dpi_overrides.get( name, default or dpis )
+
+def discover_assets( names=None, default_dpis=None ):
+  if names:
+    svgs = [ name if os.path.exists( name ) else os.path.join( images_dir, name )
+             for name in names ]
+  else:
+    svgs = []
+    for directory in directories:
+      svgs += [ svg for svg in
+                glob.glob( os.path.join( images_dir, directory, '*.svg' ) )
+                if not svg.endswith( '.master.svg' ) ]
+
+  assets = []
+  for svg in sorted( os.path.abspath( s ) for s in svgs ):
+    for i, dpi in enumerate( asset_dpis( svg, default_dpis ) ):
+      assets.append( ( svg, png_filename( svg, dpi, i == 0 ), dpi ) )
+  return assets
+
+#-------------------------------------------------------------------------
+# Rasterizers
+#-------------------------------------------------------------------------
+# Each writes svg to png width pixels wide, keeping the aspect ratio.
+# The width is rounded up, as Inkscape does on export.
+
+units = { '' : 1.0, 'px' : 1.0, 'pt' : svg_dpi / 72.0, 'pc' : svg_dpi / 6.0,
+          'in' : svg_dpi, 'cm' : svg_dpi / 2.54, 'mm' : svg_dpi / 25.4 }
+
+# Width of the SVG in user units, from the root element's width (or its
+# viewBox when the width is missing or relative)
+
+def svg_width( svg ):
+  with open( svg, 'rb' ) as f:
+    head = f.read( 1 << 16 ).decode( 'utf-8', 'replace' )
+  root = re.search( r'<svg\b[^>]*>', head )
+  if root is None:
+    raise ValueError( "no <svg> element in '{}'".format( svg ) )
+  root = root.group( 0 )
+
+  width = re.search( r'\swidth\s*=\s*"\s*([\d.eE+-]+)\s*([a-z]*)\s*"', root )
+  if width is not None and width.group( 2 ) in units:
+    return float( width.group( 1 ) ) * units[ width.group( 2 ) ]
+  viewbox = re.search( r'\sviewBox\s*=\s*"([^"]*)"', root )
+  if viewbox is not None:
+    return float( re.split( r'[\s,]+', viewbox.group( 1 ).strip() )[2] )
+  raise ValueError( "cannot tell the width of '{}'".format( svg ) )
+
+def which( program ):
+  for directory in os.environ.get( 'PATH', '' ).split( os.pathsep ):
+    path = os.path.join( directory, program )
+    if os.path.isfile( path ) and os.access( path, os.X_OK ):
+      return path
+  return None
+
+def run_cairosvg( svg, png, width ):
+  import cairosvg
+  cairosvg.svg2png( url=svg, write_to=png, output_width=width )
+
+def run_rsvg( svg, png, width ):
+  subprocess.check_call( [ 'rsvg-convert', '-w', str( width ), '-o', png, svg ] )
+
+# Inkscape 1.0 renamed the export options
+
+def run_inkscape( svg, png, width ):
+  version = subprocess.check_output( [ 'inkscape', '--version' ],
+                                     stderr=open( os.devnull, 'w' ) )
+  major = re.search( r'Inkscape (\d+)', version.decode( 'utf-8', 'replace' ) )
+  if major and int( major.group( 1 ) ) >= 1:
+    args = [ '--export-type=png', '--export-filename=' + png ]
+  else:
+    args = [ '-z', '-e', png ]
+  subprocess.check_call( [ 'inkscape' ] + args + [ '-w', str( width ), svg ],
+                         stdout=open( os.devnull, 'w' ) )
+
+def find_rasterizer():
+  try:
+    import cairosvg
+    return 'cairosvg'
+  except ImportError:
+    pass
+  for name in [ 'rsvg-convert', 'inkscape' ]:
+    if which( name ):
+      return name
+  return None
+
+rasterizers = {
+  'cairosvg'     : run_cairosvg,
+  'rsvg-convert' : run_rsvg,
+  'inkscape'     : run_inkscape,
+}
+
+#-------------------------------------------------------------------------
+# convert
+#-------------------------------------------------------------------------
+# Converts one asset in a worker. Writes to a temporary name first so an
+# interrupted conversion never leaves a truncated PNG behind. Returns
+# ( svg, png, dpi, seconds, error ).
+
+def convert( args ):
+  svg, png, dpi, rasterizer = args
+  start = timeit.default_timer()
+  error = None
+  tmp = png + '.tmp.png'
+  try:
+    width = int( math.ceil( svg_width( svg ) * dpi / svg_dpi ) )
+    rasterizers[rasterizer]( svg, tmp, width )
+    os.rename( tmp, png )
+  except BaseException:
+    error = traceback.format_exc()
+    if os.path.exists( tmp ):
+      os.remove( tmp )
+  return ( svg, png, dpi, timeit.default_timer() - start, error )
+
+#-------------------------------------------------------------------------
+# build
+#-------------------------------------------------------------------------
+# Converts the stale assets on a pool of jobs workers. The cache keeps,
+# per PNG, the SVG content hash and DPI it was made from and the PNG's
+# own hash. Returns a list of ( png, seconds, error ) in completion
+# order, with seconds set to None for PNGs that were not converted.
+#
+# A PNG the cache has never seen was exported by hand, so it is never
+# overwritten without force: it is taken as up to date and recorded
+# against its SVG as it is now, so a later edit to the SVG converts it.
+
+def asset_key( cache, svg, dpi ):
+  return '{}@{}'.format( cache.digest( svg ), dpi )
+
+def build( assets, jobs=None, force=False, rasterizer=None, verbose=True ):
+  cache  = build_cache.BuildCache( cache_dir )
+  pngs   = cache.manifest.setdefault( 'assets', {} )
+  results = []
+
+  def report( png, seconds, error, status ):
+    results.append( ( png, seconds, error ) )
+    if verbose:
+      name = os.path.relpath( png, images_dir )
+      if seconds is None:
+        print( "[ cached] {:<40} {}".format( name, status ) )
+      else:
+        print( "[{:6.2f}s] {:<40} {}".format( seconds, name, status ) )
+      sys.stdout.flush()
+
+  stale = []
+  for svg, png, dpi in assets:
+    entry = pngs.get( png )
+    if force:
+      stale.append( ( svg, png, dpi ) )
+    elif entry is None and os.path.exists( png ):
+      pngs[png] = { 'key' : asset_key( cache, svg, dpi ),
+                    'png' : cache.digest( png ) }
+      report( png, None, None, 'up to date (existing PNG adopted)' )
+    elif ( entry is not None
+           and entry['key'] == asset_key( cache, svg, dpi )
+           and entry['png'] == cache.digest( png ) ):
+      report( png, None, None, 'up to date' )
+    else:
+      stale.append( ( svg, png, dpi ) )
+
+  if stale:
+    rasterizer = rasterizer or find_rasterizer()
+    if rasterizer is None:
+      raise RuntimeError( "no SVG rasterizer found; install cairosvg, "
+                          "rsvg-convert or inkscape" )
+
+  def finish( result ):
+    svg, png, dpi, seconds, error = result
+    if error is None:
+      pngs[png] = { 'key' : asset_key( cache, svg, dpi ),
+                    'png' : cache.digest( png ) }
+    else:
+      pngs.pop( png, None )
+    report( png, seconds, error, 'FAILED' if error else 'ok' )
+
+  work = [ ( svg, png, dpi, rasterizer ) for svg, png, dpi in stale ]
+  jobs = max( 1, min( jobs or multiprocessing.cpu_count(), len( work ) ) )
+  if jobs == 1:
+    for args in work:
+      finish( convert( args ) )
+  else:
+    pool = multiprocessing.Pool( jobs )
+    try:
+      for result in pool.imap_unordered( convert, work, chunksize=1 ):
+        finish( result )
+    finally:
+      pool.close()
+      pool.join()
+
+  cache.save()
+  return results
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description='Rasterize the SVG diagrams.' )
+  p.add_argument( 'svgs', nargs='*',
+                  help='SVGs to rasterize, under images/ (default: all)' )
+  p.add_argument( '-j', '--jobs', type=int, default=None,
+                  help='worker processes (default: one per core)' )
+  p.add_argument( '-f', '--force', action='store_true',
+                  help='convert every SVG even if its PNG is up to date' )
+  p.add_argument( '--dpi', default=None,
+                  help='comma-separated DPIs (default: {})'.format(
+                    ','.join( str( d ) for d in dpis ) ) )
+  p.add_argument( '--rasterizer', choices=sorted( rasterizers ), default=None,
+                  help='converter to use (default: the first one found)' )
+  opts = p.parse_args( argv )
+
+  default_dpis = None
+  if opts.dpi:
+    default_dpis = [ int( d ) for d in opts.dpi.split( ',' ) if d.strip() ]
+
+  start = timeit.default_timer()
+  try:
+    results = build( discover_assets( opts.svgs, default_dpis ), opts.jobs,
+                     opts.force, opts.rasterizer )
+  except RuntimeError as e:
+    print( e, file=sys.stderr )
+    return 1
+  elapsed = timeit.default_timer() - start
+
+  failed = [ ( png, error ) for png, _, error in results if error ]
+  for png, error in failed:
+    print( "\n{} failed:\n{}".format( png, error ), file=sys.stderr )
+
+  converted = len( [ r for r in results if r[1] is not None ] )
+  print( "converted {} of {} images in {:.2f}s ({} failed)"
+         .format( converted, len( results ), elapsed, len( failed ) ) )
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
@@ -0,0 +1,157 @@
+#=========================================================================
+# build_cache.py
+#=========================================================================
+# Content-hash cache for the figure build. A figure's key hashes its
+# script source, every local module and data file it read during its
+# last render, the matplotlib version, the default rcParams and the
+# output formats (FIGURE_FORMATS, see figure_style.py). When
+# the key is unchanged the figure is not rendered again; its outputs
+# are restored from the copies kept in the cache if they have gone
+# missing or been overwritten.
+#
+# File digests are memoized on (size, mtime), so large result stores
+# are only rehashed after they actually change.
+#
+
+import hashlib
+import json
+import os
+import shutil
+
+code_dir  = os.path.dirname( os.path.abspath( __file__ ) )
+cache_dir = os.path.join( code_dir, '.build', 'cache' )
+
+manifest_filename = 'manifest.json'
+
+#-------------------------------------------------------------------------
+# env_digest
+#-------------------------------------------------------------------------
+# Hash of the matplotlib version, the rcParams every script starts from
+# and the formats it writes. Call after the backend has been selected.
+
+def env_digest():
+  import matplotlib
+  h = hashlib.sha1()
+  h.update( matplotlib.__version__.encode( 'utf-8' ) )
+  h.update( ( os.environ.get( 'FIGURE_FORMATS' ) or 'pdf' ).encode( 'utf-8' ) )
+  for key in sorted( matplotlib.rcParams.keys() ):
+    h.update( repr( ( key, matplotlib.rcParams[key] ) ).encode( 'utf-8' ) )
+  return h.hexdigest()
+
+#-------------------------------------------------------------------------
+# Helper functions
+#-------------------------------------------------------------------------
+
+def stat_key( path ):
+  st = os.stat( path )
+  return [ st.st_size, st.st_mtime ]
+
+def hash_file( path ):
+  h = hashlib.sha1()
+  with open( path, 'rb' ) as f:
+    for chunk in iter( lambda: f.read( 1 << 20 ), b'' ):
+      h.update( chunk )
+  return h.hexdigest()
+
+#-------------------------------------------------------------------------
+# BuildCache
+#-------------------------------------------------------------------------
+
+class BuildCache( object ):
+
+  def __init__( self, directory=cache_dir ):
+    self.directory = directory
+    self.manifest  = { 'files' : {}, 'figures' : {} }
+
+    try:
+      with open( os.path.join( directory, manifest_filename ) ) as f:
+        self.manifest = json.load( f )
+    except ( IOError, OSError, ValueError ):
+      pass
+
+    self.files   = self.manifest['files']
+    self.figures = self.manifest['figures']
+
+  def save( self ):
+    if not os.path.isdir( self.directory ):
+      os.makedirs( self.directory )
+    filename = os.path.join( self.directory, manifest_filename )
+    with open( filename + '.tmp', 'w' ) as f:
+      json.dump( self.manifest, f, indent=2, sort_keys=True )
+      f.write( '\n' )
+    os.rename( filename + '.tmp', filename )
+
+  # Content digest of a file, rehashed only when its stat changes
+
+  def digest( self, path ):
+    try:
+      stat = stat_key( path )
+    except OSError:
+      return None
+    entry = self.files.get( path )
+    if entry is None or entry[0] != stat:
+      entry = [ stat, hash_file( path ) ]
+      self.files[path] = entry
+    return entry[1]
+
+  def key( self, script, deps, env ):
+    h = hashlib.sha1()
+    h.update( env.encode( 'utf-8' ) )
+    for path in [ script ] + sorted( deps ):
+      h.update( path.encode( 'utf-8' ) )
+      h.update( str( self.digest( path ) ).encode( 'utf-8' ) )
+    return h.hexdigest()
+
+  def figure_dir( self, script ):
+    return os.path.join( self.directory, os.path.basename( script ) )
+
+  #-----------------------------------------------------------------------
+  # lookup
+  #-----------------------------------------------------------------------
+  # Returns True if the figure is up to date for outdir, restoring any
+  # cached output that is missing or has changed since it was built.
+
+  def lookup( self, script, outdir, env ):
+    entry = self.figures.get( os.path.basename( script ) )
+    if entry is None:
+      return False
+    if entry['key'] != self.key( script, entry['deps'], env ):
+      return False
+
+    cached = self.figure_dir( script )
+    for name, digest in entry['outputs'].items():
+      src = os.path.join( cached, name )
+      if not os.path.exists( src ):
+        return False
+      dst = os.path.join( outdir, name )
+      if self.digest( dst ) != digest:
+        shutil.copy2( src, dst )
+        self.digest( dst )
+
+    return True
+
+  #-----------------------------------------------------------------------
+  # store
+  #-----------------------------------------------------------------------
+  # Records a fresh render: the deps it read and copies of its outputs.
+
+  def store( self, script, deps, outputs, env ):
+    cached = self.figure_dir( script )
+    if os.path.isdir( cached ):
+      shutil.rmtree( cached )
+    os.makedirs( cached )
+
+    digests = {}
+    for path in outputs:
+      name = os.path.basename( path )
+      shutil.copy2( path, os.path.join( cached, name ) )
+      digests[name] = self.digest( path )
+
+    self.figures[ os.path.basename( script ) ] = {
+      'key'     : self.key( script, deps, env ),
+      'deps'    : sorted( deps ),
+      'outputs' : digests,
+    }
+
+  def invalidate( self, script ):
+    self.figures.pop( os.path.basename( script ), None )
@@ -0,0 +1,329 @@
+#=========================================================================
+# build_figures.py
+#=========================================================================
+# Renders every figure script in code/ across a process pool. Each
+# worker imports matplotlib once with the headless Agg backend and then
+# runs scripts in-process, resetting rcParams between them, so a script
+# costs its own work rather than a fresh interpreter and matplotlib
+# import. Scripts are dispatched longest-first using the timings from
+# the previous build, so a full rebuild takes about as long as the
+# slowest figure.
+#
+# Figures whose script, local modules, data and matplotlib setup are
+# unchanged since their last render are skipped and their cached
+# outputs reused (see build_cache.py), so a rebuild with nothing
+# changed renders nothing.
+#
+#   % python build_figures.py                 # all stale figures
+#   % python build_figures.py -j 4 fig-evaluation-perf-time.py
+#   % python build_figures.py --force         # ignore the cache
+#   % python build_figures.py --formats pdf,png,svg
+#
+# With FIGURE_PROFILE set each rendered script is also profiled (see
+# figure_profile.py).
+#
+# Figure scripts are the hyphenated *.py files (fig-*, backup-*, ...);
+# underscore modules like this one are helpers and are never run.
+#
+
+from __future__ import print_function
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+import timeit
+import traceback
+
+import build_cache
+
+code_dir  = os.path.dirname( os.path.abspath( __file__ ) )
+build_dir = os.path.join( code_dir, '.build' )
+
+timings_filename = os.path.join( build_dir, 'timings.json' )
+
+#-------------------------------------------------------------------------
+# discover_scripts
+#-------------------------------------------------------------------------
+
+def discover_scripts( directory=code_dir ):
+  scripts = []
+  for path in sorted( glob.glob( os.path.join( directory, '*.py' ) ) ):
+    if '-' in os.path.basename( path ):
+      scripts.append( path )
+  return scripts
+
+#-------------------------------------------------------------------------
+# Timings from the previous build
+#-------------------------------------------------------------------------
+
+def load_timings():
+  try:
+    with open( timings_filename ) as f:
+      return json.load( f )
+  except ( IOError, OSError, ValueError ):
+    return {}
+
+def save_timings( timings ):
+  if not os.path.isdir( build_dir ):
+    os.makedirs( build_dir )
+  with open( timings_filename, 'w' ) as f:
+    json.dump( timings, f, indent=2, sort_keys=True )
+    f.write( '\n' )
+
+# Longest first; scripts never timed fall back to their source size
+
+def schedule( scripts, timings ):
+  def cost( path ):
+    name = os.path.basename( path )
+    return ( name in timings, timings.get( name, os.path.getsize( path ) ) )
+  return sorted( scripts, key=cost, reverse=True )
+
+#-------------------------------------------------------------------------
+# Worker
+#-------------------------------------------------------------------------
+
+worker_rc = None
+
+def init_worker():
+  global worker_rc
+
+  import matplotlib
+  matplotlib.use( 'Agg' )
+  import matplotlib.pyplot
+
+  if code_dir not in sys.path:
+    sys.path.insert( 0, code_dir )
+
+  # Pay for the shared style and the PDF backend once per worker rather
+  # than in whichever script happens to run first
+
+  import figure_style
+  import matplotlib.backends.backend_pdf
+
+  worker_rc = matplotlib.rcParams.copy()
+
+# Source files of the local modules reachable from a script's globals
+
+def local_modules( namespace ):
+  found = set()
+  pending = list( namespace.values() )
+  while pending:
+    obj = pending.pop()
+    if not isinstance( obj, type( sys ) ):
+      module = getattr( obj, '__module__', None )
+      if not isinstance( module, str ) or module == '__main__':
+        continue
+      obj = sys.modules.get( module )
+      if obj is None:
+        continue
+    path = getattr( obj, '__file__', None )
+    if not path or os.path.dirname( os.path.abspath( path ) ) != code_dir:
+      continue
+    path = os.path.splitext( os.path.abspath( path ) )[0] + '.py'
+    if path not in found:
+      found.add( path )
+      pending.extend( vars( obj ).values() )
+  return found
+
+# Files under outdir named after the script that this render wrote
+
+def outputs_since( script, outdir, start ):
+  stem = os.path.splitext( os.path.basename( script ) )[0]
+  outputs = []
+  for name in os.listdir( outdir ):
+    if not ( name.startswith( stem + '.' ) or name.startswith( stem + '-' ) ):
+      continue
+    path = os.path.join( outdir, name )
+    if name.endswith( '.py' ) or not os.path.isfile( path ):
+      continue
+    if os.path.getmtime( path ) >= start:
+      outputs.append( path )
+  return sorted( outputs )
+
+# Runs one script in this process with its usual argv and working
+# directory, so it writes <basename>.py.pdf next to itself. Returns
+# ( name, seconds, error, deps, outputs ) where error is a traceback or
+# None, deps are the local modules and data files the script read and
+# outputs are the files it wrote. The rcParams are reset afterwards too,
+# so a long-lived process (see watch_figures.py) starts each build
+# from the defaults.
+
+def render( script, outdir=None ):
+  import matplotlib
+  import matplotlib.pyplot as plt
+  import figure_profile
+  import font_cache
+  import results_store
+
+  if worker_rc is None:
+    init_worker()
+
+  name = os.path.basename( script )
+  outdir = outdir or os.path.dirname( script )
+  saved_argv = sys.argv
+  saved_cwd  = os.getcwd()
+
+  results_store.accessed.clear()
+  namespace = {}
+
+  profiling = figure_profile.requested()
+
+  start_time = time.time() - 1.0
+  start = timeit.default_timer()
+  error = None
+  try:
+    matplotlib.rcParams.update( worker_rc )
+    sys.argv = [ script ]
+    os.chdir( outdir )
+    if profiling:
+      figure_profile.start( script )
+    namespace = runpy.run_path( script, run_name='__main__' )
+  except BaseException:
+    error = traceback.format_exc()
+  finally:
+    if profiling:
+      figure_profile.stop()
+    plt.close( 'all' )
+    matplotlib.rcParams.update( worker_rc )
+    sys.argv = saved_argv
+    os.chdir( saved_cwd )
+  seconds = timeit.default_timer() - start
+
+  # Workers exit without running atexit handlers
+
+  font_cache.save()
+
+  deps = local_modules( namespace ) | results_store.accessed
+  deps.discard( script )
+  outputs = outputs_since( script, outdir, start_time )
+
+  return ( name, seconds, error, sorted( deps ), outputs )
+
+def render_star( args ):
+  return render( *args )
+
+#-------------------------------------------------------------------------
+# build
+#-------------------------------------------------------------------------
+# Renders the stale scripts on a pool of jobs workers. Returns a list of
+# ( name, seconds, error ) in completion order; figures reused from the
+# cache are reported with seconds set to None.
+
+def build( scripts, jobs=None, outdir=None, force=False, verbose=True ):
+  import matplotlib
+  matplotlib.use( 'Agg' )
+  if code_dir not in sys.path:
+    sys.path.insert( 0, code_dir )
+
+  cache   = build_cache.BuildCache()
+  env     = build_cache.env_digest()
+  timings = load_timings()
+  results = []
+
+  def report( name, seconds, error, status ):
+    results.append( ( name, seconds, error ) )
+    if verbose:
+      if seconds is None:
+        print( "[ cached] {:<40} {}".format( name, status ) )
+      else:
+        print( "[{:6.2f}s] {:<40} {}".format( seconds, name, status ) )
+      sys.stdout.flush()
+
+  stale = []
+  for script in scripts:
+    script_outdir = outdir or os.path.dirname( script )
+    if not force and cache.lookup( script, script_outdir, env ):
+      report( os.path.basename( script ), None, None, 'up to date' )
+    else:
+      stale.append( script )
+
+  scripts = schedule( stale, timings )
+  jobs = max( 1, min( jobs or multiprocessing.cpu_count(), len( scripts ) ) )
+  by_name = dict( ( os.path.basename( s ), s ) for s in scripts )
+
+  def finish( result ):
+    name, seconds, error, deps, outputs = result
+    if error is None:
+      timings[name] = seconds
+      cache.store( by_name[name], deps, outputs, env )
+    else:
+      cache.invalidate( by_name[name] )
+    report( name, seconds, error, 'FAILED' if error else 'ok' )
+
+  if not scripts:
+    pass
+  elif jobs == 1 or len( scripts ) <= 1:
+    if worker_rc is None:
+      init_worker()
+    for script in scripts:
+      finish( render( script, outdir ) )
+  else:
+    pool = multiprocessing.Pool( jobs, initializer=init_worker )
+    try:
+      work = [ ( script, outdir ) for script in scripts ]
+      for result in pool.imap_unordered( render_star, work, chunksize=1 ):
+        finish( result )
+    finally:
+      pool.close()
+      pool.join()
+
+  cache.save()
+  if scripts:
+    save_timings( timings )
+  return results
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def resolve_scripts( names ):
+  if not names:
+    return discover_scripts()
+  scripts = []
+  for name in names:
+    path = name if os.path.exists( name ) else os.path.join( code_dir, name )
+    scripts.append( os.path.abspath( path ) )
+  return scripts
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description='Render the figure scripts.' )
+  p.add_argument( 'scripts', nargs='*',
+                  help='scripts to render (default: every figure script)' )
+  p.add_argument( '-j', '--jobs', type=int, default=None,
+                  help='worker processes (default: one per core)' )
+  p.add_argument( '-o', '--outdir', default=None,
+                  help='write figures here instead of next to each script' )
+  p.add_argument( '-f', '--force', action='store_true',
+                  help='render every figure even if its cache entry is fresh' )
+  p.add_argument( '--formats', default=None,
+                  help='comma-separated output formats (default: '
+                       '$FIGURE_FORMATS or pdf)' )
+  opts = p.parse_args( argv )
+
+  if opts.formats:
+    os.environ['FIGURE_FORMATS'] = opts.formats
+
+  if opts.outdir:
+    opts.outdir = os.path.abspath( opts.outdir )
+
+  start = timeit.default_timer()
+  results = build( resolve_scripts( opts.scripts ), opts.jobs, opts.outdir,
+                   opts.force )
+  elapsed = timeit.default_timer() - start
+
+  failed = [ ( name, error ) for name, _, error in results if error ]
+  for name, error in failed:
+    print( "\n{} failed:\n{}".format( name, error ), file=sys.stderr )
+
+  rendered = len( [ r for r in results if r[1] is not None ] )
+  print( "rendered {} of {} figures in {:.2f}s ({} failed)"
+         .format( rendered, len( results ), elapsed, len( failed ) ) )
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
@@ -0,0 +1,648 @@
+#=========================================================================
+# build_frames.py
+#=========================================================================
+# Animation frames of the incremental diagrams (runtime-0..9,
+# lta-tc-exec-0..6, ...) generated from one layered master SVG per
+# sequence instead of a near-copy of the whole drawing per frame.
+#
+# A master holds everything any frame shows. What only some frames show
+# sits in sublayers (<g inkscape:groupmode="layer">, labelled with the
+# frames they belong to), and the step spec next to it lists the layers
+# each frame shows:
+#
+#   images/lta/runtime.master.svg
+#   images/lta/runtime.frames.json
+#     { "master" : "runtime.master.svg",
+#       "frames" : [ { "name" : "runtime-0", "layers" : [ ... ] }, ... ] }
+#
+# A frame is the master with its hidden layers removed and its shown
+# ones unwrapped, so it is the same document as the hand-made frame.
+# To rasterize, the master is cut into slices: runs of elements, in
+# paint order, shown in the same set of frames. Each slice is
+# rasterized once, by content hash and cached (see build_assets.py), and
+# each frame PNG is the slices it shows composited in order onto the
+# page (the master's pagecolor and pageopacity). Every element is
+# rasterized once per sequence rather than once per frame showing it,
+# and editing one layer rasterizes just its slices again and composites
+# just the frames showing them:
+#
+#   % python build_frames.py                      # every sequence
+#   % python build_frames.py runtime --svg        # also write frame SVGs
+#   % python build_frames.py runtime --force      # overwrite hand exports
+#
+# merge builds a master and spec from existing frames, aligning their
+# elements by content (Inkscape keeps element ids across copies):
+#
+#   % python build_frames.py merge runtime ../images/lta/runtime-?.svg
+#
+# Only rendering is preserved: the frames share the first frame's
+# editor state (sodipodi:namedview, metadata).
+#
+
+from __future__ import print_function
+
+import argparse
+import copy
+import difflib
+import glob
+import hashlib
+import json
+import os
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+import build_assets
+import build_cache
+
+code_dir  = build_assets.code_dir
+cache_dir = os.path.join( code_dir, '.build', 'frames' )
+
+# Directories searched for <sequence>.frames.json
+
+directories = [
+  os.path.join( build_assets.images_dir, 'lta' ),
+  os.path.join( build_assets.images_dir, 'motivation' ),
+]
+
+svg_ns       = 'http://www.w3.org/2000/svg'
+inkscape_ns  = 'http://www.inkscape.org/namespaces/inkscape'
+sodipodi_ns  = 'http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd'
+
+docname     = '{' + sodipodi_ns + '}docname'
+namedview   = '{' + sodipodi_ns + '}namedview'
+groupmode   = '{' + inkscape_ns + '}groupmode'
+label       = '{' + inkscape_ns + '}label'
+pageopacity = '{' + inkscape_ns + '}pageopacity'
+stockid     = '{' + inkscape_ns + '}stockid'
+
+# Elements whose children are merged one by one, because a variant child
+# may be wrapped in a <g> there. Anything else is compared whole.
+
+containers = set( '{' + svg_ns + '}' + tag
+                  for tag in [ 'svg', 'g', 'defs', 'a', 'symbol' ] )
+
+# Editor state, not drawing: kept once, from the first frame
+
+editor_state = set( [ namedview,
+                      '{' + svg_ns + '}metadata' ] )
+
+defs_tag   = '{' + svg_ns + '}defs'
+xlink_href = '{http://www.w3.org/1999/xlink}href'
+
+# Whether a group is painted as a whole, so that its children cannot be
+# rasterized apart and composited
+
+def style_of( elem ):
+  style = {}
+  for item in ( elem.get( 'style' ) or '' ).split( ';' ):
+    if ':' in item:
+      name, value = item.split( ':', 1 )
+      style[ name.strip() ] = value.strip()
+  return style
+
+def composited( elem ):
+  style = style_of( elem )
+  for name in [ 'filter', 'clip-path', 'mask' ]:
+    if elem.get( name, style.get( name, 'none' ) ) != 'none':
+      return True
+  return float( elem.get( 'opacity', style.get( 'opacity', '1' ) ) ) < 1.0
+
+#-------------------------------------------------------------------------
+# SVG files
+#-------------------------------------------------------------------------
+
+# Parses path, registering its namespace prefixes so that writing it
+# back keeps them
+
+def read_svg( path ):
+  for event, ( prefix, uri ) in ET.iterparse( path, events=[ 'start-ns' ] ):
+    ET.register_namespace( prefix, uri )
+  return ET.parse( path ).getroot()
+
+def svg_bytes( root ):
+  return b'<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n' + \
+    ET.tostring( root, encoding='utf-8' ).split( b'?>', 1 )[-1].lstrip()
+
+def write_svg( root, path ):
+  data = svg_bytes( root )
+  with open( path, 'wb' ) as f:
+    f.write( data )
+
+#-------------------------------------------------------------------------
+# Master
+#-------------------------------------------------------------------------
+# A node of the merged tree: an element (without children for a
+# container), the frames it appears in and, for a container, its merged
+# children.
+
+class Node( object ):
+
+  def __init__( self, elem, frame ):
+    self.elem     = shell( elem ) if elem.tag in containers else elem
+    self.key      = node_key( elem )
+    self.frames   = set( [ frame ] )
+    self.children = []
+    if elem.tag in containers:
+      self.children = [ Node( child, frame ) for child in elem ]
+
+def shell( elem ):
+  copied = ET.Element( elem.tag, dict( elem.attrib ) )
+  copied.text = elem.text
+  return copied
+
+# What two elements must share to be the same node: for a container its
+# own tag, attributes and text; otherwise its whole subtree
+
+def node_key( elem ):
+  if elem.tag in editor_state:
+    return elem.tag
+  if elem.tag in containers:
+    text = ( elem.text or '' ).strip()
+    return repr( ( elem.tag, sorted( elem.attrib.items() ), text ) )
+  copied = copy.copy( elem )
+  copied.tail = None
+  return ET.tostring( copied, encoding='utf-8' )
+
+# Merges the children of one frame's element into the merged children,
+# keeping every frame's children in order
+
+def merge_children( nodes, elems, frame ):
+  matcher = difflib.SequenceMatcher(
+    None, [ n.key for n in nodes ], [ node_key( e ) for e in elems ],
+    autojunk=False )
+  merged = []
+  for op, i1, i2, j1, j2 in matcher.get_opcodes():
+    merged += nodes[i1:i2]
+    if op == 'equal':
+      for node, elem in zip( nodes[i1:i2], elems[j1:j2] ):
+        node.frames.add( frame )
+        if elem.tag in containers:
+          node.children = merge_children( node.children, list( elem ), frame )
+    else:
+      merged += [ Node( elem, frame ) for elem in elems[j1:j2] ]
+  return merged
+
+def merge( frames ):
+  roots = [ read_svg( path ) for path in frames ]
+  master = Node( roots[0], 0 )
+  for i, root in enumerate( roots[1:], 1 ):
+    if node_key( without_docname( root ) ) != \
+       node_key( without_docname( roots[0] ) ):
+      raise ValueError( "'{}' and '{}' differ in their <svg> element"
+                        .format( frames[0], frames[i] ) )
+    master.frames.add( i )
+    master.children = merge_children( master.children, list( root ), i )
+  return master
+
+def without_docname( root ):
+  copied = shell( root )
+  copied.attrib.pop( docname, None )
+  return copied
+
+# Writes the merged tree as SVG, wrapping each run of siblings that some
+# of their parent's frames lack in a layer. Returns the root and
+# [ ( layer id, frames ) ].
+
+def frame_range( frames ):
+  frames = sorted( frames )
+  runs = []
+  for f in frames:
+    if runs and runs[-1][1] == f - 1:
+      runs[-1][1] = f
+    else:
+      runs.append( [ f, f ] )
+  return ','.join( str( a ) if a == b else '{}-{}'.format( a, b )
+                   for a, b in runs )
+
+def emit_master( master ):
+  layers = []
+
+  def emit( node ):
+    elem = copy.copy( node.elem )
+    if not node.children:
+      return elem
+    elem[:] = []
+    i = 0
+    while i < len( node.children ):
+      j = i
+      while j < len( node.children ) and \
+            node.children[j].frames == node.children[i].frames:
+        j += 1
+      run = [ emit( child ) for child in node.children[i:j] ]
+      frames = node.children[i].frames
+      if frames == node.frames:
+        elem.extend( run )
+      else:
+        layer = ET.SubElement( elem, '{' + svg_ns + '}g' )
+        layer.set( groupmode, 'layer' )
+        layer.set( 'id', 'frames-layer-{}'.format( len( layers ) ) )
+        layer.set( label, 'frames ' + frame_range( frames ) )
+        layer.extend( run )
+        layers.append( ( layer.get( 'id' ), frames ) )
+      i = j
+    return elem
+
+  return emit( master ), layers
+
+#-------------------------------------------------------------------------
+# Sequence
+#-------------------------------------------------------------------------
+
+class Sequence( object ):
+
+  def __init__( self, spec_path ):
+    with open( spec_path ) as f:
+      spec = json.load( f )
+    self.directory = os.path.dirname( os.path.abspath( spec_path ) )
+    self.name      = os.path.basename( spec_path ).split( '.frames.json' )[0]
+    self.master    = read_svg( os.path.join( self.directory, spec['master'] ) )
+    self.names     = [ frame['name'] for frame in spec['frames'] ]
+    self.shown     = [ set( frame['layers'] ) for frame in spec['frames'] ]
+    self.layers    = set().union( *self.shown ) if self.shown else set()
+    self.dpi       = spec.get( 'dpi', build_assets.dpis[0] )
+
+  # The master with the frames' layers kept where keep( layer id ) says
+  # so, unwrapped, and removed elsewhere
+
+  def select( self, keep, root=None ):
+    root = copy.deepcopy( self.master if root is None else root )
+
+    def visit( elem ):
+      children = []
+      for child in elem:
+        if child.get( groupmode ) == 'layer' and child.get( 'id' ) in self.layers:
+          if keep( child.get( 'id' ) ):
+            children += visit( child )
+        else:
+          children.append( child )
+          child[:] = visit( child )
+      return children
+
+    root[:] = visit( root )
+    return root
+
+  def frame( self, i ):
+    root = self.select( lambda layer: layer in self.shown[i] )
+    root.set( docname, self.names[i] + '.svg' )
+    return root
+
+  # The page Inkscape exports a frame on, as RGBA: the namedview's
+  # pagecolor at its pageopacity, by default white and transparent
+
+  def page( self ):
+    import matplotlib.colors
+    view = self.master.find( namedview )
+    view = {} if view is None else view.attrib
+    color = matplotlib.colors.to_rgb( view.get( 'pagecolor', '#ffffff' ) )
+    return np.array( color + ( float( view.get( pageopacity, 0 ) ), ),
+                     np.float32 )
+
+  #-----------------------------------------------------------------------
+  # Slices
+  #-----------------------------------------------------------------------
+  # Returns [ ( frames, root ) ]: each slice is the master's drawing
+  # elements in one run of paint order shown by the same frames, so that
+  # compositing a frame's slices in order paints it as a whole. Frames
+  # whose defs conflict get their own copy of a slice (see defs_groups).
+  # Returns None when compositing would not match: a group with opacity,
+  # a filter, clip or mask over varying content, or a reference into the
+  # drawing.
+
+  def slices( self ):
+    leaves = []
+
+    def visit( elem, path, frames ):
+      for child in elem:
+        if child.tag == defs_tag or child.tag in editor_state:
+          continue
+        child_frames = frames
+        if child.get( groupmode ) == 'layer' and child.get( 'id' ) in self.layers:
+          child_frames = frames & self.frames_of( child.get( 'id' ) )
+        if child.tag in containers and len( child ):
+          visit( child, path + [ child ], child_frames )
+        else:
+          leaves.append( ( child, path, child_frames ) )
+
+    everything = frozenset( range( len( self.names ) ) )
+    visit( self.master, [], everything )
+
+    for leaf, path, frames in leaves:
+      if frames != everything and any( composited( g ) for g in path ):
+        return None
+    if self.uses_drawing():
+      return None
+
+    runs = []
+    for leaf, path, frames in leaves:
+      if runs and runs[-1][0] == frames:
+        runs[-1][1].add( id( leaf ) )
+      else:
+        runs.append( ( frames, set( [ id( leaf ) ] ) ) )
+
+    slices = []
+    groups = self.defs_groups()
+    for frames, members in runs:
+      for group in groups:
+        shown = frames & group
+        if shown:
+          root = self.slice_svg( members, shown )
+          slices.append( ( shown, root ) )
+    return slices
+
+  # Frames partitioned so that no two in a group define one id in two
+  # ways; a slice carries the defs of all the frames it is drawn for.
+  # Inkscape writes its stock markers differently from one save to the
+  # next, so those count as equal when they have the same stock id.
+
+  def frame_defs( self, i ):
+    defined = {}
+    for defs in self.frame( i ).iter( defs_tag ):
+      for elem in defs:
+        stock = elem.get( stockid )
+        defined[ elem.get( 'id' ) ] = stock if stock is not None else node_key( elem )
+    return defined
+
+  def defs_groups( self ):
+    groups = []
+    for i in range( len( self.names ) ):
+      defined = self.frame_defs( i )
+      for frames, known in groups:
+        if all( known.get( k, v ) == v for k, v in defined.items() ):
+          frames.add( i )
+          known.update( defined )
+          break
+      else:
+        groups.append( ( set( [ i ] ), defined ) )
+    return [ frozenset( frames ) for frames, _ in groups ]
+
+  def frames_of( self, layer ):
+    return frozenset( i for i, shown in enumerate( self.shown ) if layer in shown )
+
+  def slice_svg( self, members, frames ):
+    root = copy.deepcopy( self.master )
+    originals = dict( zip( map( id, root.iter() ), self.master.iter() ) )
+
+    def prune( elem ):
+      kept = []
+      for child in elem:
+        if child.tag == defs_tag or child.tag in editor_state:
+          kept.append( child )
+        elif child.tag in containers and len( child ):
+          prune( child )
+          if len( child ):
+            kept.append( child )
+        elif id( originals[ id( child ) ] ) in members:
+          kept.append( child )
+      elem[:] = kept
+
+    prune( root )
+
+    # The page is painted under the composited frame instead, as some
+    # rasterizers would fill every slice with it
+
+    root[:] = [ child for child in root if child.tag != namedview ]
+    root = self.select(
+      lambda layer: any( layer in self.shown[i] for i in frames ), root )
+
+    # Frames in a group may each carry the same def; keep the first
+
+    seen = set()
+    for defs in root.iter( defs_tag ):
+      kept = []
+      for elem in defs:
+        if elem.get( 'id' ) is None or elem.get( 'id' ) not in seen:
+          seen.add( elem.get( 'id' ) )
+          kept.append( elem )
+      defs[:] = kept
+    return root
+
+  # True if some element refers by href to one outside the defs, which
+  # another slice may not carry
+
+  def uses_drawing( self ):
+    defined = set()
+    for defs in self.master.iter( defs_tag ):
+      defined.update( e.get( 'id' ) for e in defs.iter() )
+    for elem in self.master.iter():
+      href = elem.get( xlink_href ) or elem.get( 'href' ) or ''
+      if href.startswith( '#' ) and href[1:] not in defined:
+        return True
+    return False
+
+#-------------------------------------------------------------------------
+# Compositing
+#-------------------------------------------------------------------------
+# Straight (not premultiplied) alpha RGBA, as the rasterizers write.
+
+def read_png( path ):
+  import matplotlib.image
+  image = matplotlib.image.imread( path ).astype( np.float32 )
+  if image.shape[2] == 3:
+    image = np.dstack( [ image, np.ones( image.shape[:2], np.float32 ) ] )
+  return image
+
+def write_png( image, path ):
+  import matplotlib.image
+  matplotlib.image.imsave( path, np.clip( image, 0.0, 1.0 ) )
+
+# A slice mostly paints nothing, so it is kept as the box it covers:
+# ( rows, cols, pixels ), or None when it is blank
+
+def read_slice( path ):
+  image = read_png( path )
+  rows = np.flatnonzero( image[..., 3].any( axis=1 ) )
+  cols = np.flatnonzero( image[..., 3].any( axis=0 ) )
+  if not len( rows ):
+    return image.shape, None
+  box = ( slice( rows[0], rows[-1] + 1 ), slice( cols[0], cols[-1] + 1 ) )
+  return image.shape, ( box, image[box].copy() )
+
+# Paints top over bottom in place
+
+def over( top, bottom ):
+  a_top, a_bottom = top[..., 3:], bottom[..., 3:]
+  alpha = a_top + a_bottom * ( 1.0 - a_top )
+  color = top[..., :3] * a_top + bottom[..., :3] * a_bottom * ( 1.0 - a_top )
+  np.divide( color, alpha, out=color, where=alpha > 0 )
+  color[ np.broadcast_to( alpha == 0, color.shape ) ] = 0.0
+  bottom[..., :3] = color
+  bottom[..., 3:] = alpha
+
+#-------------------------------------------------------------------------
+# build
+#-------------------------------------------------------------------------
+# Writes every frame of the sequence as <name>.png (and <name>.svg with
+# svg) next to its master, the slices it shows composited in order onto
+# the master's page. A frame PNG the cache has never seen was exported
+# by hand, so as in build_assets.py it is adopted rather than
+# overwritten unless force is set. Returns the number of slices
+# rasterized, of frames composited and of frames.
+
+def slice_path( root, dpi ):
+  digest = hashlib.sha1( svg_bytes( root ) ).hexdigest()
+  return os.path.join( cache_dir, '{}@{}'.format( digest, dpi ) )
+
+def build_sequence( sequence, jobs=None, svg=False, rasterizer=None,
+                    force=False ):
+  if not os.path.isdir( cache_dir ):
+    os.makedirs( cache_dir )
+
+  frames = [ sequence.frame( i ) for i in range( len( sequence.names ) ) ]
+  outputs = [ os.path.join( sequence.directory, name )
+              for name in sequence.names ]
+  if svg:
+    for root, output in zip( frames, outputs ):
+      write_svg( root, output + '.svg' )
+
+  # Rasterize each slice, or failing that each frame, through the asset
+  # cache
+
+  slices = sequence.slices()
+  if slices is None:
+    parts = [ ( frozenset( [ i ] ), root ) for i, root in enumerate( frames ) ]
+  else:
+    parts = slices
+
+  assets = []
+  for frames_shown, root in parts:
+    base = slice_path( root, sequence.dpi )
+    if not os.path.exists( base + '.svg' ):
+      write_svg( root, base + '.svg' )
+    assets.append( ( base + '.svg', base + '.png', sequence.dpi ) )
+
+  results = build_assets.build( assets, jobs, force=force,
+                                rasterizer=rasterizer, verbose=False )
+  failed = [ png for png, _, error in results if error ]
+  if failed:
+    raise RuntimeError( "failed to rasterize {}".format( ', '.join( failed ) ) )
+
+  # Composite the frames whose slices changed, or whose PNG did
+
+  cache = build_cache.BuildCache( cache_dir )
+  composites = cache.manifest.setdefault( 'composites', {} )
+
+  page = sequence.page()
+  images = {}
+  composited = 0
+  for i, output in enumerate( outputs ):
+    shown = [ asset[1] for ( frames_shown, _ ), asset in zip( parts, assets )
+              if i in frames_shown ]
+    key = ' '.join( cache.digest( png ) for png in shown )
+    png = output + '.png'
+    entry = composites.get( png )
+    if not force:
+      if entry is None and os.path.exists( png ):
+        composites[png] = { 'key' : key, 'png' : cache.digest( png ) }
+        continue
+      if ( entry is not None and entry['key'] == key
+           and entry['png'] == cache.digest( png ) ):
+        continue
+
+    image = None
+    for path in shown:
+      if path not in images:
+        images[path] = read_slice( path )
+      shape, covered = images[path]
+      if image is None:
+        image = np.empty( shape, np.float32 )
+        image[...] = page
+      if covered is not None:
+        box, pixels = covered
+        over( pixels, image[box] )
+    write_png( image, png )
+    composites[png] = { 'key' : key, 'png' : cache.digest( png ) }
+    composited += 1
+
+  cache.save()
+  rasterized = len( [ r for r in results if r[1] is not None ] )
+  return rasterized, composited, len( outputs )
+
+def find_sequences( names=None ):
+  specs = []
+  for directory in directories:
+    specs += glob.glob( os.path.join( directory, '*.frames.json' ) )
+  sequences = [ Sequence( spec ) for spec in sorted( specs ) ]
+  if names:
+    sequences = [ s for s in sequences if s.name in names ]
+    missing = set( names ) - set( s.name for s in sequences )
+    if missing:
+      raise ValueError( "no sequence named {}".format( ', '.join( sorted( missing ) ) ) )
+  return sequences
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def merge_main( argv ):
+  p = argparse.ArgumentParser( prog='build_frames.py merge',
+                               description='Merge frames into a master SVG.' )
+  p.add_argument( 'sequence', help='name of the sequence, e.g. runtime' )
+  p.add_argument( 'frames', nargs='+', help='frame SVGs, in order' )
+  p.add_argument( '-o', '--outdir', default=None,
+                  help='directory for the master and spec '
+                       '(default: that of the first frame)' )
+  opts = p.parse_args( argv )
+
+  outdir = opts.outdir or os.path.dirname( os.path.abspath( opts.frames[0] ) )
+  root, layers = emit_master( merge( opts.frames ) )
+  root.attrib.pop( docname, None )
+  root.set( docname, opts.sequence + '.master.svg' )
+
+  master = opts.sequence + '.master.svg'
+  names = [ os.path.splitext( os.path.basename( f ) )[0] for f in opts.frames ]
+  spec = {
+    'master' : master,
+    'frames' : [ { 'name'   : name,
+                   'layers' : [ l for l, frames in layers if i in frames ] }
+                 for i, name in enumerate( names ) ],
+  }
+
+  write_svg( root, os.path.join( outdir, master ) )
+  with open( os.path.join( outdir, opts.sequence + '.frames.json' ), 'w' ) as f:
+    json.dump( spec, f, indent=2, sort_keys=True )
+    f.write( '\n' )
+
+  print( "merged {} frames into {} ({} layers)"
+         .format( len( names ), master, len( layers ) ) )
+  return 0
+
+def main( argv=None ):
+  argv = sys.argv[1:] if argv is None else argv
+  if argv[:1] == [ 'merge' ]:
+    return merge_main( argv[1:] )
+
+  p = argparse.ArgumentParser( description='Render the frame sequences.' )
+  p.add_argument( 'sequences', nargs='*',
+                  help='sequences to render (default: all)' )
+  p.add_argument( '-j', '--jobs', type=int, default=None,
+                  help='worker processes (default: one per core)' )
+  p.add_argument( '--svg', action='store_true',
+                  help='also write each frame as SVG' )
+  p.add_argument( '--force', action='store_true',
+                  help='rasterize and composite every frame, even '
+                       'hand-exported ones' )
+  p.add_argument( '--rasterizer', choices=sorted( build_assets.rasterizers ),
+                  default=None,
+                  help='converter to use (default: the first one found)' )
+  opts = p.parse_args( argv )
+
+  failed = 0
+  for sequence in find_sequences( opts.sequences ):
+    start = timeit.default_timer()
+    try:
+      rasterized, composited, frames = build_sequence(
+        sequence, opts.jobs, opts.svg, opts.rasterizer, opts.force )
+      print( "[{:6.2f}s] {:<30} {} slices rasterized, {} of {} frames "
+             "composited".format( timeit.default_timer() - start,
+                                  sequence.name, rasterized, composited, frames ) )
+    except RuntimeError as e:
+      print( "{}: {}".format( sequence.name, e ), file=sys.stderr )
+      failed += 1
+    sys.stdout.flush()
+  return 1 if failed else 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
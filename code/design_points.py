@@ -0,0 +1,204 @@
+#=========================================================================
+# design_points.py
+#=========================================================================
+# Typed design points parsed from the configuration labels used in the
+# results stores and figure scripts, and an in-memory index over them.
+#
+# An LTA label reads <lanes>/<lane groups>x<uthreads per lane>/<time
+# groups>: LTA-8/4x4/2 is eight lanes split into four lane groups
+# (decoupled in space), four uthreads per lane (32 in total), and the
+# uthreads of a lane split into two groups (decoupled in time). The
+# 'LTA-' prefix is optional, as the scripts drop it from their tick
+# labels. IO and O3 are the in-order and out-of-order baselines, and an
+# 'MC-' prefix marks a multicore system of the same cores:
+#
+#   point = design_points.parse( 'MC-LTA-4/2x8/2' )
+#   point.kind, point.multicore, point.uthreads      # 'LTA', True, 32
+#
+# The index answers queries over the fields with sorted columns, so a
+# query costs a binary search per field plus the size of the answer:
+#
+#   index = design_points.DesignIndex( store.configs )
+#   index.labels( uthreads=128, time_groups=( 4, None ) )
+#   index.labels( lanes=8, lane_groups=4, lane_uthreads=4 )   # 8/4x4/*
+#   index.group_by( 'uthreads', kind='LTA' )
+#
+
+import collections
+import re
+
+import numpy as np
+
+#-------------------------------------------------------------------------
+# DesignPoint
+#-------------------------------------------------------------------------
+# Baselines have zero for every LTA field.
+
+fields = [ 'lanes', 'lane_groups', 'lane_uthreads', 'time_groups' ]
+
+kinds = [ 'IO', 'O3', 'LTA' ]
+
+class DesignPoint( collections.namedtuple( 'DesignPoint',
+    [ 'kind', 'multicore' ] + fields ) ):
+
+  __slots__ = ()
+
+  @property
+  def uthreads( self ):
+    return self.lanes * self.lane_uthreads
+
+  # Canonical store label, e.g. 'MC-LTA-8/4x4/2'
+
+  @property
+  def label( self ):
+    prefix = 'MC-' if self.multicore else ''
+    if self.kind != 'LTA':
+      return prefix + self.kind
+    return prefix + 'LTA-' + self.short_label
+
+  # Label without prefixes, as the scripts print them
+
+  @property
+  def short_label( self ):
+    if self.kind != 'LTA':
+      return self.kind
+    return '{}/{}x{}/{}'.format( self.lanes, self.lane_groups,
+                                 self.lane_uthreads, self.time_groups )
+
+#-------------------------------------------------------------------------
+# parse
+#-------------------------------------------------------------------------
+
+label_re = re.compile(
+  r'^(MC-)?(?:(IO|O3)|(?:LTA-)?(\d+)/(\d+)x(\d+)/(\d+))$', re.IGNORECASE )
+
+parsed = {}
+
+def parse( label ):
+  point = parsed.get( label )
+  if point is not None:
+    return point
+
+  m = label_re.match( label.strip() )
+  if not m:
+    raise ValueError( "cannot parse config label '{}'".format( label ) )
+  mc, baseline = m.group( 1 ), m.group( 2 )
+  if baseline:
+    point = DesignPoint( baseline.upper(), bool( mc ), 0, 0, 0, 0 )
+  else:
+    point = DesignPoint( 'LTA', bool( mc ),
+                         *[ int( v ) for v in m.group( 3, 4, 5, 6 ) ] )
+
+  parsed[label] = point
+  return point
+
+#-------------------------------------------------------------------------
+# DesignIndex
+#-------------------------------------------------------------------------
+# Holds one integer column per field (the kind as its position in kinds,
+# multicore as 0/1, plus the derived uthreads) and, built on first use,
+# the permutation sorting each column. A query constraint is a value, a
+# ( lo, hi ) range with None for an open end, or a list of values:
+#
+#   index.select( kind='LTA', uthreads=( 64, None ), lanes=[ 4, 8 ] )
+#
+# select returns positions in label order; labels and points map them
+# back. The most selective constraint picks the candidates, which
+# the other constraints then filter.
+
+class DesignIndex( object ):
+
+  columns = [ 'kind', 'multicore' ] + fields + [ 'uthreads' ]
+
+  def __init__( self, labels ):
+    self.all_labels = list( labels )
+    self.all_points = [ parse( label ) for label in self.all_labels ]
+
+    self.values = {}
+    for name in self.columns:
+      self.values[name] = np.array(
+        [ self.encode( name, getattr( p, name ) ) for p in self.all_points ],
+        dtype=np.int64 )
+    self.sorted = {}
+
+  def __len__( self ):
+    return len( self.all_labels )
+
+  def encode( self, name, value ):
+    if name == 'kind':
+      return kinds.index( value.upper() )
+    return int( value )
+
+  def order( self, name ):
+    if name not in self.sorted:
+      perm = np.argsort( self.values[name], kind='mergesort' )
+      self.sorted[name] = ( perm, self.values[name][perm] )
+    return self.sorted[name]
+
+  # Positions matching one constraint, via binary search on the sorted
+  # column
+
+  def lookup( self, name, spec ):
+    perm, keys = self.order( name )
+    if isinstance( spec, tuple ):
+      lo, hi = spec
+      start = 0 if lo is None else \
+        np.searchsorted( keys, self.encode( name, lo ), 'left' )
+      end = len( keys ) if hi is None else \
+        np.searchsorted( keys, self.encode( name, hi ), 'right' )
+      return perm[start:end]
+    if isinstance( spec, ( list, set, frozenset ) ):
+      parts = [ self.lookup( name, value ) for value in spec ]
+      return np.concatenate( parts ) if parts else perm[:0]
+    return self.lookup( name, ( spec, spec ) )
+
+  def matches( self, name, spec, positions ):
+    column = self.values[name][positions]
+    if isinstance( spec, tuple ):
+      lo, hi = spec
+      mask = np.ones( len( positions ), dtype=bool )
+      if lo is not None:
+        mask &= column >= self.encode( name, lo )
+      if hi is not None:
+        mask &= column <= self.encode( name, hi )
+      return mask
+    if isinstance( spec, ( list, set, frozenset ) ):
+      mask = np.zeros( len( positions ), dtype=bool )
+      for value in spec:
+        mask |= column == self.encode( name, value )
+      return mask
+    return column == self.encode( name, spec )
+
+  def select( self, **query ):
+    for name in query:
+      if name not in self.columns:
+        raise KeyError( "no design point field '{}'".format( name ) )
+    if not query:
+      return np.arange( len( self ) )
+
+    candidates = [ ( name, self.lookup( name, spec ) )
+                   for name, spec in query.items() ]
+    name, positions = min( candidates, key=lambda c: len( c[1] ) )
+    positions = np.unique( positions )
+    for other, spec in query.items():
+      if other != name and len( positions ):
+        positions = positions[ self.matches( other, spec, positions ) ]
+    return positions
+
+  def labels( self, **query ):
+    return [ self.all_labels[i] for i in self.select( **query ) ]
+
+  def points( self, **query ):
+    return [ self.all_points[i] for i in self.select( **query ) ]
+
+  # [ ( value, labels ) ] for each distinct value of field among the
+  # points matching query, in increasing order of value
+
+  def group_by( self, name, **query ):
+    positions = self.select( **query )
+    column = self.values[name][positions]
+    groups = []
+    for value in np.unique( column ):
+      group = [ self.all_labels[i] for i in positions[ column == value ] ]
+      groups.append( ( kinds[value] if name == 'kind' else int( value ), group ) )
+    return groups
@@ -0,0 +1,401 @@
+#=========================================================================
+# design_search.py
+#=========================================================================
+# Finds the LTA configs of a sweep spec (see run_sweep.py) that maximize
+# performance per area, or per energy, under one or more area budgets,
+# simulating only a fraction of the configs the full sweep would.
+#
+# Every config in the spec is scored without simulating it: its area
+# comes from the area model, and its cycles (or energy) from the
+# results store if it was simulated, or from the surrogate fitted on
+# the store if not (see surrogate.py). The surrogate's bounds give each
+# unsimulated config an optimistic score, the best it could plausibly
+# reach. Each round simulates the batch of configs with the highest
+# optimistic scores, across a pool of processes, and refits. The search
+# is done once, under every budget, the best simulated config scores at
+# least as high as any unsimulated config could:
+#
+#   % python design_search.py sweeps/space.json --budget 1.5,2,3 --stub
+#   % python design_search.py sweeps/space.json --budget 2 -j 8 --command \
+#       'gem5.opt -d {outdir} lta.py --bmark {bmark} --config {config}'
+#   % python design_search.py sweeps/uthreads.json --budget 2.5 -n
+#
+# A score is the mean across the benchmarks of the speedup over IO,
+# times the area of IO over the config's (perf/area, the avg/area bars
+# of the figures), or of the energy of IO over the config's
+# (perf/energy, i.e. performance per watt). The spec needs IO among its
+# configs as the baseline, and the metrics the objective sums (cycles,
+# or energy.*) in its store or its sweep's counters; a batch simulated
+# without them stops the search with an error rather than being picked
+# again.
+#
+# Results go into the spec's store as a sweep's do, so the store is the
+# memo: a config simulated once, by a search or a sweep, is never
+# simulated again, and a search run again resumes where it stopped.
+# With --stub they go into a scratch store instead (see run_sweep.py).
+# Only LTA configs within the largest budget are candidates. Before the
+# surrogate can be fitted, a first batch spread across the space (each
+# config as far as possible from those already simulated) is simulated.
+#
+
+from __future__ import print_function
+
+import argparse
+import fnmatch
+import sys
+import timeit
+
+import numpy as np
+
+import area_model
+import design_points
+import gem5_stats
+import results_store
+import run_sweep
+import speedups
+import surrogate
+
+baseline = 'IO'
+
+# Metrics each objective sums per run, and whether it is per area
+
+objectives = {
+  'perf/area'   : ( 'cycles',   True  ),
+  'perf/energy' : ( 'energy.*', False ),
+  'perf'        : ( 'cycles',   False ),
+}
+
+#-------------------------------------------------------------------------
+# Store values
+#-------------------------------------------------------------------------
+# ( benchmark x config ) sums of the metrics matching the objective's
+# pattern, NaN wherever the store lacks one of them
+
+def store_values( store, benchmarks, configs, pattern ):
+  values = np.full( ( len( benchmarks ), len( configs ) ), np.nan )
+  if store is None:
+    return values
+  try:
+    metrics = surrogate.store_metrics( store, pattern )
+  except KeyError:
+    return values
+
+  rows = [ i for i, b in enumerate( benchmarks ) if b in store.bmark_idx ]
+  cols = [ j for j, c in enumerate( configs ) if c in store.config_idx ]
+  if rows and cols:
+    tensor = store.tensor( [ benchmarks[i] for i in rows ],
+                           [ configs[j] for j in cols ], metrics )
+    values[ np.ix_( rows, cols ) ] = tensor.sum( axis=-1 )
+  values[ ~( values > 0 ) ] = np.nan
+  return values
+
+def read_store( name ):
+  try:
+    return results_store.open_store( name )
+  except IOError:
+    return None
+
+# Whether the objective's metrics can be had at all: from the store, or
+# from the counters the spec's sweep reads from each run
+
+def check_metrics( spec, pattern ):
+  store = read_store( spec['store'] )
+  metrics = list( store.metrics ) if store is not None else []
+  metrics += list( spec.get( 'counters' ) or gem5_stats.default_counters )
+  if not any( fnmatch.fnmatchcase( m, pattern ) for m in metrics ):
+    raise ValueError( "no metric matching '{}' in store '{}' or among the "
+                      "sweep's counters".format( pattern, spec['store'] ) )
+
+#-------------------------------------------------------------------------
+# spread
+#-------------------------------------------------------------------------
+# Greedy maximin design: picks count of the allowed configs, each the
+# one farthest from the configs chosen so far, in the log2 fields
+# scaled to the unit range. With none chosen it starts nearest the
+# middle of the space.
+
+def spread( fields, chosen, allowed, count ):
+  coords = np.stack( [ np.log2( fields[name] ) for name in design_points.fields ]
+                     + [ fields['multicore'] ], axis=-1 ).astype( np.float64 )
+  span = coords.max( axis=0 ) - coords.min( axis=0 )
+  coords = ( coords - coords.min( axis=0 ) ) / np.where( span > 0, span, 1.0 )
+
+  if chosen.any():
+    dist = np.min( [ np.square( coords - c ).sum( axis=1 )
+                     for c in coords[chosen] ], axis=0 )
+  else:
+    dist = -np.square( coords - coords.mean( axis=0 ) ).sum( axis=1 )
+
+  picks = []
+  allowed = allowed.copy()
+  while allowed.any() and len( picks ) < count:
+    i = int( np.argmax( np.where( allowed, dist, -np.inf ) ) )
+    picks.append( i )
+    allowed[i] = False
+    near = np.square( coords - coords[i] ).sum( axis=1 )
+    dist = near if len( picks ) == 1 and not chosen.any() \
+           else np.minimum( dist, near )
+  return picks
+
+#-------------------------------------------------------------------------
+# search
+#-------------------------------------------------------------------------
+# Searches the LTA configs of spec for the best score under each area
+# budget (mm^2). evaluate( configs ) simulates a batch into the spec's
+# store and returns its ( bmark, config, error ) failures; without it
+# the search stops at the first batch it would simulate. Returns a
+# dict with, per budget, the best simulated config and whether nothing
+# unsimulated could still beat it, and the search's counts.
+
+def search( spec, objective='perf/area', budgets=None, evaluate=None,
+            batch=4, init=None, max_evals=None, tolerance=0.01,
+            mean='amean', verbose=True ):
+  pattern, per_area = objectives[objective]
+  benchmarks = list( spec['benchmarks'] )
+  budgets = sorted( budgets ) if budgets else [ np.inf ]
+  init = len( surrogate.feature_names ) - 1 if init is None else init
+  mean_of = getattr( speedups, mean )
+
+  if baseline not in spec['configs']:
+    raise ValueError( "sweep spec '{}' has no {} baseline".format(
+      spec['name'], baseline ) )
+  check_metrics( spec, pattern )
+
+  configs = [ c for c in spec['configs']
+              if design_points.parse( c ).kind == 'LTA' ]
+  area = area_model.areas( configs ) / 1e6
+  configs = [ c for c, a in zip( configs, area ) if a <= budgets[-1] ]
+  area = area[ area <= budgets[-1] ]
+  if not configs:
+    raise ValueError( "no LTA config of '{}' fits in {:.2f} mm^2".format(
+      spec['name'], budgets[-1] ) )
+
+  fields = surrogate.label_fields( configs )
+  X = surrogate.features( **fields )
+  scale = area_model.area( baseline ) / 1e6 / area if per_area \
+          else np.ones( len( configs ) )
+
+  failed = np.zeros( len( configs ), dtype=bool )
+  simulated = []
+  stored = None
+  rounds = 0
+
+  while True:
+    store = read_store( spec['store'] )
+    values = store_values( store, benchmarks, configs, pattern )
+    base = store_values( store, benchmarks, [ baseline ], pattern )[:, 0]
+    done = np.isfinite( values ).all( axis=0 )
+    if stored is None:
+      stored = int( done.sum() )
+
+    # Exact scores where every benchmark was simulated, surrogate
+    # estimates and optimistic bounds elsewhere
+
+    score = np.full( len( configs ), np.nan )
+    bound = np.full( len( configs ), np.nan )
+    model = None
+    if np.isfinite( base ).all():
+      if done.any():
+        perf = base[:, None] / values[:, done]
+        score[done] = bound[done] = mean_of( perf.T ) * scale[done]
+      if done.sum() >= init and ( ~done ).any():
+        model = surrogate.fit( store, pattern, benchmarks )
+        est, high = np.empty( values.shape ), np.empty( values.shape )
+        for b, bmark in enumerate( benchmarks ):
+          pred = model.predict_features( bmark, X )
+          est[b], high[b] = base[b] / pred.value, base[b] / pred.low
+        score[~done] = mean_of( est[:, ~done].T ) * scale[~done]
+        bound[~done] = mean_of( high[:, ~done].T ) * scale[~done]
+
+    # Per budget, the best simulated config and the configs that could
+    # still beat it by more than the tolerance
+
+    results = []
+    open_ = np.zeros( len( configs ), dtype=bool )
+    for budget in budgets:
+      within = area <= budget
+      best = np.where( within & done, score, -np.inf )
+      b = int( np.argmax( best ) )
+      best = best[b] if np.isfinite( best[b] ) else None
+      could = within & ~done & ~failed
+      if best is not None and model is not None:
+        could &= bound > best * ( 1.0 + tolerance )
+      open_ |= could
+      results.append( { 'budget' : budget,
+                        'config' : configs[b] if best is not None else None,
+                        'score'  : best,
+                        'area'   : area[b] if best is not None else None,
+                        'open'   : could,
+                        'done'   : best is not None and not could.any() } )
+
+    # The next batch: the baseline, then a spread-out first batch, then
+    # the highest bounds of each open budget in turn
+
+    if not np.isfinite( base ).all():
+      picks = [ baseline ]
+    elif model is None and ( ~done & ~failed ).any():
+      picks = [ configs[i] for i in
+                spread( fields, done, ~done & ~failed,
+                        min( max( init - done.sum(), batch ), init ) ) ]
+    else:
+      picks = []
+      ranked = [ [ i for i in np.argsort( -bound ) if r['open'][i] ]
+                 for r in results if r['open'].any() ]
+      while ranked and len( picks ) < batch:
+        for order in ranked:
+          while order and configs[ order[0] ] in picks:
+            order.pop( 0 )
+          if order and len( picks ) < batch:
+            picks.append( configs[ order.pop( 0 ) ] )
+        ranked = [ order for order in ranked if order ]
+
+    if max_evals is not None:
+      picks = picks[ :max( 0, max_evals - len( simulated ) ) ]
+    if verbose:
+      print( "round {:>3}: {:>4} of {} configs simulated{}".format(
+        rounds, int( done.sum() ), len( configs ),
+        ( ', next ' + ' '.join( picks ) ) if picks else '' ) )
+      sys.stdout.flush()
+    if not picks or evaluate is None:
+      break
+
+    rounds += 1
+    failures = evaluate( picks )
+    simulated += picks
+    for bmark, config, error in failures:
+      if config == baseline:
+        raise RuntimeError( "the {} baseline failed on {}:\n{}".format(
+          baseline, bmark, error ) )
+      failed[ configs.index( config ) ] = True
+
+    # A run that succeeds without the objective's metrics would be picked
+    # again every round
+
+    lost = set( config for _, config, _ in failures )
+    got = store_values( read_store( spec['store'] ), benchmarks, picks, pattern )
+    missing = [ c for c, ok in zip( picks, np.isfinite( got ).all( axis=0 ) )
+                if not ok and c not in lost ]
+    if missing:
+      raise RuntimeError( "simulating {} left no '{}' in store '{}'; the "
+                          "sweep's counters must produce it".format(
+                            ', '.join( missing ), pattern, spec['store'] ) )
+
+  return { 'objective'  : objective,
+           'results'    : results,
+           'configs'    : configs,
+           'score'      : score,
+           'bound'      : bound,
+           'next'       : picks,
+           'rounds'     : rounds,
+           'simulated'  : simulated,
+           'stored'     : stored,
+           'failed'     : [ c for c, f in zip( configs, failed ) if f ],
+           'exhaustive' : len( spec['configs'] ) }
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser(
+    description='Search a sweep for the best perf/area or perf/energy.' )
+  p.add_argument( 'spec', help='sweep spec (JSON)' )
+  p.add_argument( '--objective', choices=sorted( objectives ),
+                  default='perf/area', help='score to maximize '
+                  '(default: perf/area)' )
+  p.add_argument( '--budget', default=None,
+                  help='comma-separated area budgets in mm^2 '
+                       '(default: none)' )
+  p.add_argument( '--mean', choices=speedups.means, default='amean',
+                  help='mean across the benchmarks (default: amean)' )
+  p.add_argument( '--batch', type=int, default=4,
+                  help='configs simulated per round (default: 4)' )
+  p.add_argument( '--init', type=int, default=None,
+                  help='configs simulated before fitting (default: {})'
+                       .format( len( surrogate.feature_names ) - 1 ) )
+  p.add_argument( '--max-evals', type=int, default=None,
+                  help='stop after simulating this many configs' )
+  p.add_argument( '--tolerance', type=float, default=0.01,
+                  help='relative gain below which a config is not worth '
+                       'simulating (default: 0.01)' )
+  p.add_argument( '--command', default=None,
+                  help='simulator command template' )
+  p.add_argument( '--stub', type=float, nargs='?', const=0.0, default=None,
+                  metavar='SECONDS',
+                  help='run the stub simulator instead, taking SECONDS a job' )
+  p.add_argument( '--store', default=None,
+                  help='results store (default: the spec\'s, or with --stub '
+                       'a scratch one under .build/stub)' )
+  p.add_argument( '-o', '--outdir', default=None,
+                  help='directory for the runs (default: .build/sweeps/<spec>, '
+                       'or .build/stub/sweeps/<spec> with --stub)' )
+  p.add_argument( '-j', '--jobs', type=int, default=None,
+                  help='simulations at a time (default: one per core)' )
+  p.add_argument( '-n', '--dry-run', action='store_true',
+                  help='rank from the store alone and list the next batch' )
+  opts = p.parse_args( argv )
+
+  spec, outdir = run_sweep.read_spec( opts.spec ), opts.outdir
+  if opts.stub is not None:
+    spec = run_sweep.stub_spec( spec )
+    outdir = outdir or run_sweep.stub_outdir( spec )
+  if opts.store:
+    spec = dict( spec, store=opts.store )
+
+  budgets = None
+  if opts.budget:
+    budgets = [ float( b ) for b in opts.budget.split( ',' ) if b.strip() ]
+
+  command = opts.command
+  if opts.stub is not None:
+    command = run_sweep.stub_command( opts.stub )
+  if not command and not opts.dry_run:
+    print( "give a simulator --command, or --stub", file=sys.stderr )
+    return 1
+
+  def evaluate( configs ):
+    batch = dict( spec, configs=configs )
+    return run_sweep.run_sweep( batch, command, outdir, opts.jobs,
+                                verbose=False )
+
+  start = timeit.default_timer()
+  try:
+    found = search( spec, opts.objective, budgets,
+                    None if opts.dry_run else evaluate, opts.batch, opts.init,
+                    opts.max_evals, opts.tolerance, opts.mean )
+  except KeyboardInterrupt:
+    print( "interrupted; simulated configs are in store '{}'".format(
+      spec['store'] ), file=sys.stderr )
+    return 130
+  except ( ValueError, RuntimeError ) as e:
+    print( e, file=sys.stderr )
+    return 1
+
+  print( "{} ({}):".format( found['objective'], opts.mean ) )
+  for r in found['results']:
+    budget = '{:.2f} mm^2'.format( r['budget'] ) \
+             if np.isfinite( r['budget'] ) else 'any area'
+    if r['config'] is None:
+      print( "  {:>10}  nothing simulated yet".format( budget ) )
+      continue
+    bounds = found['bound'][ r['open'] ]
+    if r['done']:
+      state = 'best'
+    elif np.isfinite( bounds ).any():
+      state = '{} configs could still beat it, up to {:.3f}'.format(
+        len( bounds ), np.nanmax( bounds ) )
+    else:
+      state = '{} configs not simulated yet'.format( len( bounds ) )
+    print( "  {:>10}  {:<18} {:8.3f}  {:.2f} mm^2  {}".format(
+      budget, r['config'], r['score'], r['area'], state ) )
+
+  for config in found['failed']:
+    print( "  {} failed and was left out".format( config ), file=sys.stderr )
+  print( "simulated {} configs in {} rounds ({} were in the store already) "
+         "of the {} the full sweep runs, in {:.1f}s".format(
+           len( found['simulated'] ), found['rounds'], found['stored'],
+           found['exhaustive'], timeit.default_timer() - start ) )
+  return 0 if all( r['done'] for r in found['results'] ) or opts.dry_run else 1
+
+if __name__ == '__main__':
+  sys.exit( main() )
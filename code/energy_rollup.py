@@ -0,0 +1,166 @@
+#=========================================================================
+# energy_rollup.py
+#=========================================================================
+# Rolls per-component McPAT energies up into the component groups shown
+# in the energy breakdown figures. The groups mapping is compiled once
+# into a sparse (component x group) matrix, and the energies are packed
+# into a dense (benchmark, config, component) tensor, so the rollup for
+# every benchmark and config is a single sparse-dense product.
+#
+#   matrix = energy_rollup.GroupMatrix( comps, group_names, groups )
+#   tensor = energy_rollup.energy_tensor( energy_dic, comps )
+#   energy_data = energy_rollup.rollup( tensor, matrix )
+#
+# energy_data[bmark][group] is the per-config array the stacked bars
+# are drawn from, bit-for-bit identical to walking the dictionaries by
+# hand.
+#
+# The component energies themselves live in results stores (see
+# results_store.py) with one 'energy.<comp>' metric per component, and
+# a figure reads only the benchmarks and configs it plots:
+#
+#   tensor = energy_rollup.store_tensor( store, bmarks, configs, comps )
+#
+
+import numpy as np
+
+#-------------------------------------------------------------------------
+# GroupMatrix
+#-------------------------------------------------------------------------
+# Sparse (component x group) matrix stored by group in ELLPACK form:
+# row j of indices holds the components of group j in the order the
+# group lists them, padded with -1 up to the widest group. Components
+# outside every group (e.g. bypass/pipereg) never appear and drop out
+# of the rollup.
+#
+# The product is applied one column of indices at a time, so each
+# group's components are added in list order exactly as the nested
+# loops did. A BLAS dot sums in whatever order it likes and changes the
+# last bit of the bar heights. Groups are at most a handful of
+# components wide, so this is still a few whole-tensor adds.
+
+class GroupMatrix( object ):
+
+  def __init__( self, comps, group_names, groups ):
+    comp_idx = dict( ( c, i ) for i, c in enumerate( comps ) )
+
+    rows = []
+    for group in group_names:
+      rows.append( [ comp_idx[c] for c in groups[group] if c in comp_idx ] )
+
+    width = max( [ len( row ) for row in rows ] + [ 0 ] )
+
+    self.shape   = ( len( comps ), len( group_names ) )
+    self.indices = np.full( ( len( rows ), width ), -1, dtype=np.intp )
+    for j, row in enumerate( rows ):
+      self.indices[ j, :len( row ) ] = row
+
+  def dense( self ):
+    matrix = np.zeros( self.shape )
+    for j, row in enumerate( self.indices ):
+      matrix[ row[ row >= 0 ], j ] = 1.0
+    return matrix
+
+  # Computes tensor x matrix over the last axis of tensor. Padding
+  # entries gather from an extra all-zero component.
+
+  def apply( self, tensor ):
+    tensor = np.asarray( tensor, dtype=np.float64 )
+    padded = np.concatenate(
+      [ tensor, np.zeros( tensor.shape[:-1] + ( 1, ) ) ], axis=-1 )
+
+    out = np.zeros( tensor.shape[:-1] + ( self.shape[1], ) )
+    for k in range( self.indices.shape[1] ):
+      out += padded[ ..., self.indices[:, k] ]
+    return out
+
+#-------------------------------------------------------------------------
+# component_order
+#-------------------------------------------------------------------------
+# Components laid out group by group, in the order each group lists
+# them, followed by any that belong to no group.
+
+def component_order( group_names, groups, comps=() ):
+  order = []
+  for group in group_names:
+    for comp in groups[group]:
+      if comp not in order:
+        order.append( comp )
+  for comp in comps:
+    if comp not in order:
+      order.append( comp )
+  return order
+
+#-------------------------------------------------------------------------
+# energy_tensor
+#-------------------------------------------------------------------------
+# Packs a list (per benchmark) of lists (per config) of component
+# dictionaries into a dense (bmark, config, comp) array. Components a
+# dictionary does not report count as zero energy.
+
+def energy_tensor( energy_dic, comps ):
+  num_configs = max( len( bmark_dic ) for bmark_dic in energy_dic )
+  tensor = np.zeros( ( len( energy_dic ), num_configs, len( comps ) ) )
+  for i, bmark_dic in enumerate( energy_dic ):
+    for j, config in enumerate( bmark_dic ):
+      tensor[i, j] = [ config.get( comp, 0.0 ) for comp in comps ]
+  return tensor
+
+#-------------------------------------------------------------------------
+# Energy stores
+#-------------------------------------------------------------------------
+
+metric_prefix = 'energy.'
+
+def store_comps( store ):
+  return [ m[ len( metric_prefix ): ] for m in store.metrics
+           if m.startswith( metric_prefix ) ]
+
+# Reads a (bmark, config, comp) array from an energy store. Components
+# the store does not have and missing results count as zero energy.
+
+def store_tensor( store, bmarks, configs, comps ):
+  tensor = np.zeros( ( len( bmarks ), len( configs ), len( comps ) ) )
+  present = [ k for k, comp in enumerate( comps )
+              if metric_prefix + comp in store.metrics ]
+  if present:
+    metrics = [ metric_prefix + comps[k] for k in present ]
+    tensor[ :, :, present ] = store.tensor( bmarks, configs, metrics )
+  tensor[ np.isnan( tensor ) ] = 0.0
+  return tensor
+
+# Per-benchmark total energy of one config over every component in the
+# store, less the excluded ones. Components are summed in the store's
+# (sorted) order, the same order sum( dic.values() ) walked the McPAT
+# dictionaries in, so the totals match to the last bit.
+
+def store_totals( store, bmarks, config, exclude=() ):
+  comps = store_comps( store )
+  totals = []
+  for energies in store_tensor( store, bmarks, [ config ], comps )[:, 0]:
+    total = sum( energies )
+    for comp in exclude:
+      total -= energies[ comps.index( comp ) ]
+    totals.append( float( total ) )
+  return totals
+
+#-------------------------------------------------------------------------
+# rollup
+#-------------------------------------------------------------------------
+# Returns a (bmark, group, config) array of group energies divided by
+# scale (1e9 converts the McPAT pJ figures to mJ).
+
+def rollup( tensor, matrix, scale=1e9 ):
+  grouped = matrix.apply( tensor ) / scale
+  return grouped.transpose( 0, 2, 1 )
+
+#-------------------------------------------------------------------------
+# rollup_dic
+#-------------------------------------------------------------------------
+# Convenience wrapper used by the figure scripts.
+
+def rollup_dic( energy_dic, group_names, groups, scale=1e9 ):
+  comps  = component_order( group_names, groups )
+  matrix = GroupMatrix( comps, group_names, groups )
+  tensor = energy_tensor( energy_dic, comps )
+  return rollup( tensor, matrix, scale )
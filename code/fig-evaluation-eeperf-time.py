@@ -2,6 +2,7 @@
 # fig-evaluation-eeperf-time
 #=========================================================================
 
+import figure_style
 import matplotlib.pyplot as plt
 import math
 import sys
@@ -10,36 +11,24 @@ import os.path
 import numpy
 import numpy as np
 
-#-------------------------------------------------------------------------
-# Calculate figure size
-#-------------------------------------------------------------------------
-# We determine the fig_width_pt by using \showthe\columnwidth in LaTeX
-# and copying the result into the script. Change the aspect ratio as
-# necessary.
-
-fig_width_pt  = 768.0
-inches_per_pt = 1.0/72.27                     # convert pt to inch
-
-aspect_ratio  = 0.5
-
-fig_width     = 7.8                           # width in inches
-fig_height    = fig_width * aspect_ratio      # height in inches
-fig_size      = [ fig_width, fig_height ]
+import figure_phases
+import pareto
 
 #-------------------------------------------------------------------------
 # Configure matplotlib
 #-------------------------------------------------------------------------
 
-plt.rcParams['pdf.use14corefonts'] = True
-plt.rcParams['font.size']          = 16
-plt.rcParams['font.family']        = 'serif'
-plt.rcParams['font.serif']         = ['Times']
-plt.rcParams['figure.figsize']     = fig_size
+fig_width    = 7.8           # width in inches
+aspect_ratio = 0.5
+
+figure_style.configure( fig_width, aspect_ratio, font_size=16 )
 
 #-------------------------------------------------------------------------
 # Get data
 #-------------------------------------------------------------------------
 
+figure_phases.mark( 'data' )
+
 # Benchmarks
 
 bmarks = [
@@ -191,19 +180,16 @@ markers = [
 # Create plot
 #-------------------------------------------------------------------------
 
+figure_phases.mark( 'artists' )
+
 # Initialize figure
 
 fig, axes = plt.subplots( 1, num_bmarks )
 
-# Hack to get pointer to axes for full plot
-full_ax = fig.add_subplot( 111 )
-full_ax.spines['top'].set_color( 'none' )
-full_ax.spines['bottom'].set_color( 'none' )
-full_ax.spines['left'].set_color( 'none' )
-full_ax.spines['right'].set_color( 'none' )
-full_ax.set_axis_bgcolor( 'none' )
-full_ax.tick_params(
-  labelcolor='none', top='off', bottom='off', left='off', right='off' )
+# Axes spanning the full plot for the shared labels and legend
+full_ax = figure_style.label_axes( fig )
+
+figure_phases.mark( 'normalize' )
 
 # Convert the python lists into numpy arrays
 
@@ -226,18 +212,16 @@ for perf, eff in zip( task_sec, energy_eff ):
   norm_perf.append( perf / ref_perf )
   norm_eff.append( eff / ref_eff )
 
+figure_phases.mark( 'artists' )
+
 # Create scatter plots
 
-plots = []
-for i, ( ax, perf, eff ) in enumerate( zip( axes, norm_perf, norm_eff ) ):
-  for xval, yval, marker, color in zip( perf, eff, markers, colors ):
-    sct = ax.scatter( xval, yval, marker=marker, c=color, s=50 )
-    if i == 0:
-      plots.append( sct )
+for ax, perf, eff in zip( axes, norm_perf, norm_eff ):
+  figure_style.scatter_points( ax, perf, eff, markers, colors, s=50 )
+
+  # Pareto frontier of performance and energy efficiency
 
-  ax.plot( perf[2:6], eff[2:6], c=colors[5] )
-  ax.plot( perf[6:9], eff[6:9], c=colors[8] )
-#  ax.plot( perf[9:12], eff[9:12], c=colors[11] )
+  figure_style.frontier_plot( ax, perf, eff, pareto.frontier( perf, eff ) )
 
 # Power curve
 
@@ -247,6 +231,9 @@ for i, ( ax, perf, eff ) in enumerate( zip( axes, norm_perf, norm_eff ) ):
 
 # Legend
 
+plots = figure_style.legend_handles(
+  full_ax, markers[:num_configs], colors, s=50 )
+
 legend = full_ax.legend(
   plots, configs, loc='center left', bbox_to_anchor=(1.02, 0.5),
   ncol=1, borderaxespad=0, prop={'size':12}, frameon=True,
@@ -285,18 +272,11 @@ for i, ax in enumerate( axes ):
   ax.plot([xmin, xmax], [1.0, 1.0], linestyle='dashed', color='black')
   ax.plot([1.0, 1.0], [ymin, ymax], linestyle='dashed', color='black')
 
-  ax.grid(b=True, which='major')
-  ax.grid(b=True, which='minor')
-  ax.set_axisbelow(True)
-  ax.spines['right'].set_visible(False)
-  ax.spines['top'].set_visible(False)
-  ax.xaxis.set_ticks_position('bottom')
-  ax.yaxis.set_ticks_position('left')
+  figure_style.grid_axes( ax )
+  figure_style.despine( ax )
 
 #-------------------------------------------------------------------------
 # Generate PDF
 #-------------------------------------------------------------------------
 
-input_basename = os.path.splitext( os.path.basename(sys.argv[0]) )[0]
-output_filename = input_basename + '.py.pdf'
-plt.savefig( output_filename, bbox_extra_artists=(legend,), bbox_inches='tight' )
+figure_style.savefig( bbox_extra_artists=(legend,), bbox_inches='tight' )
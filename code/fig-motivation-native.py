@@ -2,37 +2,24 @@
 # fig-motivation-native.py
 #=========================================================================
 
+import figure_style
 import matplotlib.pyplot as plt
 import math
 import sys
 import os.path
 import numpy as np
 
-#-------------------------------------------------------------------------
-# Calculate figure size
-#-------------------------------------------------------------------------
-# We determine the fig_width_pt by using \showthe\columnwidth in LaTeX
-# and copying the result into the script. Change the aspect ratio as
-# necessary.
-
-fig_width_pt  = 768.0
-inches_per_pt = 1.0/72.27                     # convert pt to inch
-
-aspect_ratio  = 0.95
-
-fig_width     = 5.0                           # width in inches
-fig_height    = fig_width * aspect_ratio      # height in inches
-fig_size      = [ fig_width, fig_height ]
+import figure_phases
+import speedups
 
 #-------------------------------------------------------------------------
 # Configure matplotlib
 #-------------------------------------------------------------------------
 
-plt.rcParams['pdf.use14corefonts'] = True
-plt.rcParams['font.size']          = 16
-plt.rcParams['font.family']        = 'serif'
-plt.rcParams['font.serif']         = ['Times']
-plt.rcParams['figure.figsize']     = fig_size
+fig_width    = 5.0           # width in inches
+aspect_ratio = 0.95
+
+figure_style.configure( fig_width, aspect_ratio, font_size=16 )
 
 #-------------------------------------------------------------------------
 # Helper functions
@@ -43,19 +30,21 @@ def draw_cutoffs( init_x, init_y, label, x_tweak=0.0, y_tweak=0.0 ):
   y1 = [ init_y, init_y + 0.2 ]
   y2 = [ y1[0] - 0.4, y1[1] - 0.4 ]
 
-  plt.plot( x1, y1, color = 'w', linestyle = '-', linewidth = 1.5 )
-  plt.plot( x1, y2, color = 'w', linestyle = '-', linewidth = 1.5 )
+  lines  = plt.plot( x1, y1, color = 'w', linestyle = '-', linewidth = 1.5 )
+  lines += plt.plot( x1, y2, color = 'w', linestyle = '-', linewidth = 1.5 )
 
-  return ax.annotate(
+  return lines + [ ax.annotate(
     label, xy = ( init_x + 0.05 + x_tweak, init_y + 0.4 + y_tweak ),
     horizontalalignment='center',
     verticalalignment='bottom',
-    fontsize = 11.0 )
+    fontsize = 11.0 ) ]
 
 #-------------------------------------------------------------------------
 # Raw data
 #-------------------------------------------------------------------------
 
+figure_phases.mark( 'data' )
+
 # Benchmarks
 
 bmarks = [
@@ -173,8 +162,9 @@ cycle_data = [
 
 ]
 
-perf_data = [ np.array( [ float(i) for i in cycle_data[0] ] ) /
-              np.array( data ) for data in cycle_data ]
+figure_phases.mark( 'normalize' )
+
+perf_data = speedups.normalize( cycle_data ).perf
 
 #-------------------------------------------------------------------------
 # Plot parameters
@@ -207,6 +197,8 @@ colors = [
 # Create plot
 #-------------------------------------------------------------------------
 
+figure_phases.mark( 'artists' )
+
 # Initialize figure
 
 fig = plt.figure()
@@ -230,12 +222,7 @@ plt.axis( xmax=num_bmarks-1+(num_configs+2)*width, ymax=21.0 )
 
 # Add bars for each configuration
 
-rects = []
-
-for i, perf in enumerate( perf_data ):
-  if i == 4:
-    break
-  rects.append( ax.bar( ind+width*i+width, perf, width, color=colors[i] ) )
+rects = figure_style.grouped_bars( ax, ind, perf_data, width, colors )
 
 # Set tick positions
 
@@ -246,15 +233,26 @@ ax.yaxis.set_ticks_position('left')
 
 plt.axhline( y=1, color='k', linewidth=1.5 )
 
-# Cut-off lines
+# Cut-off lines, each with the configuration whose bar it cuts
+
+cutoffs = []
+cutoffs.append( ( 3, draw_cutoffs( 0.42 - 0.09, 20.6, '63', -0.2, -1.5 ) ) )
+cutoffs.append( ( 4, draw_cutoffs( 0.53 - 0.09, 20.6, '165' ) ) )
+cutoffs.append( ( 5, draw_cutoffs( 0.64 - 0.09, 20.6, '478', 0.25, -1.5 ) ) )
+cutoffs.append( ( 5, draw_cutoffs( 1.63 - 0.09, 20.6, '59' ) ) )
+cutoffs.append( ( 5, draw_cutoffs( 2.63 - 0.09, 20.6, '132' ) ) )
+cutoffs.append( ( 5, draw_cutoffs( 3.63 - 0.09, 20.6, '32' ) ) )
+
+# Slide builds reveal one configuration per step. The figure is laid
+# out as the paper shows it, stopping at cmp-tbb-avx, and every build
+# reuses that layout
 
-labels = []
-labels.append( draw_cutoffs( 0.42 - 0.09, 20.6, '63', -0.2, -1.5 ) )
-#labels.append( draw_cutoffs( 0.53 - 0.09, 20.6, '165' ) )
-#labels.append( draw_cutoffs( 0.64 - 0.09, 20.6, '478', 0.25, -1.5 ) )
-#labels.append( draw_cutoffs( 1.63 - 0.09, 20.6, '59' ) )
-#labels.append( draw_cutoffs( 2.63 - 0.09, 20.6, '132' ) )
-#labels.append( draw_cutoffs( 3.63 - 0.09, 20.6, '32' ) )
+steps = [ list( bars ) for bars in rects ]
+for i, artists in cutoffs:
+  steps[i] += artists
+
+paper_step = configs.index( 'cmp-tbb-avx' )
+figure_style.show_steps( steps, paper_step )
 
 # Legend
 
@@ -273,17 +271,14 @@ plt.tight_layout( )
 # Turn off top and right border
 
 ax.xaxis.grid(False)
-ax.spines['right'].set_visible(False)
-ax.spines['top'].set_visible(False)
-ax.xaxis.set_ticks_position('bottom')
-ax.yaxis.set_ticks_position('left')
+figure_style.despine( ax )
 
 #-------------------------------------------------------------------------
 # Generate PDF
 #-------------------------------------------------------------------------
 
-input_basename = os.path.splitext( os.path.basename(sys.argv[0]) )[0]
-output_filename = input_basename + '.py.pdf'
-plt.savefig( output_filename, #bbox_extra_artists=(legend,), #labels[1],),
-             bbox_inches='tight' )
+figure_style.save_builds( steps, bbox_inches='tight' )
+
+figure_style.savefig( #bbox_extra_artists=(legend,), #labels[1],),
+                      bbox_inches='tight' )
 
@@ -0,0 +1,154 @@
+#=========================================================================
+# figure_phases.py
+#=========================================================================
+# Phase timing for the figure scripts. Each script marks where its
+# phases begin:
+#
+#   figure_phases.mark( 'data' )        # results loaded / typed in
+#   figure_phases.mark( 'normalize' )   # speedups, perf/area, rollups
+#   figure_phases.mark( 'artists' )     # bars, scatters, labels
+#
+# and plt.tight_layout and savefig (split into its tight bbox pass,
+# render and font output) are timed as phases of their own.
+# Everything before the first mark is counted as 'import'. A phase may
+# be entered more than once (e.g. axes formatting after tight_layout is
+# more 'artists'); its times add up.
+#
+# Timing is off unless a harness calls enable() before running the
+# script (see bench_figures.py and figure_profile.py), and mark() is
+# then a single flag test. This module must not import matplotlib
+# itself, so that the import phase is measured from a clean start.
+#
+
+from __future__ import print_function
+
+import functools
+import timeit
+
+enabled = False
+hooked  = False
+
+current = None
+start   = None
+times   = {}
+order   = []
+
+#-------------------------------------------------------------------------
+# enable
+#-------------------------------------------------------------------------
+# Starts timing with the 'import' phase. Call right before running the
+# script.
+
+def enable():
+  global enabled, current, start
+  times.clear()
+  del order[:]
+  enabled = True
+  current = 'import'
+  start   = timeit.default_timer()
+
+def switch( name ):
+  global current, start
+  now = timeit.default_timer()
+  if current not in times:
+    times[current] = 0.0
+    order.append( current )
+  times[current] += now - start
+  current, start = name, now
+
+def mark( name ):
+  if not enabled:
+    return
+  if not hooked:
+    hook()
+  switch( name )
+
+#-------------------------------------------------------------------------
+# hook
+#-------------------------------------------------------------------------
+# Times tight_layout and savefig as phases of their own, and splits
+# savefig into the bbox_inches='tight' layout pass (savefig.tight_bbox),
+# the real render (savefig.render) and the PDF font dictionaries and
+# embedding (savefig.fonts). Installed at the first mark, by which
+# point the script has imported pyplot.
+#
+# A sub-phase is only entered from its parent, so e.g. the throwaway
+# print in the tight pass counts as tight_bbox and not as render. Each
+# phase's time excludes its sub-phases.
+
+def timed( name, func, parent=None ):
+  @functools.wraps( func )
+  def wrapper( *args, **kwargs ):
+    if not enabled or ( parent is not None and current != parent ):
+      return func( *args, **kwargs )
+    previous = current
+    switch( name )
+    try:
+      return func( *args, **kwargs )
+    finally:
+      switch( previous )
+  return wrapper
+
+# Older matplotlib runs the tight pass as a dry-run print
+
+def timed_print( func ):
+  tight  = timed( 'savefig.tight_bbox', func, 'savefig' )
+  render = timed( 'savefig.render', func, 'savefig' )
+  @functools.wraps( func )
+  def wrapper( *args, **kwargs ):
+    if kwargs.get( 'dryrun' ):
+      return tight( *args, **kwargs )
+    return render( *args, **kwargs )
+  return wrapper
+
+def hook():
+  global hooked
+  hooked = True
+
+  import matplotlib.pyplot as plt
+  from matplotlib import backend_bases
+  from matplotlib.backends import backend_agg, backend_pdf
+  from matplotlib.figure import Figure
+
+  plt.tight_layout = timed( 'tight_layout', plt.tight_layout )
+  Figure.savefig   = timed( 'savefig', Figure.savefig )
+
+  # Newer matplotlib gets the renderer for the tight pass by starting a
+  # print and then draws with drawing disabled; both happen directly
+  # under savefig, whereas the real draw happens inside the print
+
+  if hasattr( backend_bases, '_get_renderer' ):
+    backend_bases._get_renderer = \
+      timed( 'savefig.tight_bbox', backend_bases._get_renderer, 'savefig' )
+  Figure.draw = timed( 'savefig.tight_bbox', Figure.draw, 'savefig' )
+  Figure.get_tightbbox = \
+    timed( 'savefig.tight_bbox', Figure.get_tightbbox, 'savefig' )
+
+  backend_pdf.FigureCanvasPdf.print_pdf = \
+    timed_print( backend_pdf.FigureCanvasPdf.print_pdf )
+  backend_agg.FigureCanvasAgg.print_png = \
+    timed_print( backend_agg.FigureCanvasAgg.print_png )
+
+  backend_pdf.PdfFile.writeFonts = \
+    timed( 'savefig.fonts', backend_pdf.PdfFile.writeFonts, 'savefig.render' )
+
+#-------------------------------------------------------------------------
+# finish
+#-------------------------------------------------------------------------
+# Stops timing and returns [ ( phase, seconds ) ] in first-entered order.
+
+def finish():
+  global enabled
+  if enabled:
+    switch( None )
+    enabled = False
+  return [ ( name, times[name] ) for name in order if name is not None ]
+
+def format_table( phases ):
+  total = sum( seconds for _, seconds in phases ) or 1.0
+  lines = []
+  for name, seconds in phases:
+    lines.append( "  {:<18} {:8.3f}s {:5.1f}%"
+                  .format( name, seconds, 100.0 * seconds / total ) )
+  lines.append( "  {:<18} {:8.3f}s".format( 'total', total ) )
+  return '\n'.join( lines )
@@ -0,0 +1,102 @@
+#=========================================================================
+# figure_profile.py
+#=========================================================================
+# Opt-in profiling of the figure scripts. Set FIGURE_PROFILE to an
+# output directory (or to 1 for code/.build/profile) and every script,
+# run directly or through build_figures.py, is profiled under cProfile
+# with its phases timed (see figure_phases.py). For each script it
+# writes:
+#
+#   <script>.prof     cProfile stats, for pstats, snakeviz or gprof2dot
+#   <script>.folded   phase times as folded stacks for flamegraph.pl
+#
+# and prints the per-phase table to stderr, which separates the energy
+# rollup, tight_layout, the bbox_inches='tight' layout pass, the render
+# and the PDF font output:
+#
+#   % FIGURE_PROFILE=1 python fig-evaluation-ebreak-time.py
+#   % FIGURE_PROFILE=/tmp/prof python build_figures.py --force
+#
+# Phase times include the profiler's overhead; use bench_figures.py for
+# clean timings. When FIGURE_PROFILE is unset nothing is installed and
+# the scripts' phase marks are a flag test.
+#
+
+from __future__ import print_function
+
+import atexit
+import cProfile
+import os
+import sys
+
+import figure_phases
+
+code_dir    = os.path.dirname( os.path.abspath( __file__ ) )
+default_dir = os.path.join( code_dir, '.build', 'profile' )
+
+profiler = None
+script   = None
+
+def requested():
+  return bool( os.environ.get( 'FIGURE_PROFILE' ) )
+
+def output_dir():
+  value = os.environ.get( 'FIGURE_PROFILE' )
+  return default_dir if value in [ None, '', '1' ] else value
+
+#-------------------------------------------------------------------------
+# start and stop
+#-------------------------------------------------------------------------
+
+def start( path ):
+  global profiler, script
+  if profiler is not None:
+    return
+  script = path
+  if not figure_phases.enabled:
+    figure_phases.enable()
+  profiler = cProfile.Profile()
+  profiler.enable()
+
+# Writes the profile and the folded phase stacks and prints the table.
+# Returns the [ ( phase, seconds ) ] list.
+
+def stop():
+  global profiler
+  if profiler is None:
+    return []
+  profiler.disable()
+  phases = figure_phases.finish()
+
+  name = os.path.basename( script )
+  outdir = output_dir()
+  if not os.path.isdir( outdir ):
+    os.makedirs( outdir )
+
+  profiler.dump_stats( os.path.join( outdir, name + '.prof' ) )
+  profiler = None
+
+  with open( os.path.join( outdir, name + '.folded' ), 'w' ) as f:
+    for phase, seconds in phases:
+      stack = ';'.join( [ name ] + phase.split( '.' ) )
+      f.write( "{} {}\n".format( stack, int( round( seconds * 1e6 ) ) ) )
+
+  print( "{} phases (profile in {}):".format( name, outdir ), file=sys.stderr )
+  print( figure_phases.format_table( phases ), file=sys.stderr )
+  return phases
+
+#-------------------------------------------------------------------------
+# start_from_env
+#-------------------------------------------------------------------------
+# Called by figure_style on import. Only figure scripts run directly are
+# started here; drivers like build_figures start and stop each script
+# they run themselves.
+
+def start_from_env():
+  if not requested() or profiler is not None:
+    return
+  path = sys.argv[0] if sys.argv else ''
+  if '-' not in os.path.basename( path ):
+    return
+  start( path )
+  atexit.register( stop )
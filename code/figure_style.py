@@ -0,0 +1,406 @@
+#=========================================================================
+# figure_style.py
+#=========================================================================
+# Shared matplotlib setup for the figure scripts: the rcParams every
+# figure uses (Times from the PDF core fonts), the figure size, the
+# axes cleanup, the grouped bar, stacked bar, scatter and frontier
+# plots the scripts draw with, and the progressive slide builds.
+#
+# Import it before pyplot. Unless a backend has already been chosen it
+# selects the headless Agg backend, so pyplot never goes looking for a
+# GUI toolkit; the scripts only ever write files. It also installs the
+# on-disk font metric and text extent cache (see font_cache.py), and
+# starts profiling when FIGURE_PROFILE is set (see figure_profile.py).
+#
+#   import figure_style
+#   import matplotlib.pyplot as plt
+#
+#   figure_style.configure( 7.8, 0.5, font_size=16 )
+#   ...
+#   figure_style.savefig( bbox_inches='tight' )
+#
+
+import io
+import os
+import sys
+
+import figure_profile
+
+figure_profile.start_from_env()
+
+import matplotlib
+
+if 'matplotlib.pyplot' not in sys.modules and 'MPLBACKEND' not in os.environ:
+  matplotlib.use( 'Agg' )
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from matplotlib.collections import PolyCollection
+from matplotlib.patches   import Rectangle
+
+import font_cache
+
+font_cache.install()
+
+#-------------------------------------------------------------------------
+# configure
+#-------------------------------------------------------------------------
+# Type-1 Times from the 14 PDF core fonts, so nothing is embedded and
+# the text matches the paper.
+
+rc = {
+  'pdf.use14corefonts' : True,
+  'font.family'        : 'serif',
+  'font.serif'         : [ 'Times' ],
+}
+
+# Applies the shared rcParams for a figure fig_width inches wide and
+# returns the [ width, height ] figure size.
+
+def configure( fig_width, aspect_ratio, font_size=16 ):
+  fig_size = [ fig_width, fig_width * aspect_ratio ]
+
+  plt.rcParams.update( rc )
+  plt.rcParams['font.size']      = font_size
+  plt.rcParams['figure.figsize'] = fig_size
+
+  return fig_size
+
+#-------------------------------------------------------------------------
+# Axes helpers
+#-------------------------------------------------------------------------
+
+# Invisible axes spanning the whole figure, used to hang the shared
+# axis labels and legend of a row of subplots
+
+def label_axes( fig ):
+  full_ax = fig.add_subplot( 111 )
+  full_ax.spines['top'].set_color( 'none' )
+  full_ax.spines['bottom'].set_color( 'none' )
+  full_ax.spines['left'].set_color( 'none' )
+  full_ax.spines['right'].set_color( 'none' )
+  full_ax.set_axis_bgcolor( 'none' )
+  full_ax.tick_params(
+    labelcolor='none', top='off', bottom='off', left='off', right='off' )
+  return full_ax
+
+# Major and minor grid lines drawn behind the data
+
+def grid_axes( ax ):
+  ax.grid(b=True, which='major')
+  ax.grid(b=True, which='minor')
+  ax.set_axisbelow(True)
+
+# Turn off top and right border
+
+def despine( ax ):
+  ax.spines['right'].set_visible(False)
+  ax.spines['top'].set_visible(False)
+  ax.xaxis.set_ticks_position('bottom')
+  ax.yaxis.set_ticks_position('left')
+
+#-------------------------------------------------------------------------
+# Plot helpers
+#-------------------------------------------------------------------------
+
+# One bar per entry of each data row, rows side by side within a group.
+# Returns the bar container of each row for the legend.
+
+def grouped_bars( ax, ind, data, width, colors ):
+  rects = []
+  for i, values in enumerate( data ):
+    rects.append( ax.bar( ind+width*i+width, values, width, color=colors[i] ) )
+  return rects
+
+# Where ax.bar puts x by default: the left edge before matplotlib 2.0,
+# the center since
+
+def bar_align():
+  return 'edge' if int( matplotlib.__version__.split( '.' )[0] ) < 2 else 'center'
+
+# Width a patch is stroked with: none when its edge is invisible, as
+# Patch.draw does. Agg snaps a path to pixel centers or pixel edges by
+# its stroke width, so the bars must draw at the width a Rectangle
+# would to land on the same pixels.
+
+def patch_linewidth( patch ):
+  if patch.get_edgecolor()[3] == 0 or patch.get_linestyle() in [ 'None', 'none' ]:
+    return 0.0
+  return patch.get_linewidth()
+
+# Layers stacked bottom to top at x, given as a (layer x bar) matrix.
+# The offsets are accumulated in one cumsum and each layer is drawn as a
+# single PolyCollection of rectangles rather than one Rectangle artist
+# per bar, so large breakdowns stay a handful of artists. The bars are
+# placed, edged and autoscaled as ax.bar would place them, and snapped
+# to whole pixels without antialiasing so no layer gets a soft edge.
+# Returns the collection of each layer for the legend.
+
+def stacked_bars( ax, x, layers, width, colors ):
+  x = np.asarray( x, dtype=np.float64 )
+  layers = np.asarray( layers, dtype=np.float64 ).reshape( -1, len( x ) )
+  tops = np.cumsum( layers, axis=0 )
+  bottoms = np.vstack( [ np.zeros( ( 1, len( x ) ) ), tops[:-1] ] )
+
+  left = x - width / 2.0 if bar_align() == 'center' else x
+  right = left + width
+
+  collections = []
+  for bottom, top, color in zip( bottoms, tops, colors ):
+    verts = np.stack( [ np.stack( [ left, bottom ], axis=-1 ),
+                        np.stack( [ left, top ], axis=-1 ),
+                        np.stack( [ right, top ], axis=-1 ),
+                        np.stack( [ right, bottom ], axis=-1 ) ], axis=1 )
+    patch = Rectangle( ( 0, 0 ), 1, 1, facecolor=color )
+    collection = PolyCollection(
+      verts, facecolors=[ patch.get_facecolor() ],
+      edgecolors=[ patch.get_edgecolor() ], linewidths=patch_linewidth( patch ),
+      antialiaseds=False, snap=True )
+    if hasattr( collection, 'sticky_edges' ):
+      collection.sticky_edges.y.append( 0 )
+    ax.add_collection( collection, autolim=True )
+    collections.append( collection )
+
+  ax.autoscale_view()
+  return collections
+
+# One marker per ( x, y ) point, drawn as one collection per marker
+# style rather than one per point, so thousands of points cost a few
+# artists. Collections with more than rasterize_above points are
+# rasterized inside the vector output. Returns the collections; the
+# legend takes its entries from legend_handles.
+
+def scatter_points( ax, xs, ys, markers, colors, s=50, rasterize_above=2000 ):
+  xs, ys = np.asarray( xs ), np.asarray( ys )
+  markers = list( markers )[:len( xs )]
+  colors  = list( colors )[:len( xs )]
+
+  collections = []
+  for marker in sorted( set( markers ), key=markers.index ):
+    idx = [ i for i, m in enumerate( markers ) if m == marker ]
+    collections.append( ax.scatter(
+      xs[idx], ys[idx], marker=marker, c=[ colors[i] for i in idx ], s=s,
+      rasterized=len( idx ) > rasterize_above ) )
+  return collections
+
+# Legend handles drawn like scatter_points' markers, one per entry of
+# markers and colors (e.g. one per config family). They are empty
+# scatters on a scratch Axes that is never added to the figure, as a
+# scatter on any of the figure's axes, even removed again, would have
+# autoscaled it and moved the layout.
+
+def legend_handles( ax, markers, colors, s=50 ):
+  scratch = matplotlib.axes.Axes( ax.figure, [ 0, 0, 1, 1 ] )
+  return [ scratch.scatter( [], [], marker=marker, c=color, s=s )
+           for marker, color in zip( markers, colors ) ]
+
+# Pareto frontier of the points ( xs, ys ) through the optimal positions
+# (see pareto.py), drawn as the staircase bounding the dominated region.
+# Sweeps with more than max_points points also get a density of all the
+# points underneath, as individual markers would only be a smear.
+
+def frontier_plot( ax, xs, ys, optimal, color='#999999', max_points=1000 ):
+  xs, ys = np.asarray( xs ), np.asarray( ys )
+  if len( xs ) > max_points:
+    ax.hexbin( xs, ys, gridsize=60, cmap='Greys', mincnt=1, linewidths=0,
+               zorder=0 )
+  return ax.step( xs[optimal], ys[optimal], where='pre', c=color, zorder=1 )
+
+#-------------------------------------------------------------------------
+# Output
+#-------------------------------------------------------------------------
+# Figures are written next to the script as <script>.py.<ext>, in each
+# of the formats listed (comma-separated) in FIGURE_FORMATS, by default
+# just pdf: pdf for the thesis, png for the decks, svg for the web.
+#
+#   % FIGURE_FORMATS=pdf,png,svg python build_figures.py
+#
+# The figure is laid out once, and measured once per kind of text
+# metrics: the PDF and PostScript backends measure the core fonts with
+# their AFM files, Agg measures text for every raster format at the
+# output DPI, and the other backends (e.g. SVG) measure it their own
+# way, and they disagree by a few points. The tight bounding box of
+# each kind is measured up front on its backend's renderer, without
+# rendering anything, and every format is then saved cropped to its
+# kind's box, so none pays for the extra draw savefig makes to measure
+# it. They are written concurrently, each in a forked copy of the
+# process holding the finished figure.
+# FIGURE_EXPORT=separate saves each format with its own plt.savefig
+# instead, as the scripts used to (see bench_figures.py --export).
+
+def output_filename( ext='pdf' ):
+  input_basename = os.path.splitext( os.path.basename( sys.argv[0] ) )[0]
+  return input_basename + '.py.' + ext
+
+def output_formats():
+  value = os.environ.get( 'FIGURE_FORMATS' ) or 'pdf'
+  return [ ext.strip().lower() for ext in value.split( ',' ) if ext.strip() ]
+
+def savefig( **kwargs ):
+  formats = output_formats()
+  if len( formats ) == 1 or os.environ.get( 'FIGURE_EXPORT' ) == 'separate':
+    for ext in formats:
+      plt.savefig( output_filename( ext ), **kwargs )
+  else:
+    export( plt.gcf(), output_filename, formats, **kwargs )
+
+# Measures the tight bounding box savefig would crop fig to when saving
+# it as ext, in inches, without saving it: savefig runs to the point
+# where it asks the figure for its tight bbox on that backend's
+# renderer, which is recorded and then cut short before anything is
+# rendered. Older savefigs set up the dpi, colors and canvas outside
+# their cleanup, so those are put back here.
+
+class _Measured( Exception ):
+  pass
+
+def tight_bbox( fig, ext, **kwargs ):
+  measured = []
+  get_tightbbox = fig.get_tightbbox
+
+  def record( *args, **kw ):
+    measured.append( get_tightbbox( *args, **kw ) )
+    raise _Measured()
+
+  canvas, dpi = fig.canvas, fig.dpi
+  facecolor, edgecolor = fig.get_facecolor(), fig.get_edgecolor()
+  fig.get_tightbbox = record
+  try:
+    fig.savefig( io.BytesIO(), format=ext, **kwargs )
+  except _Measured:
+    pass
+  finally:
+    del fig.get_tightbbox
+    fig.set_canvas( canvas )
+    fig.dpi = dpi
+    fig.set_facecolor( facecolor )
+    fig.set_edgecolor( edgecolor )
+
+  pad = kwargs.get( 'pad_inches' )
+  if pad is None:
+    pad = plt.rcParams['savefig.pad_inches']
+  return measured[-1].padded( pad )
+
+# Runs each ( name, func ) job, all but the last in forked children and
+# the last in this process meanwhile, then waits for the children. They
+# leave with os._exit, so this process's atexit handlers (the profile
+# dump, the font cache save) only ever run here. Without fork the jobs
+# run one after another.
+
+def run_forked( jobs ):
+  if not hasattr( os, 'fork' ):
+    for name, func in jobs:
+      func()
+    return
+
+  sys.stdout.flush()
+  sys.stderr.flush()
+
+  children = []
+  for name, func in jobs[:-1]:
+    pid = os.fork()
+    if pid == 0:
+      status = 0
+      try:
+        func()
+      except BaseException:
+        import traceback
+        traceback.print_exc()
+        status = 1
+      sys.stdout.flush()
+      sys.stderr.flush()
+      os._exit( status )
+    children.append( ( name, pid ) )
+
+  try:
+    if jobs:
+      jobs[-1][1]()
+  finally:
+    failed = []
+    for name, pid in children:
+      if os.waitpid( pid, 0 )[1] != 0:
+        failed.append( name )
+
+  if failed:
+    raise RuntimeError( "failed to write {}".format( ', '.join( failed ) ) )
+
+# Which text metrics the backend for ext lays text out with
+
+raster_formats = [ 'png', 'jpg', 'jpeg', 'tif', 'tiff', 'raw', 'rgba' ]
+
+def text_metrics( ext ):
+  if ext == 'pdf' and plt.rcParams['pdf.use14corefonts']:
+    return 'afm'
+  if ext in [ 'ps', 'eps' ] and plt.rcParams['ps.useafm']:
+    return 'afm'
+  if ext in raster_formats:
+    return 'agg'
+  return ext
+
+# Writes fig as filename( ext ) for each of formats. A tight bounding
+# box is measured with the first format of each kind of text metrics,
+# unless bboxes (kind to bbox, as returned) already has it, and then
+# every format is written concurrently. Returns bboxes with the ones
+# measured added.
+
+def export( fig, filename, formats, bboxes=None, **kwargs ):
+  bboxes = {} if bboxes is None else bboxes
+  tight = kwargs.get( 'bbox_inches' ) == 'tight'
+
+  if tight:
+    for ext in formats:
+      if text_metrics( ext ) not in bboxes:
+        bboxes[ text_metrics( ext ) ] = tight_bbox( fig, ext, **kwargs )
+
+  def job( ext ):
+    options = dict( kwargs )
+    if tight:
+      options['bbox_inches'] = bboxes[ text_metrics( ext ) ]
+    return ( filename( ext ), lambda: fig.savefig( filename( ext ), **options ) )
+
+  run_forked( [ job( ext ) for ext in formats ] )
+  return bboxes
+
+#-------------------------------------------------------------------------
+# Slide builds
+#-------------------------------------------------------------------------
+# A progressive reveal of one figure for the talks, written as
+# <script>-<step>.py.<ext> in each output format. steps is a list of
+# lists of artists, and build k shows the artists of steps 0 to k and
+# hides the rest. The figure is laid out once: the last (complete)
+# build is saved first and the tight bounding boxes measured
+# for it (one per kind of text metrics, see export) are reused for
+# every other build, so the page size, ticks and legend sit exactly
+# alike in all of them and no build pays for another tight bbox pass.
+#
+#   steps = [ list( bars ) for bars in rects ]
+#   figure_style.save_builds( steps, bbox_inches='tight' )
+
+def build_filename( step, ext='pdf' ):
+  input_basename = os.path.splitext( os.path.basename( sys.argv[0] ) )[0]
+  return '{}-{}.py.{}'.format( input_basename, step, ext )
+
+def show_steps( steps, last ):
+  for i, artists in enumerate( steps ):
+    for artist in artists:
+      artist.set_visible( i <= last )
+
+def save_builds( steps, fig=None, **kwargs ):
+  fig = fig or plt.gcf()
+  formats = output_formats()
+  shown = [ [ a.get_visible() for a in artists ] for artists in steps ]
+
+  last = len( steps ) - 1
+  show_steps( steps, last )
+  bboxes = export( fig, lambda ext: build_filename( last, ext ), formats,
+                   **kwargs )
+
+  for step in range( last ):
+    show_steps( steps, step )
+    export( fig, lambda ext: build_filename( step, ext ), formats, bboxes,
+            **kwargs )
+
+  for artists, visible in zip( steps, shown ):
+    for artist, v in zip( artists, visible ):
+      artist.set_visible( v )
@@ -0,0 +1,338 @@
+#=========================================================================
+# font_cache.py
+#=========================================================================
+# On-disk cache of the font work matplotlib otherwise redoes in every
+# process: the parsed AFM metrics of the PDF core fonts, the result of
+# each font lookup, and the extent of every piece of text the renderers
+# lay out (tick labels, titles, legend entries). A script's second and
+# later runs, and every build worker after the first, read these back
+# instead of parsing AFM files, scoring the font list and measuring the
+# same rotated tick labels again.
+#
+# figure_style installs the cache, so every figure script uses it:
+#
+#   font_cache.install()   # patch matplotlib, load code/.build/fonts
+#   font_cache.save()      # merge new entries back to disk
+#
+# Entries are keyed on everything the result depends on (font
+# properties, the font rcParams, renderer and dpi), and the whole cache
+# is dropped when the matplotlib version or the installed font list
+# changes. Run as a script to show or clear it:
+#
+#   % python font_cache.py [--clear]
+#
+
+from __future__ import print_function
+
+import argparse
+import atexit
+import hashlib
+import os
+import pickle
+import sys
+
+# FIGURE_FONT_CACHE points the cache elsewhere, e.g. at an empty
+# directory to time a cold run (see bench_figures.py)
+
+code_dir  = os.path.dirname( os.path.abspath( __file__ ) )
+cache_dir = os.environ.get( 'FIGURE_FONT_CACHE' ) or \
+            os.path.join( code_dir, '.build', 'fonts' )
+
+cache_filename = 'fonts.pickle'
+
+# rcParams that change which font a lookup resolves to, and those that
+# change the size of laid out text
+
+font_rc = [
+  'font.family',
+  'font.serif',
+  'font.sans-serif',
+  'font.cursive',
+  'font.fantasy',
+  'font.monospace',
+]
+
+text_rc = font_rc + [
+  'pdf.use14corefonts',
+  'ps.useafm',
+  'text.hinting',
+  'text.hinting_factor',
+  'text.kerning_factor',
+  'mathtext.fontset',
+  'mathtext.default',
+]
+
+# In-memory state. fonts maps lookup keys to font paths and extents maps
+# text keys to ( width, height, descent ); new holds the keys added
+# since the cache was loaded so save only has to merge those.
+
+installed = False
+stamp     = None
+rc_params = None
+fonts     = {}
+extents   = {}
+new       = { 'fonts' : set(), 'extents' : set() }
+
+#-------------------------------------------------------------------------
+# Keys
+#-------------------------------------------------------------------------
+
+# Reads the raw values, skipping RcParams' per-item validation
+
+def rc_key( names ):
+  key = []
+  for name in names:
+    value = dict.get( rc_params, name )
+    key.append( tuple( value ) if isinstance( value, list ) else value )
+  return tuple( key )
+
+def prop_key( prop ):
+  return ( tuple( prop.get_family() ), prop.get_style(), prop.get_variant(),
+           prop.get_weight(), prop.get_stretch(), prop.get_size_in_points(),
+           str( prop.get_file() ) )
+
+# Identifies the matplotlib install and font list the cache was built
+# against
+
+def environment_stamp():
+  import matplotlib
+  from matplotlib import font_manager
+  h = hashlib.sha1()
+  h.update( matplotlib.__version__.encode( 'utf-8' ) )
+  h.update( repr( sys.version_info[:2] ).encode( 'utf-8' ) )
+  manager = font_manager.fontManager
+  for entries in [ manager.ttflist, manager.afmlist ]:
+    for fname in sorted( str( font.fname ) for font in entries ):
+      h.update( fname.encode( 'utf-8' ) )
+  return h.hexdigest()
+
+#-------------------------------------------------------------------------
+# Load and save
+#-------------------------------------------------------------------------
+
+def read_cache( filename ):
+  try:
+    with open( filename, 'rb' ) as f:
+      data = pickle.load( f )
+  except Exception:
+    return None
+  if not isinstance( data, dict ) or data.get( 'stamp' ) != stamp:
+    return None
+  return data
+
+def write_pickle( filename, data ):
+  if not os.path.isdir( cache_dir ):
+    os.makedirs( cache_dir )
+  tmp = '{}.{}.tmp'.format( filename, os.getpid() )
+  with open( tmp, 'wb' ) as f:
+    pickle.dump( data, f, 2 )
+  os.rename( tmp, filename )
+
+# Newer matplotlib returns font paths as a str subclass carrying a face
+# index, which does not survive pickling; it is stored as a tuple
+
+def pack_lookup( lookup ):
+  found, value = lookup
+  face = getattr( value, 'face_index', None )
+  if not found or face is None:
+    return ( found, str( value ), None, None )
+  return ( found, str( value ), type( value ), face )
+
+def unpack_lookup( packed ):
+  found, value, path_class, face = packed
+  if path_class is not None:
+    value = path_class( value, face )
+  return ( found, value )
+
+def load():
+  data = read_cache( os.path.join( cache_dir, cache_filename ) )
+  if data is not None:
+    for key, packed in data['fonts'].items():
+      fonts[key] = unpack_lookup( packed )
+    extents.update( data['extents'] )
+
+# Merges the entries added by this process into the file on disk, so
+# concurrent build workers each contribute what they measured
+
+def save():
+  if not installed or not ( new['fonts'] or new['extents'] ):
+    return
+  filename = os.path.join( cache_dir, cache_filename )
+  data = read_cache( filename ) or \
+    { 'stamp' : stamp, 'fonts' : {}, 'extents' : {} }
+  for key in new['fonts']:
+    data['fonts'][key] = pack_lookup( fonts[key] )
+  for key in new['extents']:
+    data['extents'][key] = extents[key]
+  try:
+    write_pickle( filename, data )
+  except ( IOError, OSError ):
+    return
+  new['fonts'].clear()
+  new['extents'].clear()
+
+#-------------------------------------------------------------------------
+# AFM metrics
+#-------------------------------------------------------------------------
+# Each parsed AFM file is pickled next to the cache, named after the
+# file's path, size and mtime.
+
+def afm_filename( fname ):
+  st = os.stat( fname )
+  key = repr( ( os.path.abspath( fname ), st.st_size, st.st_mtime, stamp ) )
+  digest = hashlib.sha1( key.encode( 'utf-8' ) ).hexdigest()
+  return os.path.join( cache_dir, 'afm-' + digest + '.pickle' )
+
+afm_fonts = {}
+
+def load_afm( fname, parse ):
+  if fname in afm_fonts:
+    return afm_fonts[fname]
+
+  filename = afm_filename( fname )
+  try:
+    with open( filename, 'rb' ) as f:
+      font = pickle.load( f )
+  except Exception:
+    font = parse( fname )
+    try:
+      write_pickle( filename, font )
+    except ( IOError, OSError, pickle.PicklingError ):
+      pass
+
+  afm_fonts[fname] = font
+  return font
+
+#-------------------------------------------------------------------------
+# Wrappers
+#-------------------------------------------------------------------------
+
+# Font lookups, including the ones that fail (e.g. Times has no TrueType
+# file on most machines) so the warning path is not rescored each run
+
+def cached_findfont( findfont ):
+  from matplotlib import font_manager
+  def wrapper( prop, fontext='ttf', directory=None, fallback_to_default=True,
+               rebuild_if_missing=True ):
+    if not isinstance( prop, font_manager.FontProperties ):
+      return findfont( prop, fontext, directory, fallback_to_default,
+                       rebuild_if_missing )
+
+    key = ( prop_key( prop ), fontext, directory, fallback_to_default,
+            rc_key( font_rc ) )
+    if key not in fonts:
+      try:
+        fonts[key] = ( True, findfont( prop, fontext, directory,
+                                       fallback_to_default,
+                                       rebuild_if_missing ) )
+      except ValueError as e:
+        fonts[key] = ( False, str( e ) )
+      new['fonts'].add( key )
+
+    found, value = fonts[key]
+    if not found:
+      raise ValueError( value )
+    return value
+  return wrapper
+
+# Text extents, per renderer class and dpi. Usetex text depends on the
+# external TeX install and is left alone.
+
+def cached_extent( method ):
+  def get_text_width_height_descent( self, s, prop, ismath ):
+    if ismath == 'TeX':
+      return method( self, s, prop, ismath )
+
+    key = ( type( self ).__name__, getattr( self, 'dpi', None ), s,
+            bool( ismath ), prop_key( prop ), rc_key( text_rc ) )
+    value = extents.get( key )
+    if value is None:
+      value = tuple( float( v ) for v in method( self, s, prop, ismath ) )
+      extents[key] = value
+      new['extents'].add( key )
+    return value
+  return get_text_width_height_descent
+
+#-------------------------------------------------------------------------
+# install
+#-------------------------------------------------------------------------
+# Patches matplotlib to go through the cache. Safe to call repeatedly.
+# Saves on exit for standalone scripts; pool workers exit without
+# running atexit handlers, so the figure build saves after each script.
+
+def install():
+  global installed, stamp, rc_params
+  if installed:
+    return
+
+  import matplotlib
+  from matplotlib import font_manager
+  from matplotlib.backends import backend_agg, backend_pdf
+
+  rc_params = matplotlib.rcParams
+
+  stamp = environment_stamp()
+  load()
+
+  findfont = cached_findfont( font_manager.fontManager.findfont )
+  font_manager.fontManager.findfont = findfont
+  font_manager.findfont = findfont
+
+  # Renderers look up core font metrics through a memoized helper in
+  # newer matplotlib; the PDF writer (and older renderers) call the AFM
+  # class on an open file
+
+  try:
+    from matplotlib.backends import _backend_pdf_ps
+    parse = _backend_pdf_ps._cached_get_afm_from_fname
+    _backend_pdf_ps._cached_get_afm_from_fname = \
+      lambda fname: load_afm( fname, parse )
+  except ( ImportError, AttributeError ):
+    pass
+
+  if hasattr( backend_pdf, 'AFM' ):
+    afm_class = backend_pdf.AFM
+    def parse_file( fname ):
+      with open( fname, 'rb' ) as fh:
+        return afm_class( fh )
+    backend_pdf.AFM = lambda fh: load_afm( fh.name, parse_file )
+
+  for renderer in [ backend_agg.RendererAgg, backend_pdf.RendererPdf ]:
+    method = renderer.__dict__.get( 'get_text_width_height_descent' )
+    if method is None:
+      method = renderer.get_text_width_height_descent
+    renderer.get_text_width_height_descent = cached_extent( method )
+
+  installed = True
+  atexit.register( save )
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description='Show or clear the font cache.' )
+  p.add_argument( '--clear', action='store_true', help='delete the cache' )
+  opts = p.parse_args( argv )
+
+  if opts.clear:
+    if os.path.isdir( cache_dir ):
+      for name in os.listdir( cache_dir ):
+        os.remove( os.path.join( cache_dir, name ) )
+    return 0
+
+  global stamp
+  stamp = environment_stamp()
+  data = read_cache( os.path.join( cache_dir, cache_filename ) )
+  afms = [ n for n in os.listdir( cache_dir ) if n.startswith( 'afm-' ) ] \
+         if os.path.isdir( cache_dir ) else []
+
+  if data is None:
+    print( "no font cache for this matplotlib install" )
+  else:
+    print( "{} font lookups, {} text extents, {} AFM files"
+           .format( len( data['fonts'] ), len( data['extents'] ), len( afms ) ) )
+  return 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
@@ -0,0 +1,278 @@
+#=========================================================================
+# gem5_stats.py
+#=========================================================================
+# Streaming ingester for gem5 stats.txt dumps. Each file is read a line
+# at a time and only the requested counters are kept, so memory stays
+# bounded no matter how large the dump is. Files are parsed in parallel
+# across cores and the results are merged into a results store (see
+# results_store.py) that the figure scripts read.
+#
+# Counters map a store metric to the gem5 stats summed to produce it.
+# Stat names may use shell wildcards, and a counter may scale its sum
+# (e.g. by a per-access energy) to produce an energy directly:
+#
+#   {
+#     "cycles"           : [ "system.cpu.numCycles" ],
+#     "accesses.rob"     : [ "system.cpu.rob.rob_reads",
+#                            "system.cpu.rob.rob_writes" ],
+#     "energy.icache_rd" : { "stats" : [ "system.cpu.icache.ReadReq_accesses::total" ],
+#                            "scale" : 20.3 }
+#   }
+#
+# The runs to ingest are listed in a manifest, one per line:
+#
+#   # benchmark  config        stats file
+#   bilateral    LTA-8/4x4/2   runs/bilateral-8-4x4-2/stats.txt
+#
+#   % python gem5_stats.py --store perf --counters counters.json runs.txt
+#
+
+from __future__ import print_function
+
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import re
+import sys
+
+import results_store
+
+begin_marker = '---------- Begin Simulation Statistics'
+
+#-------------------------------------------------------------------------
+# Default counters
+#-------------------------------------------------------------------------
+# Cycle counts plus the gem5 access counts behind the McPAT component
+# energies: the classic core structures, and the LTA's own structures
+# (the tpa-* components of the energy breakdowns). The LTA core keeps
+# one of each per lane group, so their stats are summed by pattern.
+
+default_counters = {
+  'cycles'                : [ 'system.cpu.numCycles' ],
+  'accesses.icache_rd'    : [ 'system.cpu.icache.ReadReq_accesses::total' ],
+  'accesses.dcache_rd'    : [ 'system.cpu.dcache.ReadReq_accesses::total' ],
+  'accesses.dcache_wr'    : [ 'system.cpu.dcache.WriteReq_accesses::total' ],
+  'accesses.l2cache'      : [ 'system.l2.overall_accesses::total' ],
+  'accesses.regfile_rd'   : [ 'system.cpu.int_regfile_reads',
+                              'system.cpu.fp_regfile_reads' ],
+  'accesses.regfile_wr'   : [ 'system.cpu.int_regfile_writes',
+                              'system.cpu.fp_regfile_writes' ],
+  'accesses.rename'       : [ 'system.cpu.rename.RenameLookups' ],
+  'accesses.rob'          : [ 'system.cpu.rob.rob_reads',
+                              'system.cpu.rob.rob_writes' ],
+  'accesses.iq'           : [ 'system.cpu.iq.int_inst_queue_reads',
+                              'system.cpu.iq.int_inst_queue_writes',
+                              'system.cpu.iq.fp_inst_queue_reads',
+                              'system.cpu.iq.fp_inst_queue_writes' ],
+  'accesses.bpred'        : [ 'system.cpu.branchPred.lookups' ],
+  'accesses.tpa-l0'       : [ 'system.cpu.l0*.accesses' ],
+  'accesses.tpa-tmu'      : [ 'system.cpu.tmu*.accesses' ],
+  'accesses.tpa-pvfb'     : [ 'system.cpu.pvfb*.reads',
+                              'system.cpu.pvfb*.writes' ],
+  'accesses.tpa-rt'       : [ 'system.cpu.rt*.reads',
+                              'system.cpu.rt*.writes' ],
+  'accesses.tpa-dataq'    : [ 'system.cpu.dataq*.reads',
+                              'system.cpu.dataq*.writes' ],
+}
+
+#-------------------------------------------------------------------------
+# CounterSpec
+#-------------------------------------------------------------------------
+# Compiled form of a counters dictionary. Exact stat names are matched
+# with a set lookup on the first token of each line; wildcard names are
+# folded into one regex that screens every line before the patterns are
+# tried one by one, so a stat can count towards metrics both ways.
+
+class CounterSpec( object ):
+
+  def __init__( self, counters ):
+    self.metrics = sorted( counters )
+    self.scale   = {}
+    self.exact   = {}
+    self.globs   = []
+
+    for metric in self.metrics:
+      spec = counters[metric]
+      if isinstance( spec, dict ):
+        stats = spec['stats']
+        self.scale[metric] = float( spec.get( 'scale', 1.0 ) )
+      else:
+        stats = spec
+        self.scale[metric] = 1.0
+      for stat in stats:
+        if any( c in stat for c in '*?[' ):
+          self.globs.append( ( re.compile( fnmatch.translate( stat ) ), metric ) )
+        else:
+          self.exact.setdefault( stat, [] ).append( metric )
+
+    self.glob_re = None
+    if self.globs:
+      self.glob_re = re.compile(
+        '|'.join( '(?:' + r.pattern + ')' for r, _ in self.globs ) )
+
+  # Every metric stat counts towards, by name or by pattern, each once
+
+  def match( self, stat ):
+    metrics = self.exact.get( stat, [] )
+    if self.glob_re is not None and self.glob_re.match( stat ):
+      metrics = metrics + [ m for r, m in self.globs
+                            if r.match( stat ) and m not in metrics ]
+    return metrics or None
+
+#-------------------------------------------------------------------------
+# parse_stats
+#-------------------------------------------------------------------------
+# Streams one stats.txt and returns { metric : value } for the chosen
+# dump (the last one by default; gem5 appends a dump per m5 dumpstats).
+# Only the current dump's sums are held in memory.
+
+def parse_stats( path, spec, dump=-1 ):
+  dumps = []
+  current = None
+
+  with open( path ) as f:
+    for line in f:
+      if line.startswith( '-' ):
+        if line.startswith( begin_marker ):
+          current = dict( ( m, 0.0 ) for m in spec.metrics )
+          found = set()
+          dumps.append( ( current, found ) )
+          if dump >= 0 and len( dumps ) > dump + 1:
+            break
+          if dump < 0 and len( dumps ) > -dump:
+            dumps.pop( 0 )
+        continue
+
+      if current is None:
+        continue
+
+      end = line.find( ' ' )
+      if end <= 0:
+        continue
+      metrics = spec.match( line[:end] )
+      if metrics is None:
+        continue
+
+      try:
+        value = float( line[end:].split( None, 1 )[0] )
+      except ( ValueError, IndexError ):
+        continue
+      for metric in metrics:
+        current[metric] += value
+        found.add( metric )
+
+  if len( dumps ) < ( dump + 1 if dump >= 0 else -dump ):
+    return {}
+  values, found = dumps[dump] if dump >= 0 else dumps[0]
+  return dict( ( m, values[m] * spec.scale[m] ) for m in found )
+
+#-------------------------------------------------------------------------
+# Parallel ingest
+#-------------------------------------------------------------------------
+
+worker_spec = None
+
+def init_worker( counters, dump ):
+  global worker_spec
+  worker_spec = ( CounterSpec( counters ), dump )
+
+def parse_job( job ):
+  bmark, config, path = job
+  spec, dump = worker_spec
+  try:
+    return ( bmark, config, path, parse_stats( path, spec, dump ), None )
+  except ( IOError, OSError ) as e:
+    return ( bmark, config, path, {}, str( e ) )
+
+# Parses every ( bmark, config, path ) job and merges the counters into
+# the named store. Returns the list of ( path, error ) failures.
+
+def ingest( jobs, store, counters=None, dump=-1, processes=None,
+            verbose=False ):
+  counters = counters or default_counters
+  jobs = list( jobs )
+  processes = max( 1, min( processes or multiprocessing.cpu_count(),
+                           len( jobs ) ) )
+
+  records = []
+  failures = []
+
+  def collect( result ):
+    bmark, config, path, values, error = result
+    if error:
+      failures.append( ( path, error ) )
+    elif not values:
+      failures.append( ( path, 'no requested counters found' ) )
+    for metric, value in sorted( values.items() ):
+      records.append( ( bmark, config, metric, value ) )
+    if verbose:
+      print( "{} {} {}: {} counters".format( bmark, config, path, len( values ) ) )
+
+  if processes == 1:
+    init_worker( counters, dump )
+    for job in jobs:
+      collect( parse_job( job ) )
+  else:
+    pool = multiprocessing.Pool(
+      processes, initializer=init_worker, initargs=( counters, dump ) )
+    try:
+      for result in pool.imap_unordered( parse_job, jobs ):
+        collect( result )
+    finally:
+      pool.close()
+      pool.join()
+
+  if records:
+    results_store.update_store( store, records )
+  return failures
+
+#-------------------------------------------------------------------------
+# read_manifest
+#-------------------------------------------------------------------------
+# Stats paths are relative to the manifest's directory.
+
+def read_manifest( filename ):
+  base = os.path.dirname( os.path.abspath( filename ) )
+  jobs = []
+  with open( filename ) as f:
+    for line in f:
+      line = line.split( '#', 1 )[0].strip()
+      if not line:
+        continue
+      bmark, config, path = line.split( None, 2 )
+      jobs.append( ( bmark, config, os.path.join( base, path ) ) )
+  return jobs
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description='Ingest gem5 stats into a store.' )
+  p.add_argument( 'manifest', help='file of "benchmark config stats.txt" lines' )
+  p.add_argument( '--store', default='perf', help='results store to update' )
+  p.add_argument( '--counters', default=None,
+                  help='JSON file mapping metrics to gem5 stats' )
+  p.add_argument( '--dump', type=int, default=-1,
+                  help='which stats dump to read (default: last)' )
+  p.add_argument( '-j', '--jobs', type=int, default=None,
+                  help='parser processes (default: one per core)' )
+  p.add_argument( '-v', '--verbose', action='store_true' )
+  opts = p.parse_args( argv )
+
+  counters = None
+  if opts.counters:
+    with open( opts.counters ) as f:
+      counters = json.load( f )
+
+  failures = ingest( read_manifest( opts.manifest ), opts.store, counters,
+                     opts.dump, opts.jobs, opts.verbose )
+
+  for path, error in failures:
+    print( "{}: {}".format( path, error ), file=sys.stderr )
+  return 1 if failures else 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
@@ -0,0 +1,470 @@
+#=========================================================================
+# lta_timeline.py
+#=========================================================================
+# Lane execution timelines, as in the lta-tc-exec, lta-lc-*-exec,
+# tctc-exec, lclc-exec and mcmc-exec diagrams, drawn from a simulator
+# event trace instead of by hand. Lanes run across, time runs down.
+#
+# A trace is text, optionally gzipped, with one event per line:
+#
+#   # start  end  lane  uthread  block  state
+#   0        1    0     0        A      run
+#   1        2    1     5        A      masked
+#   2        9    1     5        A      stall
+#   12       13   0     0        C      div
+#
+# Times are in cycles (or chimes). The state is run (on the converged
+# path), div (on a divergent path, colored by its block, with D0 and D1
+# alike), masked (issued but masked off, crossed out) or stall (waiting
+# on a long-latency operation, a bar across the wait).
+#
+# A short trace is drawn like the diagrams: one cell per event holding
+# its uthread, labelled with its block. A trace with more events than
+# the output has room for is decimated as it streams in. Each lane's
+# busy time is summed per category into a fixed number of time bins,
+# which double in width whenever the trace outgrows them, so memory
+# depends on the lanes and the output height and not on the number of
+# events. Each output row of a lane then takes the category it is
+# mostly busy with, and runs of rows alike merge into one interval, so
+# a full-benchmark trace is at most one rectangle per lane and row,
+# drawn as one collection per category:
+#
+#   % python lta_timeline.py tctc.trace -o tctc-exec
+#   % python lta_timeline.py bfs.trace.gz -o bfs-exec --formats pdf,png
+#   % python lta_timeline.py bfs.trace.gz -o bfs-exec --cycles 0:200000
+#
+# --check confirms the bins still hold every busy cycle of the trace,
+# e.g. read a few thousand lines at a time so they coarsen in between:
+#
+#   % python lta_timeline.py bfs.trace.gz --check --chunk 4096
+#
+
+from __future__ import print_function
+
+import argparse
+import gzip
+import itertools
+import os
+import re
+import sys
+import timeit
+
+import numpy as np
+
+import figure_style
+import matplotlib.pyplot as plt
+
+from matplotlib.collections import LineCollection, PolyCollection
+
+states = [ 'run', 'div', 'masked', 'stall' ]
+
+# Fill and edge of the cells on the converged path, and of those on each
+# divergent path in the order the paths first appear
+
+run_colors  = ( '#ffffff', '#000000' )
+path_colors = [ ( '#f8cecc', '#8b1a1a' ),
+                ( '#d5e8d4', '#2e6b2e' ),
+                ( '#dae8fc', '#1f3d7a' ) ]
+mask_color  = '#ff0000'
+
+# Categories the decimated view sums per lane and their colors: run,
+# masked and stall, then one per path color
+
+categories     = [ 'run', 'masked', 'stall' ] + \
+                 [ 'path{}'.format( i ) for i in range( len( path_colors ) ) ]
+summary_colors = [ '#a6a6a6', '#ff6666', '#e6e6e6',
+                   '#e06666', '#6aa84f', '#6d9eeb' ]
+
+# A row of a lane is drawn busy when at least this much of it is
+
+min_fill = 0.25
+
+# Events are drawn as cells when the shortest is at least this many
+# output rows (pixels) tall and there are at most max_events of them
+
+min_cell_rows = 12
+max_events    = 20000
+
+#-------------------------------------------------------------------------
+# read_trace
+#-------------------------------------------------------------------------
+# Yields the trace chunk lines at a time as ( start, end, lane, uthread,
+# block, state ) arrays, the last two of bytes
+
+def read_trace( path, chunk=1 << 18 ):
+  opener = gzip.open if path.endswith( '.gz' ) else open
+  with opener( path, 'rb' ) as f:
+    while True:
+      lines = list( itertools.islice( f, chunk ) )
+      if not lines:
+        return
+      lines = [ line for line in lines
+                if line.strip() and not line.lstrip().startswith( b'#' ) ]
+      if not lines:
+        continue
+
+      fields = np.array( b' '.join( lines ).split() )
+      if len( fields ) != 6 * len( lines ):
+        bad = next( l for l in lines if len( l.split() ) != 6 )
+        raise ValueError( "{}: expected six fields in '{}'".format(
+          path, bad.strip().decode( 'utf-8', 'replace' ) ) )
+      fields = fields.reshape( -1, 6 )
+
+      yield ( fields[:, 0].astype( np.float64 ),
+              fields[:, 1].astype( np.float64 ),
+              fields[:, 2].astype( np.int64 ),
+              fields[:, 3].astype( np.int64 ),
+              fields[:, 4], fields[:, 5] )
+
+#-------------------------------------------------------------------------
+# Timeline
+#-------------------------------------------------------------------------
+# Accumulates a trace for an output rows pixels tall, over cycles
+# [ start, end ) or, with end None, over all of it.
+
+class Timeline( object ):
+
+  def __init__( self, rows, start=0, end=None ):
+    self.rows   = rows
+    self.bins   = 2 * rows
+    self.start  = float( start )
+    self.end    = None if end is None else float( end )
+    self.last   = self.start
+    self.width  = 2.0 ** -6
+    if self.end is not None:
+      self.width = ( self.end - self.start ) / self.bins
+    self.cover  = np.zeros( ( 0, len( categories ), self.bins ) )
+    self.paths  = {}
+    self.events = []
+    self.count  = 0
+    self.busy   = 0.0
+
+  @property
+  def lanes( self ):
+    return self.cover.shape[0]
+
+  # Divergent blocks are colored by name without the trailing iteration
+  # number, so D0 and D1 share a color
+
+  def path_of( self, block ):
+    key = re.sub( b'[0-9]+$', b'', block )
+    if key not in self.paths:
+      self.paths[key] = len( self.paths ) % len( path_colors )
+    return self.paths[key]
+
+  def add( self, start, end, lane, uthread, block, state ):
+    known = np.isin( state, [ s.encode( 'ascii' ) for s in states ] )
+    if not known.all():
+      raise ValueError( "unknown state '{}'".format(
+        state[ ~known ][0].decode( 'utf-8', 'replace' ) ) )
+
+    start = np.maximum( start, self.start )
+    if self.end is not None:
+      end = np.minimum( end, self.end )
+    keep = end > start
+    start, end, lane, uthread, block, state = [
+      a[keep] for a in ( start, end, lane, uthread, block, state ) ]
+    if not len( start ):
+      return
+
+    # Events are kept as they are until there are too many to draw
+
+    self.count += len( start )
+    self.busy  += float( ( end - start ).sum() )
+    if self.events is not None:
+      if self.count <= max_events:
+        self.events.append( ( start, end, lane, uthread, block, state ) )
+      else:
+        self.events = None
+
+    category = np.zeros( len( start ), np.int64 )
+    category[ state == b'masked' ] = 1
+    category[ state == b'stall' ]  = 2
+    div = np.flatnonzero( state == b'div' )
+    if len( div ):
+      names, inverse = np.unique( block[div], return_inverse=True )
+      paths = np.array( [ self.path_of( name ) for name in names ] )
+      category[div] = 3 + paths[inverse]
+
+    if lane.max() >= self.lanes:
+      grow = lane.max() + 1 - self.lanes
+      self.cover = np.concatenate(
+        [ self.cover, np.zeros( ( grow, ) + self.cover.shape[1:] ) ] )
+
+    self.last = max( self.last, end.max() )
+    if self.end is None:
+      while self.last - self.start > self.bins * self.width:
+        self.coarsen()
+
+    self.accumulate( ( start - self.start ) / self.width,
+                     ( end - self.start ) / self.width,
+                     lane * len( categories ) + category )
+
+  # Halves the resolution, so the bins span twice the time. Coverage is
+  # in bins, so a pair of old bins makes half as many new ones.
+
+  def coarsen( self ):
+    half = self.cover.reshape( self.cover.shape[:2] + ( self.bins // 2, 2 ) )
+    self.cover = np.concatenate(
+      [ half.sum( axis=-1 ) / 2.0, np.zeros_like( half[..., 0] ) ], axis=-1 )
+    self.width *= 2
+
+  # Busy time held in the bins, which should be all the event time added
+  # however often the bins were coarsened
+
+  def covered( self ):
+    return float( self.cover.sum() ) * self.width
+
+  # Adds the intervals [ s, e ), in bins, to the rows of the flattened
+  # ( lane, category ) coverage: the partial bins at either end directly,
+  # the full bins between as steps of a running sum
+
+  def accumulate( self, s, e, row ):
+    bins = self.bins
+    size = self.cover.size
+    first = np.floor( s ).astype( np.int64 )
+    last  = np.ceil( e ).astype( np.int64 ) - 1
+    one   = first == last
+
+    flat = self.cover.reshape( -1 )
+    flat += np.bincount( row * bins + first,
+                         np.where( one, e - s, first + 1 - s ), size )
+    flat += np.bincount( row * bins + last, np.where( one, 0.0, e - last ),
+                         size )
+
+    full = last > first + 1
+    if full.any():
+      stride = bins + 1
+      steps = np.bincount( ( row * stride + first + 1 )[full],
+                           minlength=len( flat ) // bins * stride )
+      steps -= np.bincount( ( row * stride + last )[full],
+                            minlength=len( steps ) )
+      flat += np.cumsum( steps.reshape( -1, stride ), axis=1 )[:, :bins] \
+                .reshape( -1 )
+
+  #-----------------------------------------------------------------------
+  # Output
+  #-----------------------------------------------------------------------
+
+  def span( self ):
+    end = self.end if self.end is not None else self.last
+    return self.start, max( end, self.start + 1e-9 )
+
+  # Whether the events are few and long enough to draw one by one
+
+  def detailed( self ):
+    if not self.events:
+      return False
+    start, end = self.span()
+    shortest = min( ( e - s ).min() for s, e, _, _, _, _ in self.events )
+    return shortest * self.rows / ( end - start ) >= min_cell_rows
+
+  # Returns ( lanes, categories, starts, ends ) arrays: each lane's runs
+  # of output rows mostly busy with one category, merged into intervals
+
+  def intervals( self ):
+    start, end = self.span()
+    height = ( end - start ) / self.rows
+
+    # Coverage of each row, from the running sum of the bins, assuming
+    # time is spread evenly within a bin
+
+    edges = np.linspace( 0, end - start, self.rows + 1 ) / self.width
+    index = np.minimum( np.floor( edges ).astype( np.int64 ), self.bins - 1 )
+    total = np.concatenate( [ np.zeros( self.cover.shape[:2] + ( 1, ) ),
+                              np.cumsum( self.cover, axis=-1 ) ], axis=-1 )
+    at = total[..., index] + ( edges - index ) * self.cover[..., index]
+    cover = np.diff( at, axis=-1 ) * self.width / height
+
+    category = np.argmax( cover, axis=1 )
+    category[ cover.sum( axis=1 ) < min_fill ] = -1
+
+    lanes, cats, starts, ends = [], [], [], []
+    for lane, row in enumerate( category ):
+      change = np.flatnonzero( row[1:] != row[:-1] ) + 1
+      first = np.concatenate( [ [ 0 ], change ] )
+      last  = np.concatenate( [ change, [ self.rows ] ] )
+      busy  = row[first] >= 0
+      lanes.append( np.full( busy.sum(), lane ) )
+      cats.append( row[first][busy] )
+      starts.append( start + first[busy] * height )
+      ends.append( start + last[busy] * height )
+
+    return tuple( np.concatenate( a ) if a else np.zeros( 0 )
+                  for a in ( lanes, cats, starts, ends ) )
+
+#-------------------------------------------------------------------------
+# Drawing
+#-------------------------------------------------------------------------
+
+def boxes( lane, start, end, width ):
+  left, right = lane - width / 2.0, lane + width / 2.0
+  return np.stack( [ np.stack( [ left, start ], axis=-1 ),
+                     np.stack( [ left, end ], axis=-1 ),
+                     np.stack( [ right, end ], axis=-1 ),
+                     np.stack( [ right, start ], axis=-1 ) ], axis=1 )
+
+# One cell per event, as in the hand-drawn diagrams. A block is named
+# left of its cell unless the lane to the left starts the same block at
+# the same time; the axes leave room for the names left of lane 0.
+
+def draw_events( ax, timeline, cell=0.9 ):
+  start, end, lane, uthread, block, state = [
+    np.concatenate( a ) for a in zip( *timeline.events ) ]
+
+  cells = state != b'stall'
+  keys = [ ( b'run', None ) ] + [ ( b'div', i ) for i in range( len( path_colors ) ) ]
+  for name, path in keys:
+    if path is None:
+      chosen = cells & ( state != b'div' )
+      face, edge = run_colors
+    else:
+      chosen = ( state == b'div' ) & np.array(
+        [ timeline.path_of( b ) == path for b in block ], dtype=bool )
+      face, edge = path_colors[path]
+    if chosen.any():
+      ax.add_collection( PolyCollection(
+        boxes( lane[chosen], start[chosen], end[chosen], cell ),
+        facecolors=face, edgecolors=edge, linewidths=1.0, snap=True ) )
+
+  masked = np.flatnonzero( state == b'masked' )
+  if len( masked ):
+    x0, x1 = lane[masked] - cell / 2.0, lane[masked] + cell / 2.0
+    s, e = start[masked], end[masked]
+    ax.add_collection( LineCollection(
+      np.concatenate( [ np.stack( [ np.stack( [ x0, s ], -1 ),
+                                    np.stack( [ x1, e ], -1 ) ], 1 ),
+                        np.stack( [ np.stack( [ x0, e ], -1 ),
+                                    np.stack( [ x1, s ], -1 ) ], 1 ) ] ),
+      colors=mask_color, linewidths=1.0, zorder=3 ) )
+
+  stalls = np.flatnonzero( state == b'stall' )
+  if len( stalls ):
+    x, s, e = lane[stalls], start[stalls], end[stalls]
+    cap = cell / 4.0
+    segments = [ np.stack( [ np.stack( [ x, s ], -1 ), np.stack( [ x, e ], -1 ) ], 1 ),
+                 np.stack( [ np.stack( [ x - cap, s ], -1 ),
+                             np.stack( [ x + cap, s ], -1 ) ], 1 ),
+                 np.stack( [ np.stack( [ x - cap, e ], -1 ),
+                             np.stack( [ x + cap, e ], -1 ) ], 1 ) ]
+    ax.add_collection( LineCollection(
+      np.concatenate( segments ), colors='#000000', linewidths=1.0 ) )
+
+  starts = set( zip( lane[cells].tolist(), start[cells].tolist(),
+                     block[cells].tolist() ) )
+  for i in np.flatnonzero( cells ):
+    middle = ( start[i] + end[i] ) / 2.0
+    ax.text( lane[i], middle, str( uthread[i] ), ha='center', va='center' )
+    if ( lane[i] - 1, start[i], block[i] ) not in starts:
+      ax.text( lane[i] - cell / 2.0 - 0.05, middle,
+               block[i].decode( 'utf-8', 'replace' ), ha='right', va='center' )
+
+# The decimated intervals, one collection per category
+
+def draw_intervals( ax, timeline, cell=0.9 ):
+  lanes, cats, starts, ends = timeline.intervals()
+  for i, color in enumerate( summary_colors ):
+    chosen = cats == i
+    if chosen.any():
+      ax.add_collection( PolyCollection(
+        boxes( lanes[chosen], starts[chosen], ends[chosen], cell ),
+        facecolors=color, edgecolors='none', snap=True ) )
+  return len( lanes )
+
+# Draws the timeline on ax. Returns the number of shapes drawn: events
+# or merged intervals.
+
+def draw( ax, timeline ):
+  left = -0.5
+  if timeline.detailed():
+    draw_events( ax, timeline )
+    drawn = timeline.count
+    left = -1.0
+  else:
+    drawn = draw_intervals( ax, timeline )
+
+  start, end = timeline.span()
+  ax.set_xlim( left, max( timeline.lanes, 1 ) - 0.5 )
+  ax.set_ylim( end, start )
+  ax.ticklabel_format( axis='y', style='plain', useOffset=False )
+  ax.set_xticks( range( timeline.lanes ) )
+  ax.xaxis.tick_top()
+  ax.xaxis.set_label_position( 'top' )
+  ax.set_xlabel( 'Space (Lanes)' )
+  ax.set_ylabel( 'Time (Cycles)' )
+  return drawn
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description='Draw a lane execution timeline.' )
+  p.add_argument( 'trace', help='event trace, optionally gzipped' )
+  p.add_argument( '-o', '--output', default=None,
+                  help='output name without extension (default: the trace\'s)' )
+  p.add_argument( '--formats', default=None,
+                  help='comma-separated output formats (default: '
+                       '$FIGURE_FORMATS or pdf)' )
+  p.add_argument( '--cycles', default=None,
+                  help='window to draw, as start:end (default: all)' )
+  p.add_argument( '--width', type=float, default=3.5, help='inches' )
+  p.add_argument( '--height', type=float, default=5.0, help='inches' )
+  p.add_argument( '--dpi', type=int, default=300,
+                  help='output resolution the trace is decimated to' )
+  p.add_argument( '--font-size', type=int, default=14 )
+  p.add_argument( '--chunk', type=int, default=1 << 18,
+                  help='trace lines read at a time (default: 262144)' )
+  p.add_argument( '--check', action='store_true',
+                  help='check that the bins hold all the event time' )
+  opts = p.parse_args( argv )
+
+  if opts.formats:
+    os.environ['FIGURE_FORMATS'] = opts.formats
+  output = opts.output
+  if output is None:
+    output = re.sub( r'(\.gz)?$', '', opts.trace, count=1 )
+    output = os.path.splitext( output )[0]
+
+  start, end = 0, None
+  if opts.cycles:
+    first, _, last = opts.cycles.partition( ':' )
+    start = float( first or 0 )
+    end = float( last ) if last else None
+
+  began = timeit.default_timer()
+  timeline = Timeline( int( opts.height * opts.dpi ), start, end )
+  try:
+    for chunk in read_trace( opts.trace, opts.chunk ):
+      timeline.add( *chunk )
+  except ( IOError, ValueError ) as e:
+    print( e, file=sys.stderr )
+    return 1
+  read = timeit.default_timer() - began
+
+  if opts.check:
+    covered, busy = timeline.covered(), timeline.busy
+    print( "binned {:.6g} of {:.6g} busy cycles at {:g} cycles a bin".format(
+      covered, busy, timeline.width ) )
+    if abs( covered - busy ) > 1e-9 * max( busy, 1.0 ):
+      print( "the bins lost or gained busy time", file=sys.stderr )
+      return 1
+
+  figure_style.configure( opts.width, opts.height / opts.width,
+                          font_size=opts.font_size )
+  fig = plt.figure()
+  ax = fig.add_subplot( 111 )
+  drawn = draw( ax, timeline )
+
+  formats = figure_style.output_formats()
+  figure_style.export( fig, lambda ext: output + '.' + ext, formats,
+                       bbox_inches='tight', dpi=opts.dpi )
+
+  print( "{} events on {} lanes, {} {} drawn ({:.2f}s reading, {:.2f}s total)"
+         .format( timeline.count, timeline.lanes, drawn,
+                  'cells' if timeline.detailed() else 'intervals',
+                  read, timeit.default_timer() - began ) )
+  return 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
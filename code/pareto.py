@@ -0,0 +1,77 @@
+#=========================================================================
+# pareto.py
+#=========================================================================
+# Pareto frontiers (skylines) of two metrics to maximize, such as the
+# normalized performance and energy efficiency of the eeperf figures.
+# A point is on the frontier unless another point is at least as good
+# in both metrics and strictly better in one. The skyline is one sort
+# and one running maximum, O(n log n), so whole sweeps of hundreds of
+# thousands of design points are fine:
+#
+#   optimal = pareto.frontier( perf, eff )       # positions, by perf
+#   ax.plot( perf[optimal], eff[optimal] )
+#
+#   pareto.frontiers( norm_perf, norm_eff )      # one per benchmark
+#   pareto.frontier_across( norm_perf, norm_eff )
+#
+# frontier_across ranks configs on their geometric mean over the
+# benchmarks (see speedups.py). To minimize a metric, pass its negation.
+#
+
+import numpy as np
+
+import speedups
+
+#-------------------------------------------------------------------------
+# frontier_mask
+#-------------------------------------------------------------------------
+# Sorts by x descending, ties by y descending. A point is optimal if it
+# has the largest y among the points sharing its x, and that y beats
+# every point with a larger x. Points with a NaN never are.
+
+def frontier_mask( x, y ):
+  x = np.asarray( x, dtype=np.float64 )
+  y = np.asarray( y, dtype=np.float64 )
+  mask = np.zeros( len( x ), dtype=bool )
+
+  valid = np.flatnonzero( ~( np.isnan( x ) | np.isnan( y ) ) )
+  if not len( valid ):
+    return mask
+
+  order = valid[ np.lexsort( ( -y[valid], -x[valid] ) ) ]
+  xs, ys = x[order], y[order]
+
+  # First position of each run of equal x, and the best y before it
+
+  new_x  = np.concatenate( [ [ True ], xs[1:] != xs[:-1] ] )
+  starts = np.flatnonzero( new_x )
+  first  = starts[ np.cumsum( new_x ) - 1 ]
+
+  best = np.maximum.accumulate( ys )
+  best_before = np.where( first > 0, best[ np.maximum( first - 1, 0 ) ], -np.inf )
+
+  mask[order] = ( ys == ys[first] ) & ( ys > best_before )
+  return mask
+
+#-------------------------------------------------------------------------
+# frontier
+#-------------------------------------------------------------------------
+# Positions of the optimal points in increasing x (and so decreasing y)
+# order, ready to draw as a line
+
+def frontier( x, y ):
+  x = np.asarray( x, dtype=np.float64 )
+  positions = np.flatnonzero( frontier_mask( x, y ) )
+  return positions[ np.argsort( x[positions], kind='mergesort' ) ]
+
+# One frontier per row of (benchmark x config) matrices
+
+def frontiers( x, y ):
+  return [ frontier( xs, ys ) for xs, ys in zip( x, y ) ]
+
+# Frontier of the configs' geometric means over the benchmarks
+
+def frontier_across( x, y ):
+  x = np.asarray( x, dtype=np.float64 )
+  y = np.asarray( y, dtype=np.float64 )
+  return frontier( speedups.gmean( x.T ), speedups.gmean( y.T ) )
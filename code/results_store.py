@@ -0,0 +1,231 @@
+#=========================================================================
+# results_store.py
+#=========================================================================
+# Columnar on-disk store for simulation results. Each store is a
+# directory under code/data/ with a small JSON index naming the
+# benchmarks, configurations and metrics, plus one .npy column per
+# metric holding a (config x benchmark) float64 matrix. Columns are
+# memory-mapped on first use, so opening a store only parses the index
+# and queries only touch the pages they read. Missing results are NaN.
+#
+#   store = results_store.open_store( 'perf' )
+#   store.get( 'bilateral', 'LTA-8/4x4/2', 'cycles' )
+#   store.matrix( [ 'IO', 'O3' ], 'cycles', bmarks )
+#   store.tensor( bmarks, [ 'IO', 'O3' ], [ 'energy.alu', 'energy.fpu' ] )
+#
+# Run as a script to dump a store as text:
+#
+#   % python results_store.py perf [metric]
+#
+
+from __future__ import print_function
+
+import json
+import os
+import sys
+
+import numpy as np
+
+data_dir = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), 'data' )
+
+index_filename = 'index.json'
+
+# Every index and column file opened by this process. The figure build
+# reads this to learn which data each script depends on.
+
+accessed = set()
+
+#-------------------------------------------------------------------------
+# Helper functions
+#-------------------------------------------------------------------------
+
+def store_path( name ):
+  if os.path.isabs( name ) or os.sep in name:
+    return name
+  return os.path.join( data_dir, name )
+
+def column_filename( metric ):
+  return metric.replace( '/', '_' ) + '.npy'
+
+#-------------------------------------------------------------------------
+# ResultsStore
+#-------------------------------------------------------------------------
+
+class ResultsStore( object ):
+
+  def __init__( self, path ):
+    self.path = path
+    filename = os.path.join( path, index_filename )
+    with open( filename ) as f:
+      index = json.load( f )
+    accessed.add( os.path.abspath( filename ) )
+
+    self.benchmarks = index['benchmarks']
+    self.configs    = index['configs']
+    self.metrics    = index['metrics']
+
+    self.bmark_idx  = dict( ( b, i ) for i, b in enumerate( self.benchmarks ) )
+    self.config_idx = dict( ( c, i ) for i, c in enumerate( self.configs ) )
+    self.columns    = {}
+
+  # Memory-map a metric column on first use
+
+  def column( self, metric ):
+    if metric not in self.columns:
+      if metric not in self.metrics:
+        raise KeyError( "metric '{}' not in store {}".format( metric, self.path ) )
+      filename = os.path.join( self.path, column_filename( metric ) )
+      self.columns[metric] = np.load( filename, mmap_mode='r' )
+      accessed.add( os.path.abspath( filename ) )
+    return self.columns[metric]
+
+  def get( self, bmark, config, metric='cycles' ):
+    return float( self.column( metric )[ self.config_idx[config],
+                                         self.bmark_idx[bmark] ] )
+
+  def row( self, config, metric='cycles', bmarks=None ):
+    return self.matrix( [ config ], metric, bmarks )[0]
+
+  # Returns a (len(configs) x len(bmarks)) copy of the requested slice
+
+  def matrix( self, configs, metric='cycles', bmarks=None ):
+    col = self.column( metric )
+    rows = [ self.config_idx[c] for c in configs ]
+    if bmarks is None:
+      return np.array( col[rows] )
+    cols = [ self.bmark_idx[b] for b in bmarks ]
+    return np.array( col[np.ix_( rows, cols )] )
+
+  # Returns a (len(bmarks) x len(configs) x len(metrics)) copy. Only the
+  # requested metric columns are mapped and only the requested cells of
+  # each are read, so the cost follows the slice rather than the store.
+
+  def tensor( self, bmarks, configs, metrics ):
+    rows = [ self.config_idx[c] for c in configs ]
+    cols = [ self.bmark_idx[b] for b in bmarks ]
+    out = np.empty( ( len( bmarks ), len( configs ), len( metrics ) ) )
+    for k, metric in enumerate( metrics ):
+      out[ :, :, k ] = self.column( metric )[ np.ix_( rows, cols ) ].T
+    return out
+
+  def has( self, bmark, config, metric='cycles' ):
+    if bmark not in self.bmark_idx or config not in self.config_idx \
+        or metric not in self.metrics:
+      return False
+    return not np.isnan( self.get( bmark, config, metric ) )
+
+#-------------------------------------------------------------------------
+# open_store
+#-------------------------------------------------------------------------
+
+def open_store( name ):
+  return ResultsStore( store_path( name ) )
+
+#-------------------------------------------------------------------------
+# write_store
+#-------------------------------------------------------------------------
+# Writes a complete store. Columns is a dict mapping each metric to a
+# (config x benchmark) array-like. Every file is written to a temporary
+# name and renamed into place so readers never see a partial column.
+
+def write_store( name, benchmarks, configs, columns ):
+  path = store_path( name )
+  if not os.path.isdir( path ):
+    os.makedirs( path )
+
+  metrics = sorted( columns )
+  shape = ( len( configs ), len( benchmarks ) )
+
+  for metric in metrics:
+    data = np.asarray( columns[metric], dtype=np.float64 )
+    if data.shape != shape:
+      raise ValueError( "column '{}' has shape {}, expected {}"
+                        .format( metric, data.shape, shape ) )
+    filename = os.path.join( path, column_filename( metric ) )
+    with open( filename + '.tmp', 'wb' ) as f:
+      np.save( f, data )
+    os.rename( filename + '.tmp', filename )
+
+  index = {
+    'benchmarks' : list( benchmarks ),
+    'configs'    : list( configs ),
+    'metrics'    : metrics,
+  }
+
+  filename = os.path.join( path, index_filename )
+  with open( filename + '.tmp', 'w' ) as f:
+    json.dump( index, f, indent=2 )
+    f.write( '\n' )
+  os.rename( filename + '.tmp', filename )
+
+  return ResultsStore( path )
+
+#-------------------------------------------------------------------------
+# update_store
+#-------------------------------------------------------------------------
+# Merges (bmark, config, metric, value) records into a store, creating
+# the store and growing its benchmark, config and metric keys as needed.
+
+def update_store( name, records ):
+  path = store_path( name )
+
+  if os.path.exists( os.path.join( path, index_filename ) ):
+    old = ResultsStore( path )
+    benchmarks = list( old.benchmarks )
+    configs    = list( old.configs )
+    metrics    = list( old.metrics )
+  else:
+    old = None
+    benchmarks, configs, metrics = [], [], []
+
+  records = list( records )
+  for bmark, config, metric, value in records:
+    if bmark not in benchmarks:
+      benchmarks.append( bmark )
+    if config not in configs:
+      configs.append( config )
+    if metric not in metrics:
+      metrics.append( metric )
+
+  bmark_idx  = dict( ( b, i ) for i, b in enumerate( benchmarks ) )
+  config_idx = dict( ( c, i ) for i, c in enumerate( configs ) )
+
+  columns = {}
+  for metric in metrics:
+    data = np.full( ( len( configs ), len( benchmarks ) ), np.nan )
+    if old is not None and metric in old.metrics:
+      col = old.column( metric )
+      data[ :col.shape[0], :col.shape[1] ] = col
+    columns[metric] = data
+
+  for bmark, config, metric, value in records:
+    columns[metric][ config_idx[config], bmark_idx[bmark] ] = value
+
+  return write_store( path, benchmarks, configs, columns )
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv ):
+  if len( argv ) < 2:
+    print( "usage: {} <store> [metric]".format( argv[0] ) )
+    return 1
+
+  store = open_store( argv[1] )
+  metrics = argv[2:] or store.metrics
+
+  width = max( len( c ) for c in store.configs ) + 2
+  for metric in metrics:
+    print( "# {}".format( metric ) )
+    col = store.column( metric )
+    for j, bmark in enumerate( store.benchmarks ):
+      print( bmark )
+      for i, config in enumerate( store.configs ):
+        if not np.isnan( col[i, j] ):
+          print( "  {:<{}}{:g}".format( config, width, col[i, j] ) )
+
+  return 0
+
+if __name__ == '__main__':
+  sys.exit( main( sys.argv ) )
@@ -0,0 +1,379 @@
+#=========================================================================
+# run_sweep.py
+#=========================================================================
+# Runs a simulation sweep across a pool of processes and checkpoints
+# its results into a results store (see results_store.py). A sweep spec
+# names the store, the benchmarks and the configs, the configs as
+# labels with brace patterns:
+#
+#   {
+#     "store"      : "perf",
+#     "benchmarks" : [ "bilateral", "dct8x8m", ... ],
+#     "configs"    : [ "IO", "O3", "8/4x{4,8,12,16}/{1..16}" ]
+#   }
+#
+# {a,b} stands for each alternative and {1..16} for each number in the
+# range. LTA points whose lane groups do not divide the lanes, or whose
+# time groups do not divide the uthreads per lane, are dropped. Every
+# ( benchmark, config ) pair is one job: the simulator command runs with
+# the job's own output directory, and the counters of the stats.txt it
+# leaves there are read as gem5_stats.py reads them. The command is a
+# template filled with {bmark}, {config} (the store label), {tag} (the
+# label fit for a file name) and {outdir}:
+#
+#   % python run_sweep.py sweeps/uthreads.json -j 8 --command \
+#       'gem5.opt -d {outdir} lta.py --bmark {bmark} --config {config}'
+#   % python run_sweep.py sweeps/uthreads.json --stub      # stand-in
+#   % python run_sweep.py sweeps/uthreads.json --dry-run   # list jobs
+#
+# Each job's results are merged into the store as soon as it finishes,
+# so an interrupted sweep loses only the jobs in flight. Run again, it
+# skips the jobs already in the store and reads the jobs that finished
+# simulating but never reached the store from their stats.txt instead
+# of simulating them again.
+#
+# The stub (python run_sweep.py stub --bmark ... --config ... --outdir
+# ...) writes a gem5-style stats.txt with a made-up, smoothly varying
+# cycle count, for trying out a sweep without a simulator. A --stub
+# sweep keeps its runs and results under .build/stub, apart from the
+# simulated ones, unless --store names the store to put them in.
+#
+
+from __future__ import print_function
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+import timeit
+import traceback
+
+import design_points
+import gem5_stats
+import results_store
+
+code_dir = os.path.dirname( os.path.abspath( __file__ ) )
+runs_dir = os.path.join( code_dir, '.build', 'sweeps' )
+
+stats_filename = 'stats.txt'
+log_filename   = 'sim.log'
+
+# Metric whose presence in the store marks a job done
+
+done_metric = 'cycles'
+
+#-------------------------------------------------------------------------
+# Sweep specs
+#-------------------------------------------------------------------------
+
+brace_re = re.compile( r'\{([^{}]*)\}' )
+
+# Labels matching pattern, expanding its braces left to right
+
+def expand_pattern( pattern ):
+  m = brace_re.search( pattern )
+  if m is None:
+    return [ pattern ]
+  body = m.group( 1 )
+  if '..' in body:
+    lo, hi = body.split( '..', 1 )
+    choices = [ str( v ) for v in range( int( lo ), int( hi ) + 1 ) ]
+  else:
+    choices = body.split( ',' )
+  labels = []
+  for choice in choices:
+    labels += expand_pattern( pattern[:m.start()] + choice + pattern[m.end():] )
+  return labels
+
+def valid_point( point ):
+  if point.kind != 'LTA':
+    return True
+  return ( point.lane_groups > 0 and point.time_groups > 0
+           and point.lanes % point.lane_groups == 0
+           and point.lane_uthreads % point.time_groups == 0 )
+
+# Store labels of the valid points the patterns stand for, in order and
+# without repeats
+
+def expand_configs( patterns ):
+  labels = []
+  for pattern in patterns:
+    for label in expand_pattern( pattern ):
+      point = design_points.parse( label )
+      if valid_point( point ) and point.label not in labels:
+        labels.append( point.label )
+  return labels
+
+def read_spec( path ):
+  with open( path ) as f:
+    spec = json.load( f )
+  for key in [ 'store', 'benchmarks', 'configs' ]:
+    if key not in spec:
+      raise ValueError( "sweep spec '{}' has no '{}'".format( path, key ) )
+  spec['name']    = os.path.basename( path ).split( '.' )[0]
+  spec['configs'] = expand_configs( spec['configs'] )
+  return spec
+
+def config_tag( label ):
+  return label.replace( '/', '_' )
+
+#-------------------------------------------------------------------------
+# run_job
+#-------------------------------------------------------------------------
+# Runs one job in a worker: simulates unless its stats.txt already holds
+# the done metric, then reads the counters. Returns ( bmark, config,
+# values, seconds, status, error ), where status says whether the job
+# was simulated or recovered from an earlier run.
+
+def job_fields( bmark, config, outdir ):
+  return { 'bmark' : bmark, 'config' : config,
+           'tag' : config_tag( config ), 'outdir' : outdir }
+
+def run_job( job ):
+  bmark, config, outdir, command, counters = job
+  start = timeit.default_timer()
+  stats = os.path.join( outdir, stats_filename )
+  spec = gem5_stats.CounterSpec( counters )
+  try:
+    values = {}
+    if os.path.exists( stats ):
+      values = gem5_stats.parse_stats( stats, spec )
+    if done_metric in values:
+      status = 'recovered'
+    else:
+      if not os.path.isdir( outdir ):
+        os.makedirs( outdir )
+      if os.path.exists( stats ):
+        os.remove( stats )
+      fields = job_fields( bmark, config, outdir )
+      args = [ arg.format( **fields ) for arg in shlex.split( command ) ]
+      with open( os.path.join( outdir, log_filename ), 'wb' ) as log:
+        code = subprocess.call( args, stdout=log, stderr=subprocess.STDOUT )
+      if code != 0:
+        raise RuntimeError( "simulator exited with status {}, see {}".format(
+          code, os.path.join( outdir, log_filename ) ) )
+      if not os.path.exists( stats ):
+        raise RuntimeError( "simulator left no {}".format( stats ) )
+      values = gem5_stats.parse_stats( stats, spec )
+      if done_metric not in values:
+        raise RuntimeError( "no {} in {}".format( done_metric, stats ) )
+      status = 'simulated'
+    return ( bmark, config, values, timeit.default_timer() - start, status, None )
+  except BaseException:
+    return ( bmark, config, {}, timeit.default_timer() - start, 'FAILED',
+             traceback.format_exc() )
+
+#-------------------------------------------------------------------------
+# run_sweep
+#-------------------------------------------------------------------------
+
+# The ( bmark, config ) jobs of spec whose results the store lacks
+
+def pending_jobs( spec, force=False ):
+  jobs = [ ( bmark, config ) for config in spec['configs']
+           for bmark in spec['benchmarks'] ]
+  path = results_store.store_path( spec['store'] )
+  if force or not os.path.exists(
+      os.path.join( path, results_store.index_filename ) ):
+    return jobs
+  store = results_store.open_store( spec['store'] )
+  return [ ( b, c ) for b, c in jobs if not store.has( b, c, done_metric ) ]
+
+# Runs the pending jobs of spec on a pool of processes, merging each
+# one's counters into the store when it finishes. Returns the list of
+# ( bmark, config, error ) failures.
+
+def run_sweep( spec, command, outdir=None, processes=None, force=False,
+               verbose=True ):
+  outdir   = outdir or os.path.join( runs_dir, spec['name'] )
+  counters = spec.get( 'counters' ) or gem5_stats.default_counters
+  total    = len( spec['configs'] ) * len( spec['benchmarks'] )
+  pending  = pending_jobs( spec, force )
+
+  if verbose:
+    print( "{} of {} jobs to run".format( len( pending ), total ) )
+    sys.stdout.flush()
+
+  work = [ ( bmark, config, os.path.join( outdir, bmark, config_tag( config ) ),
+             command, counters ) for bmark, config in pending ]
+
+  # Forced jobs simulate again even if an earlier stats.txt is there
+
+  if force:
+    for job in work:
+      stats = os.path.join( job[2], stats_filename )
+      if os.path.exists( stats ):
+        os.remove( stats )
+
+  failures = []
+  done = [ 0 ]
+
+  def finish( result ):
+    bmark, config, values, seconds, status, error = result
+    done[0] += 1
+    if error is None:
+      results_store.update_store( spec['store'],
+        [ ( bmark, config, metric, value )
+          for metric, value in sorted( values.items() ) ] )
+    else:
+      failures.append( ( bmark, config, error ) )
+    if verbose:
+      print( "[{:7.1f}s] {:>4}/{} {:<12} {:<18} {}".format(
+        seconds, done[0], len( work ), bmark, config, status ) )
+      sys.stdout.flush()
+
+  processes = max( 1, min( processes or multiprocessing.cpu_count(),
+                           len( work ) ) )
+  if processes == 1:
+    for job in work:
+      finish( run_job( job ) )
+  else:
+    pool = multiprocessing.Pool( processes )
+    try:
+      for result in pool.imap_unordered( run_job, work, chunksize=1 ):
+        finish( result )
+      pool.close()
+    except BaseException:
+      pool.terminate()
+      raise
+    finally:
+      pool.join()
+
+  return failures
+
+#-------------------------------------------------------------------------
+# Stub simulator
+#-------------------------------------------------------------------------
+# A stand-in for trying out sweeps: writes a stats.txt whose cycle count
+# falls smoothly with the lanes and uthreads, grows slowly with the time
+# groups, and varies a little by benchmark and config.
+
+def stub_cycles( bmark, config ):
+  point = design_points.parse( config )
+  digest = hashlib.sha1( ( bmark + ' ' + point.label ).encode( 'utf-8' ) )
+  noise = int( digest.hexdigest()[:8], 16 ) / float( 1 << 32 )
+  base = 1e6 * ( 2 + int( hashlib.sha1( bmark.encode( 'utf-8' ) )
+                          .hexdigest()[:4], 16 ) % 30 )
+
+  if point.kind == 'IO':
+    cycles = base
+  elif point.kind == 'O3':
+    cycles = base / 1.8
+  else:
+    cycles = base / ( 0.6 * point.lanes ) \
+      * ( 1.0 + 2.0 / point.lane_uthreads ) \
+      * ( 1.0 + 0.05 * ( point.time_groups - 1 ) ) \
+      * ( 1.0 + 0.1 * point.lanes / point.lane_groups / 8.0 )
+  if point.multicore:
+    cycles /= 3.5
+  return int( cycles * ( 0.98 + 0.04 * noise ) )
+
+def stub_main( argv ):
+  p = argparse.ArgumentParser( prog='run_sweep.py stub',
+                               description='Stand in for a simulator.' )
+  p.add_argument( '--bmark', required=True )
+  p.add_argument( '--config', required=True )
+  p.add_argument( '--outdir', required=True )
+  p.add_argument( '--seconds', type=float, default=0.0,
+                  help='time to pretend to simulate for' )
+  opts = p.parse_args( argv )
+
+  time.sleep( opts.seconds )
+  if not os.path.isdir( opts.outdir ):
+    os.makedirs( opts.outdir )
+  with open( os.path.join( opts.outdir, stats_filename ), 'w' ) as f:
+    f.write( gem5_stats.begin_marker + ' ----------\n' )
+    f.write( "{:<40} {:>12} # number of cpu cycles simulated\n".format(
+      'system.cpu.numCycles', stub_cycles( opts.bmark, opts.config ) ) )
+    f.write( '---------- End Simulation Statistics   ----------\n' )
+  return 0
+
+def stub_command( seconds=0.0 ):
+  return ' '.join( [ sys.executable, os.path.abspath( __file__ ), 'stub',
+                     '--bmark {bmark} --config {config} --outdir {outdir}',
+                     '--seconds {}'.format( seconds ) ] )
+
+# The spec with its store swapped for a scratch one of the same name,
+# and the directory for its runs, so that made-up results never reach
+# the spec's store, either directly or as stats.txt a real sweep reuses
+
+stub_dir = os.path.join( code_dir, '.build', 'stub' )
+
+def stub_spec( spec ):
+  name = os.path.basename( os.path.normpath( spec['store'] ) )
+  return dict( spec, store=os.path.join( stub_dir, 'stores', name ) )
+
+def stub_outdir( spec ):
+  return os.path.join( stub_dir, 'sweeps', spec['name'] )
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  argv = sys.argv[1:] if argv is None else argv
+  if argv[:1] == [ 'stub' ]:
+    return stub_main( argv[1:] )
+
+  p = argparse.ArgumentParser( description='Run a simulation sweep.' )
+  p.add_argument( 'spec', help='sweep spec (JSON)' )
+  p.add_argument( '--command', default=None,
+                  help='simulator command template' )
+  p.add_argument( '--stub', type=float, nargs='?', const=0.0, default=None,
+                  metavar='SECONDS',
+                  help='run the stub simulator instead, taking SECONDS a job' )
+  p.add_argument( '--store', default=None,
+                  help='results store (default: the spec\'s, or with --stub '
+                       'a scratch one under .build/stub)' )
+  p.add_argument( '-o', '--outdir', default=None,
+                  help='directory for the runs (default: .build/sweeps/<spec>, '
+                       'or .build/stub/sweeps/<spec> with --stub)' )
+  p.add_argument( '-j', '--jobs', type=int, default=None,
+                  help='simulations at a time (default: one per core)' )
+  p.add_argument( '-f', '--force', action='store_true',
+                  help='run every job even if the store has its results' )
+  p.add_argument( '-n', '--dry-run', action='store_true',
+                  help='list the jobs left to run and stop' )
+  opts = p.parse_args( argv )
+
+  spec, outdir = read_spec( opts.spec ), opts.outdir
+  if opts.stub is not None:
+    spec = stub_spec( spec )
+    outdir = outdir or stub_outdir( spec )
+  if opts.store:
+    spec = dict( spec, store=opts.store )
+
+  if opts.dry_run:
+    for bmark, config in pending_jobs( spec, opts.force ):
+      print( bmark, config )
+    return 0
+
+  command = opts.command
+  if opts.stub is not None:
+    command = stub_command( opts.stub )
+  if not command:
+    print( "give a simulator --command, or --stub", file=sys.stderr )
+    return 1
+
+  start = timeit.default_timer()
+  try:
+    failures = run_sweep( spec, command, outdir, opts.jobs, opts.force )
+  except KeyboardInterrupt:
+    print( "interrupted; finished jobs are in store '{}'".format( spec['store'] ),
+           file=sys.stderr )
+    return 130
+
+  for bmark, config, error in failures:
+    print( "\n{} {} failed:\n{}".format( bmark, config, error ), file=sys.stderr )
+  print( "sweep '{}' ran in {:.1f}s ({} failed)".format(
+    spec['name'], timeit.default_timer() - start, len( failures ) ) )
+  return 1 if failures else 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
@@ -0,0 +1,118 @@
+#=========================================================================
+# speedups.py
+#=========================================================================
+# Normalization kernel shared by the speedup figures. Takes a (config x
+# benchmark) cycle matrix and optionally a per-config area vector, and
+# in one pass over whole arrays computes the speedup of every config
+# over a baseline, the speedup per unit area, and the arithmetic,
+# geometric and harmonic mean of each across the benchmarks:
+#
+#   norm = speedups.normalize( cycle_data, area=area_data )
+#   norm.perf                 # baseline cycles / cycles
+#   norm.perf_area            # perf * baseline area / area
+#   norm.amean, norm.gmean    # per-config means of perf
+#   norm.area_amean           # ... and of perf_area
+#
+#   perf_data = norm.columns( 'perf', 'amean', 'area_amean' )
+#
+# The baseline is a config (its row, or its label given configs), or
+# cycles given directly as a scalar or per-benchmark vector, so the same
+# call normalizes to IO, O3 or a fixed reference:
+#
+#   speedups.normalize( cycles, baseline='O3', configs=configs )
+#   speedups.normalize( cycles, baseline=1e6 )
+#
+# The arithmetic means add the benchmarks left to right, exactly as the
+# scripts' sum( perf ) did, so the bars do not move in the last bit.
+#
+
+import numpy as np
+
+means = [ 'amean', 'gmean', 'hmean' ]
+
+#-------------------------------------------------------------------------
+# Means
+#-------------------------------------------------------------------------
+# Each takes a (config x benchmark) array and returns one value per
+# config. cumsum adds strictly in order; a plain sum is pairwise.
+
+def amean( values ):
+  if values.shape[1] == 0:
+    return np.full( values.shape[0], np.nan )
+  return np.cumsum( values, axis=1 )[:, -1] / values.shape[1]
+
+def gmean( values ):
+  return np.exp( np.log( values ).mean( axis=1 ) )
+
+def hmean( values ):
+  return values.shape[1] / ( 1.0 / values ).sum( axis=1 )
+
+#-------------------------------------------------------------------------
+# Speedups
+#-------------------------------------------------------------------------
+
+class Speedups( object ):
+
+  def __init__( self, perf, perf_area ):
+    self.perf      = perf
+    self.perf_area = perf_area
+
+    self.amean = amean( perf )
+    self.gmean = gmean( perf )
+    self.hmean = hmean( perf )
+
+    if perf_area is not None:
+      self.area_amean = amean( perf_area )
+      self.area_gmean = gmean( perf_area )
+      self.area_hmean = hmean( perf_area )
+
+  # Stacks the named per-benchmark matrices and per-config means side by
+  # side into one (config x column) array, e.g. the benchmarks followed
+  # by 'avg' and 'avg/area' bars
+
+  def columns( self, *names ):
+    parts = []
+    for name in names:
+      value = getattr( self, name )
+      parts.append( value if value.ndim == 2 else value[:, np.newaxis] )
+    return np.hstack( parts )
+
+#-------------------------------------------------------------------------
+# normalize
+#-------------------------------------------------------------------------
+# baseline is a row index or, with configs, a config label; a float or a
+# sequence of floats is taken as the baseline cycles themselves. The
+# area baseline defaults to the baseline config's area, or to 1 when the
+# baseline is not a config.
+
+def baseline_row( baseline, configs ):
+  if isinstance( baseline, str ):
+    if configs is None:
+      raise ValueError( "baseline '{}' needs the config labels".format( baseline ) )
+    return list( configs ).index( baseline )
+  if isinstance( baseline, ( int, np.integer ) ) and not isinstance( baseline, bool ):
+    return int( baseline )
+  return None
+
+def normalize( cycles, baseline=0, area=None, configs=None, baseline_area=None ):
+  cycles = np.asarray( cycles, dtype=np.float64 )
+  if cycles.ndim != 2:
+    raise ValueError( "expected a (config x benchmark) matrix, got shape {}"
+                      .format( cycles.shape ) )
+
+  row = baseline_row( baseline, configs )
+  if row is not None:
+    base_cycles = cycles[row]
+  else:
+    base_cycles = np.asarray( baseline, dtype=np.float64 )
+
+  perf = base_cycles / cycles
+
+  perf_area = None
+  if area is not None:
+    area = np.asarray( area, dtype=np.float64 )
+    if baseline_area is None:
+      baseline_area = area[row] if row is not None else 1.0
+    perf_area = perf * ( baseline_area / area )[:, np.newaxis]
+
+  return Speedups( perf, perf_area )
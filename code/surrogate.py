@@ -0,0 +1,324 @@
+#=========================================================================
+# surrogate.py
+#=========================================================================
+# Predicts the cycles (or energy) of LTA configs that were never
+# simulated, from the ones that were, with an uncertainty for each
+# prediction, so that only promising points need simulating.
+#
+# The model is linear in log space. Each config becomes a few features
+# of the log2 of its fields (lanes, lane groups, uthreads per lane, time
+# groups, plus squares and products for the curvature of the uthread
+# sweeps, whether lanes or uthreads are decoupled at all, and a
+# multicore flag). One fit over every benchmark, with an intercept per
+# benchmark and shared slopes, is the prior for each benchmark's own
+# Bayesian fit, so a benchmark with few points follows the common shape
+# and one with many finds its own. The prior's spread, and each
+# benchmark's noise, are picked by marginal likelihood over a grid.
+# A prediction is the posterior mean and its standard deviation in log
+# space, so bounds are multiplicative:
+#
+#   model = surrogate.fit( results_store.open_store( 'perf' ) )
+#   pred  = model.predict( 'strsearch', [ '8/4x16/12', '8/4x32/8' ] )
+#   pred.value, pred.low, pred.high          # cycles and a 95% interval
+#
+#   points = surrogate.candidates( lanes=[ 4, 8, 16 ], lane_uthreads=range( 1, 65 ) )
+#   pred   = model.predict_fields( 'strsearch', **points )
+#
+# Energy models sum the metrics given, e.g. every component energy:
+#
+#   surrogate.fit( store, metrics='energy.*' )
+#
+# Evaluating a prediction is two small matrix products over the
+# features, about a second for a million configs:
+#
+#   % python surrogate.py perf strsearch 8/4x16/12 8/4x32/8
+#   % python surrogate.py perf --loo             # leave-one-out error
+#   % python surrogate.py energy-time --metrics 'energy.*' --loo
+#   % python surrogate.py perf --bench 1000000
+#
+
+from __future__ import print_function
+
+import argparse
+import collections
+import fnmatch
+import sys
+import timeit
+
+import numpy as np
+
+import design_points
+import results_store
+
+# Grids the noise and prior variances (in log space) are picked from
+
+noise_grid = np.logspace( -6, -1, 11 )
+prior_grid = np.logspace( -4, 1, 11 )
+
+# Width of the reported interval, in standard deviations (95%)
+
+interval_z = 1.96
+
+#-------------------------------------------------------------------------
+# Features
+#-------------------------------------------------------------------------
+
+feature_names = [
+  'bias', 'lanes', 'lane_groups', 'lane_uthreads', 'time_groups',
+  'lane_uthreads^2', 'time_groups^2', 'lane_uthreads*time_groups',
+  'lanes*lane_uthreads', 'lane_groups*time_groups', 'lane_groups>1',
+  'time_groups>1', 'multicore',
+]
+
+# ( configs x features ) matrix from the design point fields, given as
+# arrays (or scalars) that broadcast together
+
+def features( lanes, lane_groups, lane_uthreads, time_groups, multicore=0 ):
+  fields = np.broadcast_arrays( *[ np.asarray( v, dtype=np.float64 ) for v in
+    ( lanes, lane_groups, lane_uthreads, time_groups, multicore ) ] )
+  a, g, u, t = [ np.log2( v ).reshape( -1 ) for v in fields[:4] ]
+  m = fields[4].reshape( -1 )
+  return np.stack( [ np.ones_like( a ), a, g, u, t, u * u, t * t, u * t,
+                     a * u, g * t, 1.0 * ( g > 0 ), 1.0 * ( t > 0 ), m ],
+                   axis=-1 )
+
+# Field arrays of the LTA configs named by labels
+
+def label_fields( labels ):
+  points = [ design_points.parse( label ) for label in labels ]
+  for label, point in zip( labels, points ):
+    if point.kind != 'LTA':
+      raise ValueError( "'{}' is not an LTA config".format( label ) )
+  fields = dict( ( name, np.array( [ getattr( p, name ) for p in points ] ) )
+                 for name in design_points.fields )
+  fields['multicore'] = np.array( [ p.multicore for p in points ], dtype=int )
+  return fields
+
+# Every valid combination of the field values given, as field arrays:
+# lane groups divide the lanes and time groups divide the uthreads per
+# lane. Unspecified fields take every value up to 16 that divides.
+
+def candidates( lanes=( 4, 8 ), lane_groups=None, lane_uthreads=( 4, 8, 16 ),
+                time_groups=None, multicore=( 0, ) ):
+  lane_groups = lane_groups or range( 1, 17 )
+  time_groups = time_groups or range( 1, 17 )
+  grid = np.meshgrid( *[ np.asarray( list( v ) ) for v in
+    ( lanes, lane_groups, lane_uthreads, time_groups, multicore ) ],
+    indexing='ij' )
+  a, g, u, t, m = [ v.reshape( -1 ) for v in grid ]
+  valid = ( a % g == 0 ) & ( u % t == 0 )
+  return { 'lanes' : a[valid], 'lane_groups' : g[valid],
+           'lane_uthreads' : u[valid], 'time_groups' : t[valid],
+           'multicore' : m[valid] }
+
+#-------------------------------------------------------------------------
+# Surrogate
+#-------------------------------------------------------------------------
+# Fitted on a ( benchmark x config ) matrix of values with NaN where a
+# config was not simulated, X holding the configs' features.
+
+Prediction = collections.namedtuple(
+  'Prediction', [ 'value', 'low', 'high', 'log_mean', 'log_sd' ] )
+
+class Surrogate( object ):
+
+  def __init__( self, benchmarks, X, values, noise=None, prior=None ):
+    self.benchmarks = list( benchmarks )
+    self.bmark_idx  = dict( ( b, i ) for i, b in enumerate( self.benchmarks ) )
+    self.X = np.asarray( X, dtype=np.float64 )
+    self.Y = np.log( np.asarray( values, dtype=np.float64 ) )
+    self.known = np.isfinite( self.Y )
+
+    self.means = self.pooled_fit()
+    if noise is None or prior is None:
+      noise, prior = self.pick_variances()
+    self.noise, self.prior = noise, prior
+    self.posteriors = [ self.posterior( b ) for b in range( len( self.benchmarks ) ) ]
+
+  # Least squares over every benchmark with its own intercept and shared
+  # slopes. Returns the ( benchmark x features ) prior means.
+
+  def pooled_fit( self ):
+    rows, cols = np.nonzero( self.known )
+    B, p = len( self.benchmarks ), self.X.shape[1]
+    design = np.zeros( ( len( rows ), B + p - 1 ) )
+    design[ np.arange( len( rows ) ), rows ] = 1.0
+    design[ :, B: ] = self.X[ cols, 1: ]
+
+    # A touch of ridge keeps features no config varies from blowing up
+
+    ridge = 1e-6 * np.eye( design.shape[1] )
+    coef = np.linalg.solve( design.T.dot( design ) + ridge,
+                            design.T.dot( self.Y[ rows, cols ] ) )
+    means = np.empty( ( B, p ) )
+    means[:, 0]  = coef[:B]
+    means[:, 1:] = coef[B:]
+    return means
+
+  # Log marginal likelihood of benchmark b's values under its prior mean
+
+  def evidence( self, b, noise, prior ):
+    known = self.known[b]
+    X, y = self.X[known], self.Y[b, known]
+    cov = noise * np.eye( len( y ) ) + prior * X.dot( X.T )
+    r = y - X.dot( self.means[b] )
+    sign, logdet = np.linalg.slogdet( cov )
+    return -0.5 * ( logdet + r.dot( np.linalg.solve( cov, r ) ) )
+
+  # The prior variance, and for it each benchmark's noise variance,
+  # maximizing the marginal likelihood of all the values. Some
+  # benchmarks are much noisier than others, so the noise is their own.
+
+  def pick_variances( self ):
+    best, best_ll = None, -np.inf
+    for prior in prior_grid:
+      ll, noise = 0.0, []
+      for b in range( len( self.benchmarks ) ):
+        fits = [ ( self.evidence( b, n, prior ), n ) for n in noise_grid ]
+        b_ll, b_noise = max( fits )
+        ll += b_ll
+        noise.append( b_noise )
+      if ll > best_ll:
+        best, best_ll = ( np.array( noise ), prior ), ll
+    return best
+
+  # Posterior ( mean, covariance ) of benchmark b's weights
+
+  def posterior( self, b, known=None ):
+    known = self.known[b] if known is None else known
+    X, y = self.X[known], self.Y[b, known]
+    noise = self.noise[b]
+    precision = X.T.dot( X ) / noise + np.eye( X.shape[1] ) / self.prior
+    cov = np.linalg.inv( precision )
+    mean = cov.dot( X.T.dot( y ) / noise + self.means[b] / self.prior )
+    return mean, cov
+
+  #-----------------------------------------------------------------------
+  # Prediction
+  #-----------------------------------------------------------------------
+
+  def predict_features( self, bmark, X, posterior=None ):
+    b = self.bmark_idx[bmark]
+    mean, cov = posterior or self.posteriors[b]
+    log_mean = X.dot( mean )
+    log_sd = np.sqrt( self.noise[b] + ( X.dot( cov ) * X ).sum( axis=1 ) )
+    return Prediction( np.exp( log_mean ),
+                       np.exp( log_mean - interval_z * log_sd ),
+                       np.exp( log_mean + interval_z * log_sd ),
+                       log_mean, log_sd )
+
+  def predict_fields( self, bmark, lanes, lane_groups, lane_uthreads,
+                      time_groups, multicore=0 ):
+    return self.predict_features( bmark, features(
+      lanes, lane_groups, lane_uthreads, time_groups, multicore ) )
+
+  def predict( self, bmark, labels ):
+    return self.predict_fields( bmark, **label_fields( labels ) )
+
+  # Leave-one-out: each simulated value predicted from its benchmark's
+  # other values, with the prior and variances held as fitted. Returns
+  # a ( benchmark x config ) matrix of log errors and one of z-scores.
+
+  def loo( self ):
+    errors = np.full( self.Y.shape, np.nan )
+    scores = np.full( self.Y.shape, np.nan )
+    for b, c in zip( *np.nonzero( self.known ) ):
+      known = self.known[b].copy()
+      known[c] = False
+      pred = self.predict_features( self.benchmarks[b], self.X[c:c+1],
+                                    self.posterior( b, known ) )
+      errors[b, c] = pred.log_mean[0] - self.Y[b, c]
+      scores[b, c] = errors[b, c] / pred.log_sd[0]
+    return errors, scores
+
+#-------------------------------------------------------------------------
+# fit
+#-------------------------------------------------------------------------
+# Fits on the LTA configs of a results store. metrics is a metric, a
+# list of them or a shell pattern, and the model predicts their sum.
+
+def store_metrics( store, metrics ):
+  if isinstance( metrics, str ):
+    metrics = [ metrics ]
+  names = []
+  for metric in metrics:
+    names += [ m for m in store.metrics
+               if fnmatch.fnmatchcase( m, metric ) and m not in names ]
+  if not names:
+    raise KeyError( "no metric matching {} in store {}".format(
+      ', '.join( metrics ), store.path ) )
+  return names
+
+def fit( store, metrics='cycles', benchmarks=None ):
+  metrics = store_metrics( store, metrics )
+  benchmarks = list( benchmarks or store.benchmarks )
+  configs = [ c for c in store.configs
+              if design_points.parse( c ).kind == 'LTA' ]
+
+  values = store.tensor( benchmarks, configs, metrics ).sum( axis=-1 )
+  values[ ~( values > 0 ) ] = np.nan
+  X = features( **label_fields( configs ) )
+  model = Surrogate( benchmarks, X, values )
+  model.configs = configs
+  model.metrics = metrics
+  return model
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description='Predict unsimulated configs.' )
+  p.add_argument( 'store', help='results store to fit on' )
+  p.add_argument( 'bmark', nargs='?', help='benchmark to predict for' )
+  p.add_argument( 'configs', nargs='*', help='LTA configs to predict' )
+  p.add_argument( '--metrics', default='cycles',
+                  help='metric or shell pattern of metrics to sum '
+                       '(default: cycles)' )
+  p.add_argument( '--loo', action='store_true',
+                  help='report the leave-one-out error' )
+  p.add_argument( '--bench', type=int, default=None, metavar='N',
+                  help='time predicting N candidate configs' )
+  opts = p.parse_args( argv )
+
+  start = timeit.default_timer()
+  model = fit( results_store.open_store( opts.store ), opts.metrics )
+  print( "fitted {} benchmarks x {} configs in {:.2f}s (prior sd {:.3f})"
+         .format( len( model.benchmarks ), len( model.configs ),
+                  timeit.default_timer() - start, np.sqrt( model.prior ) ) )
+
+  if opts.loo:
+    errors, scores = model.loo()
+    for b, bmark in enumerate( model.benchmarks ):
+      known = np.isfinite( errors[b] )
+      percent = 100 * np.abs( np.expm1( errors[b, known] ) )
+      print( "  {:<12} {:3d} points  noise {:5.1f}%  median {:5.1f}%  "
+             "max {:5.1f}%  within 95%: {:3.0f}%".format(
+               bmark, known.sum(), 100 * np.sqrt( model.noise[b] ),
+               np.median( percent ), percent.max(),
+               100 * np.mean( np.abs( scores[b, known] ) <= interval_z ) ) )
+    known = np.isfinite( errors )
+    print( "  all: median {:.1f}% error".format(
+      100 * np.median( np.abs( np.expm1( errors[known] ) ) ) ) )
+
+  if opts.bench:
+    bmark = opts.bmark or model.benchmarks[0]
+    rng = np.random.RandomState( 0 )
+    points = candidates( lanes=[ 2, 4, 8, 16, 32 ],
+                         lane_uthreads=range( 1, 129 ), multicore=( 0, 1 ) )
+    pick = rng.randint( 0, len( points['lanes'] ), opts.bench )
+    points = dict( ( k, v[pick] ) for k, v in points.items() )
+    start = timeit.default_timer()
+    model.predict_fields( bmark, **points )
+    print( "predicted {} configs in {:.2f}s".format(
+      opts.bench, timeit.default_timer() - start ) )
+
+  if opts.bmark and opts.configs:
+    pred = model.predict( opts.bmark, opts.configs )
+    for i, label in enumerate( opts.configs ):
+      print( "  {:<12} {:<14} {:10.4g}  [{:.4g}, {:.4g}]".format(
+        opts.bmark, label, pred.value[i], pred.low[i], pred.high[i] ) )
+  return 0
+
+if __name__ == '__main__':
+  sys.exit( main() )
@@ -0,0 +1,184 @@
+#=========================================================================
+# watch_figures.py
+#=========================================================================
+# Rebuilds figures as they are edited. Keeps one warm process, with
+# matplotlib, the shared style and the PDF backend already imported,
+# and polls the figure scripts, the local modules and the data files
+# each figure read during its last render. When any of them changes,
+# only the figures that depend on it are run again, in this process,
+# through the usual build (see build_figures.py), so an edit to a bar
+# width costs that one figure's render rather than a fresh interpreter:
+#
+#   % python watch_figures.py                          # every figure
+#   % python watch_figures.py fig-evaluation-perf-time.py
+#   % python watch_figures.py --formats pdf,png fig-motivation-native.py
+#
+# Edited helper modules are imported afresh before the next render. An
+# edit to the build machinery itself (this file, build_figures.py and
+# the modules that hook matplotlib) restarts the watcher instead.
+#
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import time
+
+import build_cache
+import build_figures
+
+code_dir = build_figures.code_dir
+
+# Modules that hold process-wide state or hooks, which cannot simply be
+# imported again
+
+pinned = [
+  'build_cache',
+  'build_figures',
+  'figure_phases',
+  'figure_profile',
+  'font_cache',
+  'watch_figures',
+]
+
+#-------------------------------------------------------------------------
+# Watched files
+#-------------------------------------------------------------------------
+
+def stat_key( path ):
+  try:
+    return build_cache.stat_key( path )
+  except OSError:
+    return None
+
+# The scripts, every local module, and the deps each figure recorded in
+# the build cache on its last render
+
+def watched_files( scripts, cache ):
+  paths = set( scripts )
+  for name in os.listdir( code_dir ):
+    if name.endswith( '.py' ):
+      paths.add( os.path.join( code_dir, name ) )
+  for script in scripts:
+    entry = cache.figures.get( os.path.basename( script ) )
+    if entry is not None:
+      paths.update( entry['deps'] )
+  return paths
+
+def snapshot( paths ):
+  return dict( ( path, stat_key( path ) ) for path in paths )
+
+def changed_files( before, after ):
+  return sorted( path for path in set( before ) | set( after )
+                 if before.get( path ) != after.get( path ) )
+
+# Scripts that are themselves in changed or that read a changed file
+
+def affected_scripts( scripts, cache, changed ):
+  changed = set( changed )
+  affected = []
+  for script in scripts:
+    entry = cache.figures.get( os.path.basename( script ) )
+    deps = entry['deps'] if entry is not None else []
+    if script in changed or changed.intersection( deps ):
+      affected.append( script )
+  return affected
+
+#-------------------------------------------------------------------------
+# Module reloading
+#-------------------------------------------------------------------------
+
+def local_module( path ):
+  if os.path.dirname( path ) != code_dir or not path.endswith( '.py' ):
+    return None
+  name = os.path.basename( path )[:-3]
+  return None if '-' in name else name
+
+# Drops every local helper module that is not pinned, so the next render
+# imports the edited module and everything that imported it afresh
+
+def evict_modules():
+  for name, module in list( sys.modules.items() ):
+    path = getattr( module, '__file__', None )
+    if name in pinned or not path:
+      continue
+    if os.path.dirname( os.path.abspath( path ) ) == code_dir:
+      del sys.modules[name]
+
+def restart():
+  print( "build machinery changed, restarting" )
+  sys.stdout.flush()
+  os.execv( sys.executable, [ sys.executable ] + sys.argv )
+
+#-------------------------------------------------------------------------
+# watch
+#-------------------------------------------------------------------------
+# With names empty every figure script is watched, including ones added
+# while watching.
+
+def watch( names, outdir=None, interval=0.2 ):
+  scripts = build_figures.resolve_scripts( names )
+  build_figures.build( scripts, jobs=1, outdir=outdir )
+
+  cache  = build_cache.BuildCache()
+  before = snapshot( watched_files( scripts, cache ) )
+  print( "watching {} figures".format( len( scripts ) ) )
+  sys.stdout.flush()
+
+  while True:
+    time.sleep( interval )
+    if not names:
+      scripts = build_figures.discover_scripts()
+
+    after   = snapshot( watched_files( scripts, cache ) )
+    changed = changed_files( before, after )
+    if not changed:
+      continue
+
+    modules = [ local_module( path ) for path in changed ]
+    if any( name in pinned for name in modules ):
+      restart()
+    if any( modules ):
+      evict_modules()
+
+    affected = affected_scripts( scripts, cache, changed )
+    affected += [ s for s in scripts
+                  if os.path.basename( s ) not in cache.figures
+                  and s not in affected ]
+    if affected:
+      build_figures.build( affected, jobs=1, outdir=outdir )
+
+    cache  = build_cache.BuildCache()
+    before = snapshot( watched_files( scripts, cache ) )
+
+#-------------------------------------------------------------------------
+# Main
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description='Rebuild figures as they change.' )
+  p.add_argument( 'scripts', nargs='*',
+                  help='scripts to watch (default: every figure script)' )
+  p.add_argument( '-o', '--outdir', default=None,
+                  help='write figures here instead of next to each script' )
+  p.add_argument( '--formats', default=None,
+                  help='comma-separated output formats (default: '
+                       '$FIGURE_FORMATS or pdf)' )
+  p.add_argument( '-i', '--interval', type=float, default=0.2,
+                  help='seconds between polls (default: 0.2)' )
+  opts = p.parse_args( argv )
+
+  if opts.formats:
+    os.environ['FIGURE_FORMATS'] = opts.formats
+  if opts.outdir:
+    opts.outdir = os.path.abspath( opts.outdir )
+
+  try:
+    watch( opts.scripts, opts.outdir, opts.interval )
+  except KeyboardInterrupt:
+    pass
+  return 0
+
+if __name__ == '__main__':
+  sys.exit( main() )